@@ -1,35 +1,156 @@
-from flask import Flask
+from flask import Flask, Response, request
 from flask_cors import CORS
 from dotenv import load_dotenv
+import asyncio
+import hmac
+import logging
 import os
 
-from backend.config.config import ALLOWED_ORIGINS
+from backend.config.config import ALLOWED_ORIGINS, SERVE_MODE, SERVER_TIMING, WARMUP_DEFER, SHARD_API, SHARD_API_TOKEN
 from backend.utils.logger import get_logger
+from backend.utils import metrics
+from backend.services import warmup, rag_service
 from backend.routes.chat import bp as chat_bp
 
-def create_app():
+# 요청마다 1줄 (DEBUG — LOG_LEVEL=DEBUG일 때 LOG_DEBUG_SAMPLE 비율로): 요청 id, 상태, 총·stage별 ms
+access_log = get_logger("access")
+
+def _cors_origins():
+    if not ALLOWED_ORIGINS or ALLOWED_ORIGINS == "*":
+        return "*"
+    return [o.strip() for o in ALLOWED_ORIGINS.split(",") if o.strip()]
+
+def _finish(resp, req):
+    """요청 지표 기록 + X-Request-ID + (SERVER_TIMING 또는 X-Timing: 1 요청이면) Server-Timing 헤더"""
+    endpoint = req.url_rule.rule if req.url_rule is not None else "unmatched"
+    header = metrics.finish_request(endpoint, resp.status_code)
+    if SERVER_TIMING or req.headers.get("X-Timing") == "1":
+        resp.headers["Server-Timing"] = header
+    resp.headers["X-Request-ID"] = metrics.request_id() or ""
+    if access_log.isEnabledFor(logging.DEBUG):
+        access_log.debug(f"{req.method} {req.path} {resp.status_code}", extra={
+            "endpoint": endpoint, "status": resp.status_code, "ms": round(metrics.request_seconds() * 1000, 1),
+            "stages_ms": {st: round(dt * 1000, 1) for st, dt in metrics.stage_totals().items()}})
+    return resp
+
+def _shard_authorized(headers) -> bool:
+    """/shard/search는 청크 본문을 돌려주므로 X-Shard-Token이 SHARD_API_TOKEN과 같을 때만 (상수 시간 비교)"""
+    return hmac.compare_digest(headers.get("X-Shard-Token", ""), SHARD_API_TOKEN)
+
+def _create_async_app():
+    """SERVE_MODE=async: 같은 라우트를 Quart(ASGI)로 — uvicorn/hypercorn으로 실행"""
+    try:
+        from quart import Quart
+        from quart_cors import cors
+    except ImportError as e:
+        raise RuntimeError("SERVE_MODE=async requires: pip install -r requirements-async.txt") from e
+    from backend.routes.chat_async import bp as chat_async_bp
+
+    from quart import Response as QResponse, request as qrequest
+
+    app = cors(Quart(__name__), allow_origin=_cors_origins())
+    app.register_blueprint(chat_async_bp)
+
+    @app.before_request
+    async def _begin():
+        metrics.begin_request(qrequest.headers.get("X-Request-ID"))
+
+    @app.after_request
+    async def _end(resp):
+        return _finish(resp, qrequest)
+
+    @app.get("/metrics")
+    async def prom_metrics():
+        return QResponse(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True, "ts": os.getenv("APP_TS", "n/a")}
+
+    @app.get("/ready")
+    async def ready():
+        st = warmup.status()
+        return {"ok": st["status"] == "ready", **st}, 200 if st["status"] == "ready" else 503
+
+    if SHARD_API:
+        @app.post("/shard/search")
+        async def shard_search():
+            from backend.services import offload
+            if not _shard_authorized(qrequest.headers):
+                return {"ok": False, "error": "forbidden"}, 403
+            return await offload.run(rag_service.serve_shard, await qrequest.get_json(force=True))
+
+    @app.before_serving
+    async def _warmup():
+        # 워커 프로세스의 이벤트 루프가 뜬 뒤: 인덱스 쪽은 스레드로, 업스트림 커넥션은 이 루프의 클라이언트로
+        warmup.start(upstream=False)
+        app.warmup_task = asyncio.get_running_loop().create_task(warmup.aupstream())
+
+    return app
+
+def create_app(mode: str | None = None):
     load_dotenv()
-    app = Flask(__name__)
+    mode = mode or SERVE_MODE
     logger = get_logger("app")
+    if SHARD_API and not SHARD_API_TOKEN:
+        raise RuntimeError("SHARD_API=1 requires SHARD_API_TOKEN (shared secret for /shard/search)")
+
+    if mode == "async":
+        app = _create_async_app()
+        logger.info("Quart (async) app initialized")
+        return app
+
+    app = Flask(__name__)
 
     # CORS
-    if not ALLOWED_ORIGINS or ALLOWED_ORIGINS == "*":
+    origins = _cors_origins()
+    if origins == "*":
         CORS(app)
     else:
-        origins = [o.strip() for o in ALLOWED_ORIGINS.split(",") if o.strip()]
         CORS(app, resources={r"/*": {"origins": origins}})
 
     # Blueprints
     app.register_blueprint(chat_bp)
 
+    # 지표: 요청별 stage 타이밍, /metrics (Prometheus)
+    @app.before_request
+    def _begin():
+        metrics.begin_request(request.headers.get("X-Request-ID"))
+
+    @app.after_request
+    def _end(resp):
+        return _finish(resp, request)
+
+    @app.get("/metrics")
+    def prom_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
     @app.get("/health")
     def health():
         return {"ok": True, "ts": os.getenv("APP_TS", "n/a")}
 
+    # /health는 프로세스 생존만, /ready는 이 워커의 워밍업(인덱스 로드·page-in·더미 검색·업스트림)이 끝났을 때 200
+    @app.get("/ready")
+    def ready():
+        st = warmup.status()
+        return {"ok": st["status"] == "ready", **st}, 200 if st["status"] == "ready" else 503
+
+    # 원격 샤드로 쓰일 노드: 다른 노드의 rag_service(REMOTE_SHARDS)가 여기로 질의를 보낸다
+    if SHARD_API:
+        @app.post("/shard/search")
+        def shard_search():
+            if not _shard_authorized(request.headers):
+                return {"ok": False, "error": "forbidden"}, 403
+            return rag_service.serve_shard(request.get_json(force=True))
+
+    # gunicorn은 post_fork에서 시작 (preload master에서 스레드·커넥션을 만들지 않도록)
+    if not WARMUP_DEFER:
+        warmup.start()
+
     logger.info("Flask app initialized")
     return app
 
-# WSGI 엔트리
+# WSGI 엔트리 (SERVE_MODE=async 이면 ASGI 앱)
 app = create_app()
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 from pathlib import Path
 import os
 
+from backend.store.generations import current_dir
+
 # ── 프로젝트 루트 (P_backend/)
 ROOT_DIR = Path(__file__).resolve().parents[2]
 
@@ -11,19 +13,106 @@ CLEANED_DIR = DATA_DIR / "cleaned"
 CHUNKS_DIR  = DATA_DIR / "chunks"
 
 # ── 벡터스토어 경로
-VSTORE_DIR   = ROOT_DIR / "vectorstore" / "dev" / "current"
+# VSTORE_ROOT/generations/<세대>/ + CURRENT 포인터 (backend/store/generations.py).
+# VSTORE_DIR는 import 시점의 현재 세대 (세대가 없으면 레거시 VSTORE_ROOT/current) — 일회성 스크립트용,
+# 서버는 rag_service의 백그라운드 로더가 CURRENT를 감시한다.
+VSTORE_ROOT  = ROOT_DIR / "vectorstore" / "dev"
+VSTORE_DIR   = current_dir(VSTORE_ROOT)
+VSTORE_KEEP_GENERATIONS = int(os.getenv("VSTORE_KEEP_GENERATIONS", "3"))   # 0 이하면 지우지 않음
+VSTORE_POLL_SECONDS     = float(os.getenv("VSTORE_POLL_SECONDS", "2"))     # 서버의 CURRENT 확인 주기
 VSTORE_INDEX = VSTORE_DIR / "faiss_index.idx"
-VSTORE_META  = VSTORE_DIR / "metadatas.json"
+VSTORE_META  = VSTORE_DIR / "metadatas.json"   # 레거시 JSON (VSTORE_META_JSON=1 일 때만 같이 기록)
+VSTORE_META_BIN = VSTORE_DIR / "metadatas.bin" # 컬럼형 메타 (backend/store/meta_store.py)
+VSTORE_CHUNKS = VSTORE_DIR / "chunks.bin"   # row id 정렬 청크 본문 팩
 
 # ── 모델 이름 (환경변수로 오버라이드 가능)
 EMBED_MODEL = os.getenv("EMBED_MODEL", "text-embedding-3-small")
 CHAT_MODEL  = os.getenv("CHAT_MODEL", "gpt-4o")
 
+# ── FAISS 인덱스 종류/파라미터 (backend/store/vector_index.py)
+INDEX_TYPE           = os.getenv("INDEX_TYPE", "flat")         # flat | ivf_flat | ivf_pq | hnsw | sq8 | ivf_sq8
+IVF_NLIST            = int(os.getenv("IVF_NLIST", "0"))        # 0이면 4·sqrt(N)
+PQ_M                 = int(os.getenv("PQ_M", "64"))            # PQ 서브벡터 수 (dim의 약수로 보정)
+HNSW_M               = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+INDEX_NPROBE         = int(os.getenv("INDEX_NPROBE", "16"))    # IVF 검색 시 탐색 리스트 수
+INDEX_EF_SEARCH      = int(os.getenv("INDEX_EF_SEARCH", "64")) # HNSW 검색 후보 폭
+INDEX_RERANK         = int(os.getenv("INDEX_RERANK", "4"))     # 양자화 인덱스: k×이 배수만큼 뽑아 vectors.npy로 정확 재정렬 (1이면 끔)
+INDEX_TRAIN_SAMPLE   = int(os.getenv("INDEX_TRAIN_SAMPLE", "100000"))
+COMPACT_DEAD_FRACTION = float(os.getenv("COMPACT_DEAD_FRACTION", "0.2"))  # dead 행 비율이 넘으면 compaction
+INDEX_MMAP           = os.getenv("INDEX_MMAP", "1") == "1"     # 서버: 인덱스를 mmap으로 열어 워커 간 공유
+
+# ── 검색 모드 (backend/services/rag_service.search)
+SEARCH_MODE       = os.getenv("SEARCH_MODE", "vector")           # vector | bm25 | hybrid (요청 "mode"로도 선택)
+HYBRID_ALPHA      = float(os.getenv("HYBRID_ALPHA", "0.65"))     # 벡터 점수 가중치
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))    # 방식별 후보 수
+BM25_INDEX        = os.getenv("BM25_INDEX", "1") == "1"          # ingest 시 bm25.bin 생성
+# categories 필터: 선택된 행이 이 수 이하면 인덱스 대신 vectors.npy에서 해당 행만 정확 계산
+FILTER_EXACT_ROWS = int(os.getenv("FILTER_EXACT_ROWS", "20000"))
+# 샤드별로 유지하는 카테고리 조합 RowFilter 수 (LRU)
+FILTER_CACHE_SIZE = int(os.getenv("FILTER_CACHE_SIZE", "64"))
+
+# ── 샤드 (backend/store/shards.py) — 세대 하나를 rel_path 해시로 N개 인덱스로 나눔
+VSTORE_SHARDS   = int(os.getenv("VSTORE_SHARDS", "1"))       # 임베더가 만들 샤드 수 (1이면 샤드 없는 기존 레이아웃)
+SHARD_THREADS   = int(os.getenv("SHARD_THREADS", "8"))       # 샤드 fan-out 스레드 수 (FAISS search는 GIL을 놓는다)
+# 원격 샤드: 다른 노드의 /shard/search (SHARD_API=1로 띄운 같은 백엔드). 쉼표 구분 base URL
+REMOTE_SHARDS        = [u.strip().rstrip("/") for u in os.getenv("REMOTE_SHARDS", "").split(",") if u.strip()]
+REMOTE_SHARD_TIMEOUT = float(os.getenv("REMOTE_SHARD_TIMEOUT", "2.0"))
+SHARD_API            = os.getenv("SHARD_API", "0") == "1"    # 이 노드의 /shard/search 공개 여부
+# /shard/search 공유 비밀 — 샤드 노드는 X-Shard-Token 헤더가 이 값과 같아야 응답, 앞단 노드는 이 값을 보낸다
+SHARD_API_TOKEN      = os.getenv("SHARD_API_TOKEN", "")
+
+# ── ingest 임베딩 실행기 (pipelines/embed_engine.py)
+EMBED_CONCURRENCY  = int(os.getenv("EMBED_CONCURRENCY", "4"))        # 동시 요청 수
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "100000"))  # 요청당 토큰 예산 (API 상한 300k)
+EMBED_BATCH_ITEMS  = int(os.getenv("EMBED_BATCH_ITEMS", "512"))      # 요청당 입력 수 (API 상한 2048)
+# 내용 주소 벡터 캐시 (pipelines/vector_cache.py). VECTOR_CACHE=0 이면 비활성
+VECTOR_CACHE       = os.getenv("VECTOR_CACHE", "1") == "1"
+VECTOR_CACHE_DIR   = Path(os.getenv("VECTOR_CACHE_DIR", str(DATA_DIR / "vcache")))
+
+# ── 질의 임베딩 캐시 (EMBED_CACHE_SIZE=0 이면 비활성, EMBED_CACHE_DIR 비우면 디스크 계층 없음)
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+EMBED_CACHE_TTL  = float(os.getenv("EMBED_CACHE_TTL", "86400"))   # 초, 0 이하면 만료 없음
+EMBED_CACHE_DIR  = os.getenv("EMBED_CACHE_DIR", str(ROOT_DIR / "cache"))
+EMBED_CACHE_DISK_ROWS = int(os.getenv("EMBED_CACHE_DISK_ROWS", "100000"))  # sqlite 계층 최대 행 수 (오래된 것부터 삭제)
+
+# ── 시맨틱 답변 캐시 (ANSWER_CACHE_SIZE=0 이면 비활성)
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_SIM  = float(os.getenv("ANSWER_CACHE_SIM", "0.97"))    # 코사인 유사도 임계값
+ANSWER_CACHE_TTL  = float(os.getenv("ANSWER_CACHE_TTL", "3600"))    # 초, 0 이하면 만료 없음
+
+# ── 스트리밍 응답 (/api/ask-rag/stream)
+STREAM_MAX_SECONDS = float(os.getenv("STREAM_MAX_SECONDS", "120"))  # 한 스트림의 최대 지속 시간
+
+# ── 배치 질의 (/api/ask-rag/batch)
+BATCH_MAX_QUESTIONS    = int(os.getenv("BATCH_MAX_QUESTIONS", "500"))
+BATCH_CHAT_CONCURRENCY = int(os.getenv("BATCH_CHAT_CONCURRENCY", "8"))   # 동시 chat completion 수
+
+# ── 서빙 모드: sync(Flask, gunicorn) | async(Quart, ASGI 서버) — backend/app.py
+SERVE_MODE      = os.getenv("SERVE_MODE", "sync")
+OFFLOAD_THREADS = int(os.getenv("OFFLOAD_THREADS", "8"))   # async 모드에서 FAISS 검색/파일 I/O용 스레드 수
+
+# ── 지표 (/metrics, Server-Timing)
+# METRICS_DIR: 워커별 스냅샷을 모아 /metrics에서 합산 (비우면 응답한 프로세스 값만). gunicorn.conf.py가 기본값 지정
+METRICS_DIR           = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+# ── 워커 워밍업 (backend/services/warmup.py) — 끝나야 /ready가 200
+WARMUP          = os.getenv("WARMUP", "background")           # background | sync | off
+WARMUP_PAGE_IN  = os.getenv("WARMUP_PAGE_IN", "1") == "1"     # 세대 파일을 끝까지 읽어 page cache에 올림
+WARMUP_UPSTREAM = os.getenv("WARMUP_UPSTREAM", "1") == "1"    # OpenAI 커넥션 미리 열기
+WARMUP_DEFER    = os.getenv("WARMUP_DEFER", "0") == "1"       # 앱 생성 시가 아니라 post_fork에서 시작 (gunicorn.conf.py가 설정)
+SERVER_TIMING         = os.getenv("SERVER_TIMING", "0") == "1"   # 0이면 요청 헤더 X-Timing: 1 일 때만
+
 # ── Flask / CORS / 로깅
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*")  # prod에선 콤마로 구분
 LOG_LEVEL       = os.getenv("LOG_LEVEL", "INFO")
+LOG_MODE        = os.getenv("LOG_MODE", "queue")           # queue(요청 스레드는 큐에 넣기만, writer 스레드가 기록) | sync
+LOG_FORMAT      = os.getenv("LOG_FORMAT", "json")          # logs/backend.log 형식: json(JSON lines) | text
+LOG_QUEUE_SIZE  = int(os.getenv("LOG_QUEUE_SIZE", "10000")) # 가득 차면 버리고 rag_log_dropped_total 증가
+LOG_DEBUG_SAMPLE = float(os.getenv("LOG_DEBUG_SAMPLE", "1.0"))  # DEBUG 기록 중 남길 비율 (요청별 access 로그 등)
 
 def ensure_dirs():
     """파이프라인에서 필요 폴더들을 미리 생성"""
-    for d in [RAW_DIR, CLEANED_DIR, CHUNKS_DIR, VSTORE_DIR]:
+    for d in [RAW_DIR, CLEANED_DIR, CHUNKS_DIR, VSTORE_ROOT]:
         d.mkdir(parents=True, exist_ok=True)
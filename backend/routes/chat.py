@@ -1,57 +1,163 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
-from backend.services.llm_service import embed, chat
-from backend.services.rag_service import search as rag_search, resolve_path_for_meta
+from backend.services.llm_service import embed, embed_many, chat, chat_stream
+from backend.services.rag_service import retrieve as rag_retrieve, retrieve_many as rag_retrieve_many, generation
+from backend.services import answer_cache
+from backend.config.config import STREAM_MAX_SECONDS, BATCH_CHAT_CONCURRENCY
+from backend.routes.common import parse_ask, parse_batch, dedupe_questions, build_prompt, snippets_for, public_hits, sse
+from backend.utils.logger import get_logger
+from backend.utils.metrics import span, observe
 
 bp = Blueprint("chat", __name__)
+logger = get_logger("chat")
 
 @bp.route("/api/ask-rag", methods=["POST"])
 def ask_rag():
-    data = request.get_json(silent=True) or {}
-    question = (data.get("question") or "").strip()
-    top_k = int(data.get("top_k", 5))
-    if not question:
-        return jsonify({"ok": False, "error": "question required"}), 400
+    parsed, err = parse_ask(request.get_json(silent=True) or {})
+    if err:
+        return jsonify({"ok": False, "error": err}), 400
+    question, top_k, mode, categories = parsed
 
     # 1) embed + rag search
-    qv = np.array(embed(question), dtype="float32")
-    hits = rag_search(qv, k=top_k)
+    with span("embed"):
+        qv = np.array(embed(question), dtype="float32")
+    gen = generation()
+    with span("answer_cache"):
+        cached = answer_cache.lookup(qv, question, (top_k, mode, categories), gen)
+    if cached is not None:
+        return jsonify({"ok": True, "answer": cached["answer"], "sources": cached["sources"], "cached": True, "partial": False})
+    with span("search"):
+        hits, partial = rag_retrieve(qv, k=top_k, query=question, mode=mode, categories=categories)
 
-    # 2) build context
-    ctxs = []
-    for i, h in enumerate(hits, 1):
-        p = resolve_path_for_meta(h)
+    # 2) build context + 3) chat
+    with span("context"):
+        prompt = build_prompt(question, hits)
+    with span("chat"):
+        answer = chat([{"role": "user", "content": prompt}])
+    sources = public_hits(hits)
+    if not partial:  # 원격 샤드가 빠진 결과의 답은 캐시하지 않는다
+        answer_cache.store(qv, question, (top_k, mode, categories), gen, sources, answer)
+
+    return jsonify({"ok": True, "answer": answer, "sources": sources, "partial": partial})
+
+@bp.route("/api/ask-rag/stream", methods=["POST"])
+def ask_rag_stream():
+    """
+    SSE 스트리밍 변형
+      event: sources  {"sources": [...], "cached": bool, "partial": bool}  — 검색 직후 바로 전송
+      event: token    {"t": "..."}                          — 완성 토큰 조각
+      event: done     {"ok": true, "cached": bool}
+      event: error    {"ok": false, "error": "..."}
+    STREAM_MAX_SECONDS를 넘기면 업스트림을 닫고 error로 끝낸다.
+    """
+    parsed, err = parse_ask(request.get_json(silent=True) or {})
+    if err:
+        return jsonify({"ok": False, "error": err}), 400
+    question, top_k, mode, categories = parsed
+
+    with span("embed"):
+        qv = np.array(embed(question), dtype="float32")
+    gen = generation()
+    with span("answer_cache"):
+        cached = answer_cache.lookup(qv, question, (top_k, mode, categories), gen)
+    with span("search"):
+        hits, partial = (cached["sources"], False) if cached is not None else rag_retrieve(
+            qv, k=top_k, query=question, mode=mode, categories=categories)
+    sources = public_hits(hits)
+
+    def events():
+        yield sse("sources", {"sources": sources, "cached": cached is not None, "partial": partial})
+        if cached is not None:
+            yield sse("token", {"t": cached["answer"]})
+            yield sse("done", {"ok": True, "cached": True})
+            return
+
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        parts = []
+        with span("context"):
+            prompt = build_prompt(question, hits)
+        t0 = time.perf_counter()
+        tokens = chat_stream([{"role": "user", "content": prompt}])
         try:
-            with open(p, "r", encoding="utf-8") as f:
-                snippet = f.read()[:1600]
-        except Exception:
-            snippet = ""
-        ctxs.append(f"[{i}] {h['filename']} ({h['category']})\n{snippet}")
-
-    # 컨텍스트 블록 문자열 생성 (백슬래시 문제 방지)
-    context_block = "\n\n---\n\n".join(ctxs) if ctxs else "(컨텍스트 없음)"
-
-    # 3) chat
-    prompt = (
-        "당신은 대한민국 법률 전문 챗봇입니다.\n"
-        "아래 제공된 '컨텍스트'는 판례·법령·유권해석 등의 신뢰할 수 있는 자료입니다.\n"
-        "반드시 다음 규칙을 지켜서 답변하세요.\n\n"
-        "1. 답변은 **반드시 컨텍스트를 최우선 근거**로 작성합니다.\n"
-        "2. 핵심 근거(조문/판례 인용은 본문에서 (예: 담배사업법 제11조의5, 대법원 2018도12345)처럼 직접 표기 "
-        "번호는 컨텍스트 블록 순서에 대응합니다.\n"
-        "3. 컨텍스트가 부족하면 일반적인 법률 지식을 참고하여 보충 설명.\n"
-        "4. 금액, 형량, 조문 번호 등은 컨텍스트에 있으면 반드시 그대로 기재합니다.\n"
-        "5. 추측이나 오해를 줄 수 있는 모호한 표현은 사용하지 않습니다.\n"
-        "6. 최종 답변은 간결하지만 법률 문서 수준의 정확성을 유지합니다.\n\n"
-        "-----\n"
-        + context_block + "\n"
-        "-----\n"
-        f"질문: {question}"
+            for t in tokens:
+                if not parts:
+                    observe("rag_stage_seconds", time.perf_counter() - t0, stage="chat.first_token")
+                parts.append(t)
+                yield sse("token", {"t": t})
+                if time.monotonic() > deadline:
+                    yield sse("error", {"ok": False, "error": "stream time limit exceeded"})
+                    return
+        except Exception as e:
+            logger.warning(f"stream aborted: {e}")
+            yield sse("error", {"ok": False, "error": "completion failed"})
+            return
+        finally:
+            # 클라이언트가 끊어도(GeneratorExit) 업스트림 스트림을 닫는다
+            tokens.close()
+            observe("rag_stage_seconds", time.perf_counter() - t0, stage="chat")
+        if not partial:
+            answer_cache.store(qv, question, (top_k, mode, categories), gen, sources, "".join(parts))
+        yield sse("done", {"ok": True, "cached": False})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    answer = chat([{"role": "user", "content": prompt}])
 
-    return jsonify({"ok": True, "answer": answer, "sources": hits})
+@bp.route("/api/ask-rag/batch", methods=["POST"])
+def ask_rag_batch():
+    """
+    {"questions": [...], "top_k": 5, "mode": "...", "categories": ["법령"], "retrieval_only": false}
+    임베딩 요청 1번 + (n, d) FAISS search 1번, 청크 본문은 row id당 1번 읽고,
+    chat은 BATCH_CHAT_CONCURRENCY개씩 동시에. 결과는 질문 순서대로.
+    """
+    parsed, err = parse_batch(request.get_json(silent=True) or {})
+    if err:
+        return jsonify({"ok": False, "error": err}), 400
+    questions, top_k, mode, categories, retrieval_only = parsed
+
+    uniq, inv = dedupe_questions(questions)
+    with span("embed"):
+        Q = embed_many(uniq)
+    with span("search"):
+        uniq_hits, partial = rag_retrieve_many(Q, k=top_k, queries=uniq, mode=mode, categories=categories)
+    Q, hits_lists = Q[inv], [uniq_hits[j] for j in inv]   # 원래 질문 순서로 펼침
+    results = [{"question": q, "sources": public_hits(hits)} for q, hits in zip(questions, hits_lists)]
+    if retrieval_only:
+        return jsonify({"ok": True, "results": results, "partial": partial})
+
+    gen = generation()
+    todo = {}   # 고유 질문 인덱스 → 결과 인덱스들 (같은 질문은 chat 1번)
+    for i, q in enumerate(questions):
+        cached = answer_cache.lookup(Q[i], questions[i], (top_k, mode, categories), gen)
+        if cached is not None:
+            results[i].update(ok=True, answer=cached["answer"], sources=cached["sources"], cached=True)
+        else:
+            todo.setdefault(inv[i], []).append(i)
+    with span("context"):
+        snips = snippets_for(hits_lists[idxs[0]] for idxs in todo.values())
+
+    def answer_one(i):
+        try:
+            answer = chat([{"role": "user", "content": build_prompt(questions[i], hits_lists[i], snips)}])
+        except Exception as e:
+            logger.warning(f"batch item {i} failed: {e}")
+            return {"ok": False, "error": "completion failed"}
+        if not partial:
+            answer_cache.store(Q[i], questions[i], (top_k, mode, categories), gen, results[i]["sources"], answer)
+        return {"ok": True, "answer": answer}
+
+    if todo:
+        firsts = [idxs[0] for idxs in todo.values()]
+        with span("chat"), ThreadPoolExecutor(max_workers=min(BATCH_CHAT_CONCURRENCY, len(firsts))) as ex:
+            for idxs, res in zip(todo.values(), ex.map(answer_one, firsts)):
+                for i in idxs:
+                    results[i].update(res)
+    return jsonify({"ok": True, "results": results, "partial": partial})
 
 @bp.route("/api/ask", methods=["POST", "OPTIONS"])
 def ask_alias():
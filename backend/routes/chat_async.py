@@ -0,0 +1,162 @@
+# backend/routes/chat_async.py
+"""
+chat.py와 같은 라우트의 async(Quart) 버전 — SERVE_MODE=async 일 때 create_app이 등록
+  - OpenAI 호출은 공유 AsyncOpenAI 클라이언트(커넥션 풀)로 await
+  - FAISS 검색·프롬프트 조립(청크 읽기)은 offload 스레드 풀에서 실행
+"""
+import asyncio
+import time
+
+import numpy as np
+from quart import Blueprint, request, jsonify, Response
+
+from backend.services.llm_service import aembed, aembed_many, achat, achat_stream
+from backend.services.rag_service import retrieve as rag_retrieve, retrieve_many as rag_retrieve_many, generation
+from backend.services import answer_cache, offload
+from backend.config.config import STREAM_MAX_SECONDS, BATCH_CHAT_CONCURRENCY
+from backend.routes.common import parse_ask, parse_batch, dedupe_questions, build_prompt, snippets_for, public_hits, sse
+from backend.utils.logger import get_logger
+from backend.utils.metrics import span, observe
+
+bp = Blueprint("chat", __name__)
+logger = get_logger("chat")
+
+async def _retrieve(question: str, top_k: int, mode: str, categories=None):
+    """embed → (캐시 조회 | 검색) → (qv, gen, cached, hits, partial)"""
+    with span("embed"):
+        qv = np.array(await aembed(question), dtype="float32")
+    gen = await offload.run(generation)
+    with span("answer_cache"):
+        cached = answer_cache.lookup(qv, question, (top_k, mode, categories), gen)
+    if cached is not None:
+        return qv, gen, cached, cached["sources"], False
+    with span("search"):
+        hits, partial = await offload.run(rag_retrieve, qv, k=top_k, query=question, mode=mode, categories=categories)
+    return qv, gen, None, hits, partial
+
+@bp.route("/api/ask-rag", methods=["POST"])
+async def ask_rag():
+    parsed, err = parse_ask(await request.get_json(silent=True) or {})
+    if err:
+        return jsonify({"ok": False, "error": err}), 400
+    question, top_k, mode, categories = parsed
+
+    qv, gen, cached, hits, partial = await _retrieve(question, top_k, mode, categories)
+    if cached is not None:
+        return jsonify({"ok": True, "answer": cached["answer"], "sources": hits, "cached": True, "partial": False})
+
+    with span("context"):
+        prompt = await offload.run(build_prompt, question, hits)
+    with span("chat"):
+        answer = await achat([{"role": "user", "content": prompt}])
+    sources = public_hits(hits)
+    if not partial:  # 원격 샤드가 빠진 결과의 답은 캐시하지 않는다
+        answer_cache.store(qv, question, (top_k, mode, categories), gen, sources, answer)
+
+    return jsonify({"ok": True, "answer": answer, "sources": sources, "partial": partial})
+
+@bp.route("/api/ask-rag/stream", methods=["POST"])
+async def ask_rag_stream():
+    """SSE 이벤트 형식은 chat.ask_rag_stream과 동일"""
+    parsed, err = parse_ask(await request.get_json(silent=True) or {})
+    if err:
+        return jsonify({"ok": False, "error": err}), 400
+    question, top_k, mode, categories = parsed
+
+    qv, gen, cached, hits, partial = await _retrieve(question, top_k, mode, categories)
+    sources = public_hits(hits)
+
+    async def events():
+        yield sse("sources", {"sources": sources, "cached": cached is not None, "partial": partial})
+        if cached is not None:
+            yield sse("token", {"t": cached["answer"]})
+            yield sse("done", {"ok": True, "cached": True})
+            return
+
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        parts = []
+        with span("context"):
+            prompt = await offload.run(build_prompt, question, hits)
+        t0 = time.perf_counter()
+        tokens = achat_stream([{"role": "user", "content": prompt}])
+        try:
+            async for t in tokens:
+                if not parts:
+                    observe("rag_stage_seconds", time.perf_counter() - t0, stage="chat.first_token")
+                parts.append(t)
+                yield sse("token", {"t": t})
+                if time.monotonic() > deadline:
+                    yield sse("error", {"ok": False, "error": "stream time limit exceeded"})
+                    return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"stream aborted: {e}")
+            yield sse("error", {"ok": False, "error": "completion failed"})
+            return
+        finally:
+            await tokens.aclose()
+            observe("rag_stage_seconds", time.perf_counter() - t0, stage="chat")
+        if not partial:
+            answer_cache.store(qv, question, (top_k, mode, categories), gen, sources, "".join(parts))
+        yield sse("done", {"ok": True, "cached": False})
+
+    resp = Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    resp.timeout = None   # Quart 기본 응답 타임아웃(60s) 대신 STREAM_MAX_SECONDS로 제한
+    return resp
+
+@bp.route("/api/ask-rag/batch", methods=["POST"])
+async def ask_rag_batch():
+    """요청/응답 형식은 chat.ask_rag_batch와 동일 — chat 동시성은 Semaphore로 제한"""
+    parsed, err = parse_batch(await request.get_json(silent=True) or {})
+    if err:
+        return jsonify({"ok": False, "error": err}), 400
+    questions, top_k, mode, categories, retrieval_only = parsed
+
+    uniq, inv = dedupe_questions(questions)
+    with span("embed"):
+        Q = await aembed_many(uniq)
+    with span("search"):
+        uniq_hits, partial = await offload.run(rag_retrieve_many, Q, k=top_k, queries=uniq, mode=mode,
+                                               categories=categories)
+    Q, hits_lists = Q[inv], [uniq_hits[j] for j in inv]   # 원래 질문 순서로 펼침
+    results = [{"question": q, "sources": public_hits(hits)} for q, hits in zip(questions, hits_lists)]
+    if retrieval_only:
+        return jsonify({"ok": True, "results": results, "partial": partial})
+
+    gen = await offload.run(generation)
+    todo = {}
+    for i, q in enumerate(questions):
+        cached = answer_cache.lookup(Q[i], questions[i], (top_k, mode, categories), gen)
+        if cached is not None:
+            results[i].update(ok=True, answer=cached["answer"], sources=cached["sources"], cached=True)
+        else:
+            todo.setdefault(inv[i], []).append(i)
+    with span("context"):
+        snips = await offload.run(snippets_for, [hits_lists[idxs[0]] for idxs in todo.values()])
+    sem = asyncio.Semaphore(BATCH_CHAT_CONCURRENCY)
+
+    async def answer_one(i):
+        async with sem:
+            try:
+                answer = await achat([{"role": "user", "content": build_prompt(questions[i], hits_lists[i], snips)}])
+            except Exception as e:
+                logger.warning(f"batch item {i} failed: {e}")
+                return {"ok": False, "error": "completion failed"}
+        if not partial:
+            answer_cache.store(Q[i], questions[i], (top_k, mode, categories), gen, results[i]["sources"], answer)
+        return {"ok": True, "answer": answer}
+
+    with span("chat"):
+        answers = await asyncio.gather(*(answer_one(idxs[0]) for idxs in todo.values()))
+    for idxs, res in zip(todo.values(), answers):
+        for i in idxs:
+            results[i].update(res)
+    return jsonify({"ok": True, "results": results, "partial": partial})
+
+@bp.route("/api/ask", methods=["POST", "OPTIONS"])
+async def ask_alias():
+    if request.method == "OPTIONS":
+        return ("", 204)
+    return await ask_rag()
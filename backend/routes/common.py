@@ -0,0 +1,112 @@
+# backend/routes/common.py
+"""sync(Flask)/async(Quart) 라우트가 같이 쓰는 요청 파싱·프롬프트·SSE 포맷"""
+import json
+
+from backend.config.config import SEARCH_MODE, BATCH_MAX_QUESTIONS
+from backend.services.rag_service import snippet, SEARCH_MODES
+from backend.services.embed_cache import normalize
+
+def parse_categories(data: dict):
+    """categories: ["법령", ...] 또는 "법령,판결문" → 정렬된 tuple (없으면 None = 전체). 형식 오류면 ValueError"""
+    cats = data.get("categories")
+    if cats is None or cats == "" or cats == []:
+        return None
+    if isinstance(cats, str):
+        cats = cats.split(",")
+    if not isinstance(cats, list) or not all(isinstance(c, str) for c in cats):
+        raise ValueError("categories must be a list of strings")
+    cats = tuple(sorted({c.strip() for c in cats if c.strip()}))
+    return cats or None
+
+def parse_ask(data: dict):
+    """요청 본문 → ((question, top_k, mode, categories), None) 또는 (None, 에러 메시지)"""
+    question = (data.get("question") or "").strip()
+    top_k = int(data.get("top_k", 5))
+    mode = data.get("mode") or SEARCH_MODE
+    if not question:
+        return None, "question required"
+    if mode not in SEARCH_MODES:
+        return None, f"mode must be one of {', '.join(SEARCH_MODES)}"
+    try:
+        categories = parse_categories(data)
+    except ValueError as e:
+        return None, str(e)
+    return (question, top_k, mode, categories), None
+
+def parse_batch(data: dict):
+    """배치 요청 본문 → ((questions, top_k, mode, categories, retrieval_only), None) 또는 (None, 에러 메시지)"""
+    questions = data.get("questions")
+    if not isinstance(questions, list) or not questions:
+        return None, "questions (non-empty list) required"
+    if len(questions) > BATCH_MAX_QUESTIONS:
+        return None, f"at most {BATCH_MAX_QUESTIONS} questions per batch"
+    questions = [str(q or "").strip() for q in questions]
+    if not all(questions):
+        return None, "questions must be non-empty strings"
+    top_k = int(data.get("top_k", 5))
+    mode = data.get("mode") or SEARCH_MODE
+    if mode not in SEARCH_MODES:
+        return None, f"mode must be one of {', '.join(SEARCH_MODES)}"
+    try:
+        categories = parse_categories(data)
+    except ValueError as e:
+        return None, str(e)
+    return (questions, top_k, mode, categories, bool(data.get("retrieval_only"))), None
+
+def dedupe_questions(questions: list):
+    """
+    정규화(embed_cache.normalize)가 같은 질문을 하나로 → (고유 질문들, 질문별 고유 인덱스 리스트).
+    임베딩·검색은 고유 질문만 하고 결과는 uniq[inv]로 펼친다 (중복도 EMBED_MAX_INPUTS를 잡아먹지 않게)
+    """
+    seen, uniq, inv = {}, [], []
+    for q in questions:
+        j = seen.setdefault(normalize(q), len(uniq))
+        if j == len(uniq):
+            uniq.append(q)
+        inv.append(j)
+    return uniq, inv
+
+def public_hits(hits) -> list:
+    """
+    클라이언트 응답·답변 캐시에 넣을 히트. 원격 샤드 히트에 실려 온 본문(text)은 프롬프트용이라 뺀 사본
+    (원본 hits는 snippets_for/build_prompt가 그대로 쓴다)
+    """
+    return [{k: v for k, v in h.items() if k != "text"} if "text" in h else h for h in hits]
+
+def snippets_for(hits_lists) -> dict:
+    """여러 질의의 히트에서 청크 본문을 row id당 한 번만 읽는다 → {id: text}"""
+    snips = {}
+    for hits in hits_lists:
+        for h in hits:
+            if h["id"] not in snips:
+                snips[h["id"]] = snippet(h, 1600)
+    return snips
+
+def build_prompt(question: str, hits, snips: dict | None = None) -> str:
+    ctxs = []
+    for i, h in enumerate(hits, 1):
+        text = snips[h["id"]] if snips is not None else snippet(h, 1600)
+        ctxs.append(f"[{i}] {h['filename']} ({h['category']})\n{text}")
+
+    # 컨텍스트 블록 문자열 생성 (백슬래시 문제 방지)
+    context_block = "\n\n---\n\n".join(ctxs) if ctxs else "(컨텍스트 없음)"
+
+    return (
+        "당신은 대한민국 법률 전문 챗봇입니다.\n"
+        "아래 제공된 '컨텍스트'는 판례·법령·유권해석 등의 신뢰할 수 있는 자료입니다.\n"
+        "반드시 다음 규칙을 지켜서 답변하세요.\n\n"
+        "1. 답변은 **반드시 컨텍스트를 최우선 근거**로 작성합니다.\n"
+        "2. 핵심 근거(조문/판례 인용은 본문에서 (예: 담배사업법 제11조의5, 대법원 2018도12345)처럼 직접 표기 "
+        "번호는 컨텍스트 블록 순서에 대응합니다.\n"
+        "3. 컨텍스트가 부족하면 일반적인 법률 지식을 참고하여 보충 설명.\n"
+        "4. 금액, 형량, 조문 번호 등은 컨텍스트에 있으면 반드시 그대로 기재합니다.\n"
+        "5. 추측이나 오해를 줄 수 있는 모호한 표현은 사용하지 않습니다.\n"
+        "6. 최종 답변은 간결하지만 법률 문서 수준의 정확성을 유지합니다.\n\n"
+        "-----\n"
+        + context_block + "\n"
+        "-----\n"
+        f"질문: {question}"
+    )
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
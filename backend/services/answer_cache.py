@@ -0,0 +1,106 @@
+# backend/services/answer_cache.py
+"""
+시맨틱 답변 캐시
+  - 질문 벡터(정규화) → 작은 FAISS 내적 인덱스로 최근접 검색
+  - 코사인 유사도가 ANSWER_CACHE_SIM 이상이고 variant(top_k, 검색 모드 등)가 같으면 저장된 답변 재사용.
+    단 조문/사건번호 토큰(bm25.key_terms)이 정확히 같아야 한다 — "제11조의5"와 "제11조의6"은 벡터로는 거의 같다
+  - 인덱스 세대(rag_service.generation) 또는 CHAT_MODEL이 바뀌면 전체 무효화
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import faiss
+
+from backend.config.config import CHAT_MODEL, ANSWER_CACHE_SIZE, ANSWER_CACHE_SIM, ANSWER_CACHE_TTL
+from backend.store.bm25 import key_terms
+from backend.utils.logger import get_logger
+from backend.utils import metrics
+
+logger = get_logger("answer_cache")
+
+_lock = threading.Lock()
+_index = None            # faiss.IndexIDMap2(IndexFlatIP)
+_entries = OrderedDict() # id -> dict(answer, sources, source_ids, variant, terms, ts)
+_scope = None            # (generation, chat_model)
+_next_id = 0
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+def _unit(vec: np.ndarray) -> np.ndarray:
+    v = np.array(vec, dtype="float32").reshape(1, -1)
+    faiss.normalize_L2(v)
+    return v
+
+def _reset(dim: int):
+    global _index, _entries
+    _index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+    _entries = OrderedDict()
+
+def _check_scope(generation: str, dim: int):
+    """세대/모델/차원이 바뀌었으면 캐시를 비운다 (lock 보유 상태에서 호출)"""
+    global _scope
+    scope = (generation, CHAT_MODEL)
+    if _index is None or _scope != scope or _index.d != dim:
+        if _entries:
+            _stats["invalidations"] += 1
+            logger.info(f"answer cache invalidated ({len(_entries)} entries)")
+        _reset(dim)
+        _scope = scope
+
+def lookup(qv: np.ndarray, question: str, variant, generation: str):
+    if ANSWER_CACHE_SIZE <= 0:
+        return None
+    q = _unit(qv)
+    terms = key_terms(question)
+    now = time.time()
+    with _lock:
+        _check_scope(generation, q.shape[1])
+        if _index.ntotal == 0:
+            _stats["misses"] += 1
+            return None
+        D, I = _index.search(q, min(4, _index.ntotal))
+        for sim, eid in zip(D[0], I[0]):
+            if eid < 0 or sim < ANSWER_CACHE_SIM:
+                break
+            ent = _entries.get(int(eid))
+            if ent is None or ent["variant"] != variant or ent["terms"] != terms:
+                continue
+            if ANSWER_CACHE_TTL > 0 and now - ent["ts"] > ANSWER_CACHE_TTL:
+                continue
+            _stats["hits"] += 1
+            return dict(ent, similarity=float(sim))
+        _stats["misses"] += 1
+        return None
+
+def store(qv: np.ndarray, question: str, variant, generation: str, sources: list, answer: str):
+    global _next_id
+    if ANSWER_CACHE_SIZE <= 0:
+        return
+    q = _unit(qv)
+    with _lock:
+        _check_scope(generation, q.shape[1])
+        while len(_entries) >= ANSWER_CACHE_SIZE:
+            old, _ = _entries.popitem(last=False)
+            _index.remove_ids(np.array([old], dtype="int64"))
+        eid = _next_id
+        _next_id += 1
+        _index.add_with_ids(q, np.array([eid], dtype="int64"))
+        _entries[eid] = {
+            "answer": answer,
+            "sources": sources,
+            "source_ids": [s.get("id") for s in sources],
+            "variant": variant,
+            "terms": key_terms(question),
+            "ts": time.time(),
+        }
+
+def stats() -> dict:
+    total = _stats["hits"] + _stats["misses"]
+    return dict(_stats, size=len(_entries), hit_rate=_stats["hits"] / total if total else 0.0)
+
+def _collect():
+    return [("cache_events_total", {"cache": "answer", "result": r}, _stats[k])
+            for r, k in (("hit", "hits"), ("miss", "misses"), ("invalidation", "invalidations"))]
+
+metrics.register_collector(_collect)
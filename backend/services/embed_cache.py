@@ -0,0 +1,178 @@
+# backend/services/embed_cache.py
+"""
+질의 임베딩 캐시
+  1) 프로세스 내 LRU (+TTL)
+  2) (선택) EMBED_CACHE_DIR 아래 sqlite 파일 — 같은 머신의 gunicorn 워커들이 공유.
+     스레드별 연결로 LRU 잠금 밖에서 읽고 쓰며, PRUNE_EVERY번 쓸 때마다 TTL 지난 행과
+     EMBED_CACHE_DISK_ROWS를 넘는 오래된 행을 지운다.
+키: sha1(EMBED_MODEL + 정규화된 질문 텍스트)
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from backend.config.config import EMBED_CACHE_SIZE, EMBED_CACHE_TTL, EMBED_CACHE_DIR, EMBED_CACHE_DISK_ROWS
+from backend.utils.logger import get_logger
+from backend.utils import metrics
+
+logger = get_logger("embed_cache")
+
+_WS = re.compile(r"\s+")
+PRUNE_EVERY = 256  # 프로세스당 디스크 쓰기 이 횟수마다 정리
+
+def normalize(text: str) -> str:
+    """NFKC + 공백 정리 + 소문자 (한글에는 영향 없음)"""
+    t = unicodedata.normalize("NFKC", text or "")
+    return _WS.sub(" ", t).strip().lower()
+
+def make_key(text: str, model: str) -> str:
+    return hashlib.sha1(f"{model}\x00{normalize(text)}".encode("utf-8")).hexdigest()
+
+class EmbedCache:
+    def __init__(self, maxsize: int = EMBED_CACHE_SIZE, ttl: float = EMBED_CACHE_TTL, disk_dir: str = EMBED_CACHE_DIR,
+                 disk_rows: int = EMBED_CACHE_DISK_ROWS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_path = Path(disk_dir) / "embed_cache.sqlite" if disk_dir else None
+        self.disk_rows = disk_rows
+        self._lru = OrderedDict()  # key -> (ts, vec)
+        self._lock = threading.Lock()   # LRU·카운터만 (sqlite I/O는 이 잠금 밖)
+        self._local = threading.local()  # 스레드별 sqlite 연결
+        self._writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ── 디스크 계층 (sqlite, WAL) ────────────────────────────
+    def _conn(self):
+        if self.disk_path is None:
+            return None
+        # 스레드마다 연결 하나, fork 이후에는 새로 연다
+        loc = self._local
+        if getattr(loc, "db", None) is None or loc.pid != os.getpid():
+            self.disk_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.disk_path), timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS emb (key TEXT PRIMARY KEY, ts REAL, vec BLOB)")
+            db.execute("CREATE INDEX IF NOT EXISTS emb_ts ON emb (ts)")
+            loc.db, loc.pid = db, os.getpid()
+        return loc.db
+
+    def _disk_get(self, key: str, now: float):
+        try:
+            db = self._conn()
+            if db is None:
+                return None
+            row = db.execute("SELECT ts, vec FROM emb WHERE key=?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"embed cache disk read failed: {e}")
+            return None
+        if row is None or (self.ttl > 0 and now - row[0] > self.ttl):
+            return None
+        return row[0], np.frombuffer(row[1], dtype="float32")
+
+    def _disk_put(self, key: str, ts: float, vec: np.ndarray):
+        try:
+            db = self._conn()
+            if db is not None:
+                db.execute("INSERT OR REPLACE INTO emb (key, ts, vec) VALUES (?, ?, ?)", (key, ts, vec.tobytes()))
+        except sqlite3.Error as e:
+            logger.warning(f"embed cache disk write failed: {e}")
+
+    def prune(self, now: float | None = None) -> int:
+        """TTL 지난 행 + disk_rows를 넘는 오래된 행 삭제. 반환: 지운 행 수"""
+        now = time.time() if now is None else now
+        try:
+            db = self._conn()
+            if db is None:
+                return 0
+            n = 0
+            if self.ttl > 0:
+                n += db.execute("DELETE FROM emb WHERE ts < ?", (now - self.ttl,)).rowcount
+            if self.disk_rows > 0:
+                n += db.execute("DELETE FROM emb WHERE ts < (SELECT ts FROM emb ORDER BY ts DESC LIMIT 1 OFFSET ?)",
+                                (self.disk_rows - 1,)).rowcount
+            return n
+        except sqlite3.Error as e:
+            logger.warning(f"embed cache prune failed: {e}")
+            return 0
+
+    # ── 공개 API ─────────────────────────────────────────────
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            ent = self._lru.get(key)
+            if ent is not None:
+                if self.ttl <= 0 or now - ent[0] <= self.ttl:
+                    self._lru.move_to_end(key)
+                    self.hits += 1
+                    return ent[1]
+                del self._lru[key]
+        ent = self._disk_get(key, now)
+        with self._lock:
+            if ent is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, ent)
+        return ent[1]
+
+    def put(self, key: str, vec: np.ndarray):
+        vec = np.ascontiguousarray(vec, dtype="float32")
+        vec.setflags(write=False)
+        ts = time.time()
+        with self._lock:
+            self._insert(key, (ts, vec))
+            self._writes += 1
+            due = self.disk_path is not None and self._writes % PRUNE_EVERY == 0
+        self._disk_put(key, ts, vec)
+        if due:
+            self.prune(ts)
+
+    def _insert(self, key, ent):
+        self._lru[key] = ent
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._lru),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / total if total else 0.0,
+        }
+
+_cache = EmbedCache()
+
+def get(key: str):
+    return _cache.get(key) if _cache.maxsize > 0 else None
+
+def put(key: str, vec: np.ndarray):
+    if _cache.maxsize > 0:
+        _cache.put(key, vec)
+
+def stats() -> dict:
+    return _cache.stats()
+
+def _collect():
+    st = _cache.stats()
+    return [("cache_events_total", {"cache": "embed", "result": r}, st[k])
+            for r, k in (("hit", "hits"), ("disk_hit", "disk_hits"), ("miss", "misses"))]
+
+metrics.register_collector(_collect)
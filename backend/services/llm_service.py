@@ -1,15 +1,73 @@
 import os
+import numpy as np
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 
-from backend.config.config import EMBED_MODEL, CHAT_MODEL
+from backend.config.config import EMBED_MODEL, CHAT_MODEL, STREAM_MAX_SECONDS
+from backend.services import embed_cache
+from backend.utils import metrics
 
 load_dotenv()
 _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def embed(text: str) -> list:
-    res = _client.embeddings.create(model=EMBED_MODEL, input=text)
-    return res.data[0].embedding
+# async 서빙 모드용 클라이언트: 프로세스(PID)당 하나를 공유 → HTTP 커넥션 풀 재사용
+_aclient = None
+_aclient_pid = None
+
+def _async_client() -> AsyncOpenAI:
+    global _aclient, _aclient_pid
+    if _aclient is None or _aclient_pid != os.getpid():
+        _aclient = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        _aclient_pid = os.getpid()
+    return _aclient
+
+def _usage(call: str, usage):
+    """업스트림 토큰 수 → llm_tokens_total{call, kind}"""
+    if usage is None:
+        return
+    metrics.inc("llm_tokens_total", usage.prompt_tokens or 0, call=call, kind="prompt")
+    completion = getattr(usage, "completion_tokens", None)
+    if completion:
+        metrics.inc("llm_tokens_total", completion, call=call, kind="completion")
+
+def embed(text: str) -> np.ndarray:
+    """질의 임베딩 (embed_cache 경유). 반환 벡터는 읽기 전용 float32."""
+    key = embed_cache.make_key(text, EMBED_MODEL)
+    vec = embed_cache.get(key)
+    if vec is not None:
+        return vec
+    with metrics.span("embed.api"):
+        res = _client.embeddings.create(model=EMBED_MODEL, input=text)
+    _usage("embed", res.usage)
+    vec = np.asarray(res.data[0].embedding, dtype="float32")
+    embed_cache.put(key, vec)
+    return vec
+
+EMBED_MAX_INPUTS = 2048   # embeddings API 요청당 입력 수 상한
+
+def _cached_many(texts):
+    """캐시 조회 → (키 목록, 결과 리스트(미스는 None), 미스 위치)"""
+    keys = [embed_cache.make_key(t, EMBED_MODEL) for t in texts]
+    vecs = [embed_cache.get(k) for k in keys]
+    return keys, vecs, [i for i, v in enumerate(vecs) if v is None]
+
+def _fill(keys, vecs, miss, data):
+    for i, d in zip(miss, data):
+        vecs[i] = np.asarray(d.embedding, dtype="float32")
+        embed_cache.put(keys[i], vecs[i])
+    return np.stack(vecs) if vecs else np.zeros((0, 0), dtype="float32")
+
+def embed_many(texts) -> np.ndarray:
+    """질의 여러 개 임베딩 → (n, d). 캐시 미스만 모아 embeddings 요청 한 번(2048개 단위)으로 보낸다."""
+    keys, vecs, miss = _cached_many(texts)
+    data = []
+    for s in range(0, len(miss), EMBED_MAX_INPUTS):
+        part = [texts[i] for i in miss[s:s + EMBED_MAX_INPUTS]]
+        with metrics.span("embed.api"):
+            res = _client.embeddings.create(model=EMBED_MODEL, input=part)
+        _usage("embed", res.usage)
+        data.extend(res.data)
+    return _fill(keys, vecs, miss, data)
 
 def chat(messages, temperature: float = 0.2) -> str:
     res = _client.chat.completions.create(
@@ -17,4 +75,91 @@ def chat(messages, temperature: float = 0.2) -> str:
         messages=messages,
         temperature=temperature
     )
+    _usage("chat", res.usage)
     return res.choices[0].message.content
+
+def chat_stream(messages, temperature: float = 0.2):
+    """
+    스트리밍 완성: 도착하는 토큰 조각(str)을 순서대로 yield.
+    호출 측이 중간에 닫으면(close) 업스트림 HTTP 스트림도 닫는다.
+    """
+    stream = _client.with_options(timeout=STREAM_MAX_SECONDS).chat.completions.create(
+        model=CHAT_MODEL,
+        messages=messages,
+        temperature=temperature,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    try:
+        for chunk in stream:
+            if chunk.usage is not None:
+                _usage("chat", chunk.usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    finally:
+        stream.close()
+
+def ping():
+    """업스트림 HTTP 커넥션을 미리 열어 둔다 (워밍업용, 토큰 비용 없는 GET /models)"""
+    _client.models.list()
+
+async def aping():
+    await _async_client().models.list()
+
+async def aembed(text: str) -> np.ndarray:
+    """embed()의 async 버전 (같은 embed_cache 사용)"""
+    key = embed_cache.make_key(text, EMBED_MODEL)
+    vec = embed_cache.get(key)
+    if vec is not None:
+        return vec
+    with metrics.span("embed.api"):
+        res = await _async_client().embeddings.create(model=EMBED_MODEL, input=text)
+    _usage("embed", res.usage)
+    vec = np.asarray(res.data[0].embedding, dtype="float32")
+    embed_cache.put(key, vec)
+    return vec
+
+async def aembed_many(texts) -> np.ndarray:
+    """embed_many()의 async 버전"""
+    keys, vecs, miss = _cached_many(texts)
+    data = []
+    for s in range(0, len(miss), EMBED_MAX_INPUTS):
+        part = [texts[i] for i in miss[s:s + EMBED_MAX_INPUTS]]
+        with metrics.span("embed.api"):
+            res = await _async_client().embeddings.create(model=EMBED_MODEL, input=part)
+        _usage("embed", res.usage)
+        data.extend(res.data)
+    return _fill(keys, vecs, miss, data)
+
+async def achat(messages, temperature: float = 0.2) -> str:
+    res = await _async_client().chat.completions.create(
+        model=CHAT_MODEL,
+        messages=messages,
+        temperature=temperature
+    )
+    _usage("chat", res.usage)
+    return res.choices[0].message.content
+
+async def achat_stream(messages, temperature: float = 0.2):
+    """chat_stream()의 async 버전"""
+    stream = await _async_client().with_options(timeout=STREAM_MAX_SECONDS).chat.completions.create(
+        model=CHAT_MODEL,
+        messages=messages,
+        temperature=temperature,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    try:
+        async for chunk in stream:
+            if chunk.usage is not None:
+                _usage("chat", chunk.usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    finally:
+        await stream.close()
@@ -0,0 +1,28 @@
+# backend/services/offload.py
+"""
+async 서빙 모드에서 블로킹 작업(FAISS 검색, chunks.bin/파일 읽기)을 이벤트 루프 밖으로 넘기는 스레드 풀.
+FAISS search는 GIL을 놓으므로 스레드로 충분하다.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.config.config import OFFLOAD_THREADS
+
+_pool = None
+_pool_pid = None
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = ThreadPoolExecutor(max_workers=OFFLOAD_THREADS, thread_name_prefix="offload")
+        _pool_pid = os.getpid()
+    return _pool
+
+async def run(fn, *args, **kwargs):
+    """fn(*args, **kwargs)를 스레드 풀에서 실행하고 결과를 await (contextvars 유지 → 요청별 타이밍 수집)"""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_executor(), ctx.run, functools.partial(fn, *args, **kwargs))
@@ -1,20 +1,241 @@
 # backend/services/rag_service.py
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import base64
+import contextvars
 import json
+import os
+import threading
+import time
+import urllib.request
 import numpy as np
-import faiss
 
-from backend.config.config import VSTORE_DIR, ROOT_DIR, CHUNKS_DIR
+from backend.config.config import (
+    VSTORE_ROOT, ROOT_DIR, CHUNKS_DIR, SEARCH_MODE, HYBRID_ALPHA, HYBRID_CANDIDATES, VSTORE_POLL_SECONDS,
+    INDEX_MMAP, FILTER_EXACT_ROWS, FILTER_CACHE_SIZE, SHARD_THREADS, REMOTE_SHARDS, REMOTE_SHARD_TIMEOUT,
+    SHARD_API_TOKEN,
+)
+from backend.store.generations import read_current, current_dir
+from backend.store.shards import shard_dirs
+from backend.store.bm25 import BM25Index
+from backend.store.chunk_store import ChunkStore
+from backend.store.meta_store import open_metas, metas_exist
+from backend.store.vector_index import (
+    read_params, apply_search_params, load_vectors, load_tombstones, read_index, prefetch, read_through,
+    id_selector, search_params, rerank_factor, rerank, VECTORS_FILE,
+)
 from backend.utils.logger import get_logger
+from backend.utils import metrics
 
 logger = get_logger("rag_service")
 
-INDEX_PATH = VSTORE_DIR / "faiss_index.idx"
-META_PATH  = VSTORE_DIR / "metadatas.json"
+INDEX_FILE  = "faiss_index.idx"
+META_FILE   = "metadatas.json"
+META_BIN_FILE = "metadatas.bin"
+CHUNKS_FILE = "chunks.bin"
+BM25_FILE   = "bm25.bin"
 
-_index = None
-_metas = None
-_last_mtime = (0, 0)
+SEARCH_MODES = ("vector", "bm25", "hybrid")
+
+class Shard:
+    """
+    샤드 하나의 검색 자료 묶음 (로드 후 불변). 샤드 없는 세대는 세대 디렉터리 자체가 샤드 하나.
+      index   : FAISS 인덱스
+      metas   : MetaStore(metadatas.bin) 또는 레거시 list[dict]
+      chunks  : ChunkStore (row id 정렬) 또는 None
+      bm25    : BM25Index 또는 None (없으면 hybrid → vector로 동작)
+      vectors : vectors.npy mmap (BM25에만 걸린 후보의 정확한 거리 계산용) 또는 None
+      base    : 세대 안에서 이 샤드 row 0의 전역 id — 히트 id = base + row
+      live    : 인덱스에 남은 dead 행(삭제 미지원 HNSW + vectors.npy 없어 compaction 못 함)을 가리는
+                RowFilter, 그런 행이 없으면 None
+    categories 필터는 category 컬럼으로 만든 행 마스크/IDSelectorBitmap을 카테고리 조합별로 캐시한다.
+    """
+    def __init__(self, path: Path, gen: str, base: int = 0):
+        self.path = path
+        self.gen = gen
+        self.base = base
+        index_path = path / INDEX_FILE
+        if not index_path.exists() or not metas_exist(path):
+            raise FileNotFoundError(
+                f"FAISS 인덱스가 없습니다. 파이프라인을 먼저 실행하세요: pipelines/ingest_local.sh\n경로: {index_path}"
+            )
+        # 인덱스·메타·청크·BM25·벡터 모두 mmap → 워커들이 같은 page cache 페이지를 공유
+        self.index = read_index(index_path, mmap=INDEX_MMAP)
+        self.params = read_params(path)
+        apply_search_params(self.index, self.params)
+        self.metas = open_metas(path)
+        n = len(self.metas)
+        self.chunks = _load_chunks(path / CHUNKS_FILE, n)
+        self.bm25 = _load_bm25(path / BM25_FILE, n)
+        self.vectors = load_vectors(path, mmap=True)
+        if self.vectors is not None and len(self.vectors) != n:
+            self.vectors = None
+        dead = load_tombstones(path, n)
+        self.live = RowFilter(~dead) if dead.any() and self.index.ntotal > n - int(dead.sum()) else None
+        self._cat = None
+        self._filters = OrderedDict()  # 카테고리 조합(vocab에 있는 것만) → RowFilter, FILTER_CACHE_SIZE개 LRU
+        self._filters_lock = threading.Lock()
+
+    def _categories(self):
+        """(행별 카테고리 코드 int32, vocab)"""
+        if self._cat is None:
+            try:
+                self._cat = (np.asarray(self.metas.column("category")), self.metas.vocab("category"))
+            except (AttributeError, KeyError):
+                # 레거시 list[dict] 이거나 category가 interned 컬럼이 아닌 경우
+                names = [str(m.get("category") or "") for m in self.metas]
+                vocab = sorted(set(names))
+                code = {c: i for i, c in enumerate(vocab)}
+                self._cat = (np.fromiter((code[c] for c in names), dtype="int32", count=len(names)), vocab)
+        return self._cat
+
+    def filter(self, categories) -> "RowFilter":
+        """
+        카테고리 조합의 RowFilter. 없는 카테고리는 무시 — 캐시 키도 vocab과의 교집합이라
+        사용자가 임의 문자열을 보내도 키 수는 실제 조합 수를 넘지 않고, 그마저 LRU로 제한.
+        """
+        codes, vocab = self._categories()
+        want = set(categories)
+        key = tuple(i for i, c in enumerate(vocab) if c in want)
+        with self._filters_lock:
+            f = self._filters.get(key)
+            if f is not None:
+                self._filters.move_to_end(key)
+                return f
+        mask = np.isin(codes, key) & ~load_tombstones(self.path, len(codes))
+        f = RowFilter(mask)
+        with self._filters_lock:
+            self._filters[key] = f
+            while len(self._filters) > max(FILTER_CACHE_SIZE, 1):
+                self._filters.popitem(last=False)
+        return f
+
+    def search(self, Q: np.ndarray, k: int, queries, mode: str, categories=None) -> list:
+        """질의별 히트 리스트 (search_many의 샤드 단위 본체)"""
+        filt = self.filter(categories) if categories else None
+        if filt is not None and len(filt.rows) == 0:
+            return [[] for _ in range(len(Q))]
+        fallback = mode == "hybrid" and (self.bm25 is None or queries is None or not all(queries))
+        if mode != "vector" and (self.bm25 is None or queries is None or not all(queries)):
+            mode = "vector"
+        if mode == "bm25":
+            results = []
+            for query in queries:
+                with metrics.span("search.bm25"):
+                    ids, sc = self.bm25.search(query, k, filt.mask if filt is not None else None)
+                results.append(_hits(self, [(int(i), {"score": float(s), "bm25": float(s)}) for i, s in zip(ids, sc)]))
+            return results
+        with metrics.span("search.vector"):
+            D, I = _vector_search(self, Q, k if mode == "vector" else max(HYBRID_CANDIDATES, k), filt)
+        if mode == "vector":
+            # hybrid 요청인데 BM25가 없어 vector로 떨어진 샤드도 dist·bm25(0)를 실어 _merge가 다른 샤드와 융합할 수 있게
+            extra = (lambda d: {"score": float(d), "dist": float(d), "bm25": 0.0}) if fallback else (lambda d: {"score": float(d)})
+            return [_hits(self, [(int(i), extra(d)) for d, i in zip(D[r], I[r])]) for r in range(len(Q))]
+        results = []
+        for r, query in enumerate(queries):
+            ids, fused, dist, bm = _fuse(self, Q[r:r + 1], I[r], D[r], query, k, filt)
+            results.append(_hits(self, [(int(i), {"score": float(f), "dist": float(d), "bm25": float(b)})
+                                        for i, f, d, b in zip(ids, fused, dist, bm)]))
+        return results
+
+class Generation:
+    """
+    한 세대 = 샤드 목록 (shards/<NN>/ 레이아웃이면 여러 개, 아니면 세대 디렉터리 하나).
+    검색은 시작할 때 참조를 잡고 끝까지 같은 세대를 쓴다.
+    """
+    def __init__(self, name: str, path: Path):
+        self.name = name
+        self.path = path
+        self.shards = []
+        base = 0
+        for sp in shard_dirs(path) or [path]:
+            s = Shard(sp, name, base)
+            self.shards.append(s)
+            base += len(s.metas)
+        self._bases = np.array([s.base for s in self.shards], dtype="int64")
+
+    @property
+    def rows(self) -> int:
+        return sum(len(s.metas) for s in self.shards)
+
+    @property
+    def ntotal(self) -> int:
+        return sum(int(s.index.ntotal) for s in self.shards)
+
+    @property
+    def d(self) -> int:
+        return self.shards[0].index.d
+
+    def categories(self) -> list:
+        return sorted({c for s in self.shards for c in s._categories()[1]})
+
+    def locate(self, i: int):
+        """전역 id → (Shard, 샤드 내 row)"""
+        s = self.shards[int(np.searchsorted(self._bases, i, side="right")) - 1]
+        return s, i - s.base
+
+    def _files(self):
+        """
+        미리 올릴 파일: 인덱스·메타·청크 등 매 검색이 읽는 것만.
+        vectors.npy(float32 원본)는 재정렬·정확 계산이 읽는 행만 올라오게 두고, bm25.bin은 기본 모드가 vector면 제외
+        """
+        skip = {VECTORS_FILE} | ({BM25_FILE} if SEARCH_MODE == "vector" else set())
+        return [f for f in self.path.rglob("*") if f.is_file() and f.name not in skip]
+
+    def warm(self):
+        """세대 파일(_files)을 page cache로 미리 올림 (gunicorn master에서 fork 전에 호출)"""
+        for f in self._files():
+            prefetch(f)
+
+    def page_in(self) -> int:
+        """세대 파일(_files)을 끝까지 읽어 mmap 페이지를 page cache에 올림 (워커 워밍업). 반환: 바이트 수"""
+        return sum(read_through(f) for f in self._files())
+
+class RemoteShard:
+    """
+    다른 노드의 /shard/search (SHARD_API=1). 요청: 질의 벡터(base64 float32) + 텍스트·모드·필터,
+    응답: 질의별 히트 (본문 앞부분 text 포함 → snippet이 원격 청크를 다시 읽지 않는다).
+    요청에 X-Shard-Token(SHARD_API_TOKEN)을 싣는다.
+    실패/타임아웃이면 None → search_many는 그 샤드 없이 진행하고 partial로 알린다 (rag_shard_errors_total).
+    """
+    def __init__(self, url: str, label: str):
+        self.url = url
+        self.label = label
+
+    def search(self, Q: np.ndarray, k: int, queries, mode: str, categories=None) -> list | None:
+        Q = np.ascontiguousarray(Q, dtype="float32")
+        body = {"vectors": base64.b64encode(Q.tobytes()).decode("ascii"), "shape": list(Q.shape), "k": k,
+                "queries": queries, "mode": mode, "categories": list(categories) if categories else None}
+        req = urllib.request.Request(self.url + "/shard/search", data=json.dumps(body).encode("utf-8"),
+                                     headers={"Content-Type": "application/json", "X-Shard-Token": SHARD_API_TOKEN})
+        try:
+            with metrics.span("search.remote"), urllib.request.urlopen(req, timeout=REMOTE_SHARD_TIMEOUT) as r:
+                data = json.loads(r.read())
+        except Exception as e:
+            metrics.inc("rag_shard_errors_total", shard=self.label)
+            logger.warning(f"remote shard {self.url} failed: {e}")
+            return None
+        for hits in data["results"]:
+            for h in hits:
+                h["id"] = f"{self.label}:{h['id']}"
+                h["shard"] = self.label
+        return data["results"]
+
+class RowFilter:
+    """메타 필터 하나: 행 마스크(BM25), 선택 행 목록(정확 계산), IDSelectorBitmap(FAISS)"""
+    def __init__(self, mask: np.ndarray):
+        self.mask = mask
+        self.rows = np.flatnonzero(mask)
+        self.sel, self._bitmap = id_selector(mask)
+
+_gen = None            # 현재 Generation — 교체는 참조 대입 한 번(원자적)
+_recent = OrderedDict()  # 이름 → Generation: 직전 세대를 잠시 유지 (검색 후 snippet이 같은 세대를 읽도록)
+_load_lock = threading.Lock()
+_loader_pid = None
+_remote = None          # RemoteShard 목록 (REMOTE_SHARDS)
+_pool = None            # 샤드 fan-out 스레드 풀 (PID별)
+_pool_pid = None
 
 def resolve_path_for_meta(meta: dict) -> Path:
     """
@@ -74,38 +295,311 @@ def resolve_path_for_meta(meta: dict) -> Path:
     # 마지막: 그래도 못 찾으면 ROOT_DIR 기준으로 반환(존재 X일 수 있음)
     return (ROOT_DIR / p) if str(p) else ROOT_DIR
 
-def _mtime_pair():
-    idx_m = INDEX_PATH.stat().st_mtime if INDEX_PATH.exists() else 0
-    meta_m = META_PATH.stat().st_mtime if META_PATH.exists() else 0
-    return (idx_m, meta_m)
-
-def _ensure_index():
-    if not INDEX_PATH.exists() or not META_PATH.exists():
-        raise FileNotFoundError(
-            f"FAISS 인덱스가 없습니다. 파이프라인을 먼저 실행하세요: pipelines/ingest_local.sh\n경로: {INDEX_PATH}"
-        )
-
-def _reload_if_changed():
-    global _index, _metas, _last_mtime
-    cur = _mtime_pair()
-    if _index is None or cur != _last_mtime:
-        _ensure_index()
-        logger.info("Loading vector index and metadatas...")
-        _index = faiss.read_index(str(INDEX_PATH))
-        _metas = json.loads(META_PATH.read_text(encoding='utf-8'))
-        _last_mtime = cur
+def _probe():
+    """지금 CURRENT가 가리키는 (세대 이름, 디렉터리). 레거시 current/는 파일 mtime들이 이름 역할."""
+    name = read_current(VSTORE_ROOT)
+    path = current_dir(VSTORE_ROOT)
+    if name is None:
+        mt = [(path / f).stat().st_mtime if (path / f).exists() else 0
+              for f in (INDEX_FILE, META_FILE, META_BIN_FILE, CHUNKS_FILE, BM25_FILE)]
+        name = "legacy:" + ":".join(f"{m:.6f}" for m in mt)
+    return name, path
+
+def _load_chunks(path: Path, n: int):
+    if not path.exists():
+        return None
+    try:
+        store = ChunkStore(path)
+    except Exception as e:
+        logger.warning(f"chunks.bin load failed, falling back to chunk files: {e}")
+        return None
+    if len(store) != n:
+        logger.warning(f"chunks.bin rows ({len(store)}) != index rows ({n}); falling back to chunk files")
+        return None
+    return store
+
+def _load_bm25(path: Path, n: int):
+    if not path.exists():
+        return None
+    try:
+        bm = BM25Index(path)
+    except Exception as e:
+        logger.warning(f"bm25.bin load failed, hybrid search disabled: {e}")
+        return None
+    if len(bm) != n:
+        logger.warning(f"bm25.bin rows ({len(bm)}) != index rows ({n}); hybrid search disabled")
+        return None
+    return bm
+
+def _swap(g: Generation):
+    global _gen
+    _recent[g.name] = g
+    while len(_recent) > 2:
+        _recent.popitem(last=False)
+    _gen = g
+
+def _refresh() -> bool:
+    """CURRENT가 바뀌었으면 새 세대를 (요청 경로 밖에서) 로드해 교체. 교체했으면 True."""
+    name, path = _probe()
+    if _gen is not None and name == _gen.name:
+        return False
+    with _load_lock:
+        if _gen is not None and name == _gen.name:
+            return False
+        logger.info(f"Loading index generation {name} ...")
+        t0 = time.perf_counter()
+        try:
+            g = Generation(name, path)
+        except Exception:
+            metrics.inc("rag_index_loads_total", result="error")
+            raise
+        dt = time.perf_counter() - t0
+        metrics.observe("rag_index_load_seconds", dt)
+        metrics.inc("rag_index_loads_total", result="ok")
+        _swap(g)
+        logger.info(f"Index generation {name} active ({g.ntotal} vectors, {len(g.shards)} shard(s), {dt:.2f}s)")
+        return True
+
+def _loader_loop():
+    failed = None
+    while True:
+        time.sleep(VSTORE_POLL_SECONDS)
+        try:
+            _refresh()
+            failed = None
+        except Exception as e:
+            # 새 세대 로드 실패 → 기존 세대로 계속 서비스, 같은 오류는 한 번만 기록
+            if str(e) != failed:
+                logger.error(f"index generation reload failed, keeping {_gen.name if _gen else None}: {e}")
+                failed = str(e)
+
+def start_loader():
+    """백그라운드 로더를 프로세스(PID)당 하나 시작 (gunicorn post_fork에서 호출, 아니면 첫 요청 때)"""
+    global _loader_pid
+    if _loader_pid == os.getpid():
+        return
+    with _load_lock:
+        if _loader_pid == os.getpid():
+            return
+        threading.Thread(target=_loader_loop, name="index-loader", daemon=True).start()
+        _loader_pid = os.getpid()
+
+def current() -> Generation:
+    """현재 세대. 최초 1회만 동기 로드하고, 이후 교체는 백그라운드 로더가 한다."""
+    if _gen is None:
+        _refresh()
+    start_loader()
+    return _gen
+
+def preload():
+    """
+    gunicorn master(preload_app)에서 fork 전에 현재 세대를 열고 page cache를 데운다.
+    로더 스레드는 시작하지 않는다 — fork 시 스레드/락 상태가 자식에 복제되지 않도록.
+    """
+    if _gen is None:
+        _refresh()
+    _gen.warm()
+    return _gen
+
+def generation() -> str:
+    """현재 로드된 인덱스 세대 식별자 (캐시 무효화 키)"""
+    return current().name
 
 def load_index():
-    _reload_if_changed()
-    return _index, _metas
+    """(인덱스, 메타) — 샤드 없는 세대용 (샤드 세대면 첫 샤드)"""
+    s = current().shards[0]
+    return s.index, s.metas
+
+def _minmax(a: np.ndarray) -> np.ndarray:
+    if len(a) == 0:
+        return a
+    lo, hi = a.min(), a.max()
+    return (a - lo) / (hi - lo) if hi - lo > 1e-9 else np.zeros_like(a)
 
-def search(vec: np.ndarray, k: int = 5):
-    idx, metas = load_index()
-    D, I = idx.search(vec.astype('float32').reshape(1, -1), k)
+def _fuse(g: Shard, q: np.ndarray, vid: np.ndarray, vdist: np.ndarray, query: str, k: int, filt=None):
+    """
+    벡터 후보(vid, vdist) + BM25 후보 합집합을 NumPy로 융합: ALPHA·minmax(-L2) + (1-ALPHA)·minmax(BM25)
+    BM25에만 걸린 후보의 거리는 vectors.npy에서 정확히 계산한다.
+    반환: (ids, fused, dist, bm25) — fused 내림차순 상위 k
+    """
+    keep = vid >= 0
+    vid, vdist = vid[keep], vdist[keep]
+    with metrics.span("search.bm25"):
+        bid, bsc = g.bm25.search(query, max(HYBRID_CANDIDATES, k), filt.mask if filt is not None else None)
+    ids = np.union1d(vid, bid)
+    dist = np.full(len(ids), np.nan, dtype="float32")
+    dist[np.searchsorted(ids, vid)] = vdist
+    bm = np.zeros(len(ids), dtype="float32")
+    bm[np.searchsorted(ids, bid)] = bsc
+    miss = np.isnan(dist)
+    if miss.any():
+        if g.vectors is not None:
+            diff = np.asarray(g.vectors[ids[miss]], dtype="float32") - q
+            dist[miss] = np.einsum("ij,ij->i", diff, diff)
+        else:
+            dist[miss] = np.nanmax(dist) if (~miss).any() else 0.0
+    fused = HYBRID_ALPHA * _minmax(-dist) + (1.0 - HYBRID_ALPHA) * _minmax(bm)
+    top = np.argsort(-fused, kind="stable")[:k]
+    return ids[top], fused[top], dist[top], bm[top]
+
+def _hits(g: Shard, rows):
+    metas = g.metas
     out = []
-    for d, i in zip(D[0], I[0]):
+    for i, extra in rows:
         if 0 <= i < len(metas):
-            m = metas[i].copy()
-            m['score'] = float(d)
+            m = dict(metas[i])
+            m['id'] = g.base + i
+            m['gen'] = g.gen
+            m.update(extra)
             out.append(m)
     return out
+
+def _exact(vectors, rows: np.ndarray, Q: np.ndarray, k: int):
+    """선택된 행만 vectors.npy에서 읽어 정확한 L2 상위 k (FAISS search와 같은 (D, I) 모양, 빈 칸은 -1)"""
+    V = np.asarray(vectors[rows], dtype="float32")
+    D = (Q * Q).sum(1)[:, None] - 2.0 * (Q @ V.T) + (V * V).sum(1)[None, :]
+    kk = min(k, len(rows))
+    top = np.argpartition(D, kk - 1, axis=1)[:, :kk]
+    d = np.take_along_axis(D, top, 1)
+    o = np.argsort(d, axis=1, kind="stable")
+    outD = np.full((len(Q), k), np.inf, dtype="float32")
+    outI = np.full((len(Q), k), -1, dtype="int64")
+    outD[:, :kk] = np.take_along_axis(d, o, 1)
+    outI[:, :kk] = rows[np.take_along_axis(top, o, 1)]
+    return outD, outI
+
+def _vector_search(g: Shard, Q: np.ndarray, k: int, filt=None):
+    # categories 필터는 이미 dead 행을 뺀 것. 필터가 없으면 인덱스에 남은 dead 행만 가린다
+    filt = filt if filt is not None else g.live
+    # 작은 파티션은 해당 행만 정확 계산 (IVF/HNSW에 선택적인 필터를 걸면 후보가 모자라 recall이 떨어진다)
+    if (filt is not None and g.vectors is not None and g.params.get("type", "flat") != "flat"
+            and len(filt.rows) <= FILTER_EXACT_ROWS):
+        return _exact(g.vectors, filt.rows, Q, k)
+    # 양자화 인덱스: k×rerank개를 뽑아 원본 벡터(vectors.npy mmap)로 정확히 재정렬
+    factor = rerank_factor(g.params) if g.vectors is not None else 1
+    kk = k * factor
+    if filt is None:
+        D, I = g.index.search(Q, kk)
+    else:
+        D, I = g.index.search(Q, kk, params=search_params(g.params, filt.sel))
+    if factor == 1:
+        return D, I
+    with metrics.span("search.rerank"):
+        return rerank(g.vectors, Q, I, k)
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = ThreadPoolExecutor(max_workers=SHARD_THREADS, thread_name_prefix="shard")
+        _pool_pid = os.getpid()
+    return _pool
+
+def remote_shards() -> list:
+    global _remote
+    if _remote is None:
+        _remote = [RemoteShard(u, f"r{i}") for i, u in enumerate(REMOTE_SHARDS)]
+    return _remote
+
+def _merge(per_shard: list, k: int, mode: str) -> list:
+    """
+    샤드별 상위 k 히트 → 전체 상위 k.
+      vector: L2 거리 오름차순 / bm25: 점수 내림차순 (IDF는 샤드별 통계라 근사)
+      hybrid: 모인 후보의 dist·bm25로 융합 점수를 다시 계산 (샤드별 min-max는 서로 비교 불가).
+              bm25가 없는 히트(vector로 떨어진 샤드)는 bm25=0, dist가 없는 히트(예전 원격 노드)가 섞이면
+              score를 L2 거리로 보고 거리 오름차순
+    """
+    hits = [h for shard_hits in per_shard for h in shard_hits]
+    if mode == "bm25":
+        return sorted(hits, key=lambda h: -h["score"])[:k]
+    if mode == "vector" or not hits or any("dist" not in h for h in hits):
+        return sorted(hits, key=lambda h: h.get("dist", h["score"]))[:k]
+    dist = np.array([h["dist"] for h in hits], dtype="float32")
+    bm = np.array([h.get("bm25", 0.0) for h in hits], dtype="float32")
+    fused = HYBRID_ALPHA * _minmax(-dist) + (1.0 - HYBRID_ALPHA) * _minmax(bm)
+    out = []
+    for t in np.argsort(-fused, kind="stable")[:k]:
+        hits[t]["score"] = float(fused[t])
+        out.append(hits[t])
+    return out
+
+def retrieve_many(vecs: np.ndarray, k: int = 5, queries=None, mode: str | None = None, categories=None,
+                  remote: bool = True) -> tuple[list, bool]:
+    """
+    질의 n개를 한 번에: 벡터 후보는 샤드마다 (n, d) 행렬 FAISS search 한 번으로 구한다.
+    vecs: (n, d), queries: 질의 텍스트 n개 (bm25/hybrid용, 없으면 vector로 동작)
+    categories: 주어지면 그 카테고리 행만 검색 (FAISS는 IDSelectorBitmap, BM25는 행 마스크)
+    샤드가 여럿이면(로컬 샤드 + REMOTE_SHARDS) 스레드 풀로 동시에 검색하고 상위 k를 병합한다.
+    remote=False면 로컬 샤드만 (원격 샤드로서 요청을 받을 때 — 되돌아 fan-out하지 않도록).
+    반환: (질의별 히트 리스트 n개, partial) — partial: 응답하지 못한 원격 샤드가 있어 상위 k가 일부 샤드만의 결과
+    """
+    g = current()
+    mode = mode or SEARCH_MODE
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"unknown search mode: {mode}")
+    Q = np.ascontiguousarray(vecs, dtype='float32').reshape(-1, g.d)
+    if mode != "vector" and (queries is None or not all(queries)):
+        mode = "vector"
+    targets = g.shards + (remote_shards() if remote else [])
+    if len(targets) == 1:
+        return targets[0].search(Q, k, queries, mode, categories), False
+    # 각 작업에 현재 contextvars를 넘김 → 샤드 스레드의 span도 이 요청의 Server-Timing에 모인다
+    futs = [_executor().submit(contextvars.copy_context().run, t.search, Q, k, queries, mode, categories)
+            for t in targets]
+    per_shard = [f.result() for f in futs]
+    ok = [res for res in per_shard if res is not None]
+    with metrics.span("search.merge"):
+        return [_merge([res[r] for res in ok], k, mode) for r in range(len(Q))], len(ok) < len(per_shard)
+
+def search_many(vecs: np.ndarray, k: int = 5, queries=None, mode: str | None = None, categories=None,
+                remote: bool = True) -> list:
+    """retrieve_many에서 히트만 (partial 여부가 필요 없는 곳: 워밍업, /shard/search, 도구)"""
+    return retrieve_many(vecs, k, queries, mode, categories, remote)[0]
+
+def retrieve(vec: np.ndarray, k: int = 5, query: str | None = None, mode: str | None = None,
+             categories=None) -> tuple[list, bool]:
+    """search()와 같은 인자 → (히트, partial)"""
+    hits, partial = retrieve_many(np.asarray(vec).reshape(1, -1), k, [query] if query else None, mode, categories)
+    return hits[0], partial
+
+def search(vec: np.ndarray, k: int = 5, query: str | None = None, mode: str | None = None, categories=None):
+    """
+    mode: vector(기본 FAISS, score=L2 거리) | bm25 (score=BM25) | hybrid (score=융합 점수, 클수록 관련)
+    bm25/hybrid는 query 텍스트가 필요하며, bm25.bin이 없으면 vector로 동작한다.
+    categories: 예) ["법령"] — 해당 카테고리 청크만 검색
+    """
+    return search_many(np.asarray(vec).reshape(1, -1), k, [query] if query else None, mode, categories)[0]
+
+def serve_shard(body: dict) -> dict:
+    """
+    /shard/search 본체 (SHARD_API=1 노드): 로컬 샤드만 검색하고 히트마다 본문 앞부분(text)을 싣는다.
+    body: {"vectors": base64 float32, "shape": [n, d], "k", "queries", "mode", "categories"}
+    """
+    Q = np.frombuffer(base64.b64decode(body["vectors"]), dtype="float32").reshape(body["shape"])
+    results = search_many(Q, int(body.get("k", 5)), body.get("queries"), body.get("mode"),
+                          body.get("categories"), remote=False)
+    for hits in results:
+        for h in hits:
+            h["text"] = snippet(h, int(body.get("max_chars", 1600)))
+    return {"ok": True, "gen": generation(), "results": results}
+
+def snippet(hit: dict, max_chars: int = 1600) -> str:
+    """
+    히트 청크 본문 앞부분. chunks.bin이 있으면 row id 슬라이스, 없으면 파일 경로 복원 후 읽기.
+    id는 히트를 만든 세대(hit['gen']) 기준 — 그 사이 교체됐어도 직전 세대에서 읽는다.
+    원격 샤드 히트는 응답에 실려 온 text를 쓴다.
+    """
+    if "text" in hit:
+        return hit["text"][:max_chars]
+    gname = hit.get("gen")
+    g = _recent.get(gname) if gname else current()
+    i = hit.get("id")
+    if g is not None and isinstance(i, int) and 0 <= i < g.rows:
+        shard, row = g.locate(i)
+        if shard.chunks is not None:
+            return shard.chunks.text(row, max_chars)
+    with metrics.span("context.file"):
+        try:
+            with open(resolve_path_for_meta(hit), "r", encoding="utf-8") as f:
+                return f.read()[:max_chars]
+        except Exception:
+            return ""
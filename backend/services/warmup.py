@@ -0,0 +1,151 @@
+# backend/services/warmup.py
+"""
+워커 워밍업 — 배포/오토스케일 직후 첫 요청이 인덱스 로드 비용을 내지 않도록
+  load      현재 인덱스 세대 열기 (gunicorn preload면 master에서 이미 열려 있어 즉시 끝남)
+  page_in   세대 파일(vectors.npy 등 제외, Generation._files)을 끝까지 읽어 mmap 페이지를 page cache로 (WARMUP_PAGE_IN)
+  search    검색 모드별 더미 검색 1번 (FAISS·BM25 경로 첫 호출 비용)
+  upstream  OpenAI HTTP 커넥션 열기 (WARMUP_UPSTREAM, 실패해도 ready는 막지 않음)
+WARMUP=background(기본)는 스레드에서, sync는 호출한 곳에서 끝까지, off는 바로 ready.
+상태는 프로세스(PID)별 — /ready는 이 워커의 워밍업이 끝났을 때만 200.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+from backend.config.config import WARMUP, WARMUP_PAGE_IN, WARMUP_UPSTREAM, VSTORE_POLL_SECONDS
+from backend.utils.logger import get_logger
+from backend.utils import metrics
+
+logger = get_logger("warmup")
+
+_lock = threading.Lock()
+_pid = None
+_state = {}
+
+def _reset(pending):
+    _state.clear()
+    _state.update(status="running", pending=set(pending), phases={}, errors={}, started=time.time())
+
+def _record(name: str, dt: float, err: Exception | None, fatal: bool):
+    metrics.observe("rag_startup_seconds", dt, phase=name)
+    if err is not None:
+        logger.warning(f"warm-up {name} failed: {err}")
+    with _lock:
+        _state["phases"][name] = round(dt, 4)
+        _state["pending"].discard(name)
+        if err is not None:
+            _state["errors"][name] = str(err)
+            if fatal:
+                _state["status"] = "failed"
+        if not _state["pending"] and _state["status"] == "running":
+            _state["status"] = "ready"
+            logger.info(f"warm-up done in {time.time() - _state['started']:.2f}s: {_state['phases']}")
+
+def _phase(name: str, fn, fatal: bool = True):
+    t0 = time.perf_counter()
+    err = None
+    try:
+        fn()
+    except Exception as e:
+        err = e
+    _record(name, time.perf_counter() - t0, err, fatal)
+
+def _load():
+    from backend.services import rag_service
+    rag_service.current()
+
+def _page_in():
+    from backend.services import rag_service
+    n = rag_service.current().page_in()
+    logger.info(f"paged in {n / 2**20:.1f} MiB")
+
+def _search():
+    from backend.services import rag_service
+    g = rag_service.current()
+    q = np.zeros((1, g.d), dtype="float32")
+    for mode in rag_service.SEARCH_MODES:
+        # 로컬 샤드만 데운다 — 원격 샤드 노드는 각자 워밍업하고, 기동마다 REMOTE_SHARDS로 fan-out할 필요 없음
+        rag_service.search_many(q, 1, ["워밍업 제1조"], mode, remote=False)
+
+def _upstream():
+    from backend.services import llm_service
+    llm_service.ping()
+
+def _load_retrying(retry: bool):
+    """인덱스가 아직 없으면(배포 직후 ingest 전) background 모드는 VSTORE_POLL_SECONDS마다 다시 시도"""
+    t0 = time.perf_counter()
+    while True:
+        try:
+            _load()
+            err = None
+        except Exception as e:
+            err = e
+        if err is None or not retry:
+            break
+        with _lock:
+            first = "load" not in _state["errors"]
+            _state["errors"]["load"] = str(err)
+        if first:
+            logger.warning(f"warm-up load failed, retrying every {VSTORE_POLL_SECONDS}s: {err}")
+        time.sleep(VSTORE_POLL_SECONDS)
+    if err is None:
+        with _lock:
+            _state["errors"].pop("load", None)
+    _record("load", time.perf_counter() - t0, err, fatal=True)
+    return err is None
+
+def _run(upstream: bool, retry: bool):
+    if not _load_retrying(retry):
+        # 인덱스가 없으면 나머지 단계는 의미가 없다 — /ready는 계속 503
+        return
+    if WARMUP_PAGE_IN:
+        _phase("page_in", _page_in)
+    _phase("search", _search)
+    if upstream:
+        _phase("upstream", _upstream, fatal=False)
+
+def start(upstream: bool = True):
+    """
+    이 프로세스의 워밍업 시작 (PID당 1번). upstream=False면 upstream 단계는 호출 측이
+    aupstream()으로 채운다 (async 모드: 이벤트 루프에 묶인 클라이언트로 연결해야 함).
+    """
+    global _pid
+    with _lock:
+        if _pid == os.getpid():
+            return
+        _pid = os.getpid()
+        if WARMUP == "off":
+            _reset(())
+            _state["status"] = "ready"
+            return
+        _reset(["load", "search"] + (["page_in"] if WARMUP_PAGE_IN else []) + (["upstream"] if WARMUP_UPSTREAM else []))
+    do_upstream = upstream and WARMUP_UPSTREAM
+    if WARMUP == "sync":
+        _run(do_upstream, retry=False)
+    else:
+        threading.Thread(target=_run, args=(do_upstream, True), name="warmup", daemon=True).start()
+
+async def aupstream():
+    """async 모드: 공유 AsyncOpenAI 클라이언트의 커넥션을 이벤트 루프에서 연다 (start(upstream=False)와 짝)"""
+    if not WARMUP_UPSTREAM or WARMUP == "off":
+        return
+    from backend.services import llm_service
+    t0 = time.perf_counter()
+    err = None
+    try:
+        await llm_service.aping()
+    except Exception as e:
+        err = e
+    _record("upstream", time.perf_counter() - t0, err, fatal=False)
+
+def status() -> dict:
+    """/ready 응답 본문: status(pending|running|ready|failed), 단계별 초, 오류"""
+    with _lock:
+        if _pid != os.getpid():
+            return {"status": "pending", "phases": {}, "errors": {}}
+        return {"status": _state["status"], "phases": dict(_state["phases"]), "errors": dict(_state["errors"])}
+
+def ready() -> bool:
+    return _pid == os.getpid() and _state.get("status") == "ready"
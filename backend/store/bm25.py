@@ -0,0 +1,131 @@
+# backend/store/bm25.py
+"""
+BM25 역색인 (bm25.bin) — ingest 시 구축, 서버는 mmap으로 읽어 NumPy로 점수 계산
+
+토큰화(한국어 법률 문서용)
+  - 조문/사건번호 패턴은 통째로 한 토큰: 제11조의5, 제3항, 제2호, 2018도12345
+  - 한글 연속 구간은 문자 bigram (1글자면 unigram)
+  - 영문/숫자 연속 구간은 단어 그대로
+용어는 64비트 해시로 저장 → 정렬된 term_hash에 np.searchsorted로 조회 (vocab dict 로드 없음)
+포스팅은 CSR: term_off[t]:term_off[t+1] 구간의 post_doc(row id) / post_tf
+"""
+import hashlib
+import math
+import re
+import unicodedata
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from backend.store.packed import write_packed, PackedFile
+
+BM25_FILE = "bm25.bin"
+TOKENIZER_VERSION = 1
+
+_PATTERNS = re.compile(r"제\d+조(?:의\d+)?|제\d+[항호]|\d{2,4}[가-힣]{1,3}\d+")
+_RUNS = re.compile(r"[가-힣]+|[a-z0-9]+")
+
+def tokenize(text: str) -> list:
+    t = unicodedata.normalize("NFKC", text or "").lower()
+    toks = _PATTERNS.findall(t)
+    for run in _RUNS.findall(t):
+        if "가" <= run[0] <= "힣":
+            if len(run) == 1:
+                toks.append(run)
+            else:
+                toks.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            toks.append(run)
+    return toks
+
+def key_terms(text: str) -> frozenset:
+    """조문/사건번호 토큰만 (제11조의5, 2019다12345 …) — 벡터가 거의 같아도 이것이 다르면 다른 질문"""
+    return frozenset(_PATTERNS.findall(unicodedata.normalize("NFKC", text or "").lower()))
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+def build_bm25(path: Path, texts, dead=None, k1: float = 1.2, b: float = 0.75) -> int:
+    """row 정렬 texts로 역색인 작성 (dead 행은 제외). 반환: 용어 수"""
+    hashes = {}
+    t_list, d_list, f_list = [], [], []
+    n = len(texts)
+    doc_len = np.zeros(n, dtype="float32")
+    for i, text in enumerate(texts):
+        if dead is not None and dead[i]:
+            continue
+        c = Counter(tokenize(text))
+        doc_len[i] = sum(c.values())
+        for term, tf in c.items():
+            h = hashes.get(term)
+            if h is None:
+                h = hashes[term] = term_hash(term)
+            t_list.append(h)
+            d_list.append(i)
+            f_list.append(tf)
+    th = np.array(t_list, dtype="uint64")
+    docs = np.array(d_list, dtype="int32")
+    tfs = np.array(f_list, dtype="float32")
+    order = np.lexsort((docs, th))
+    th, docs, tfs = th[order], docs[order], tfs[order]
+    uniq, starts = np.unique(th, return_index=True)
+    term_off = np.append(starts, len(th)).astype("int64")
+    live = int(np.count_nonzero(doc_len)) or 1
+    write_packed(path, {"kind": "bm25", "version": 1, "tokenizer": TOKENIZER_VERSION, "n_docs": live,
+                        "avgdl": float(doc_len.sum() / live), "k1": k1, "b": b},
+                 {"term_hash": uniq, "term_off": term_off, "post_doc": docs, "post_tf": tfs, "doc_len": doc_len})
+    return len(uniq)
+
+class BM25Index:
+    def __init__(self, path: Path):
+        self._pf = PackedFile(path)
+        m = self._pf.meta
+        self.n_docs, self.avgdl, self.k1, self.b = m["n_docs"], m["avgdl"] or 1.0, m["k1"], m["b"]
+        a = self._pf.arrays
+        self._th, self._off = a["term_hash"], a["term_off"]
+        self._doc, self._tf, self._dl = a["post_doc"], a["post_tf"], a["doc_len"]
+
+    def __len__(self):
+        return len(self._dl)
+
+    def _postings(self, query: str):
+        """질의 용어별 (doc ids, BM25 기여도) 배열을 이어붙여 반환"""
+        terms = [term_hash(t) for t in set(tokenize(query))]
+        if not terms or len(self._th) == 0:
+            return np.zeros(0, dtype="int32"), np.zeros(0, dtype="float32")
+        q = np.array(terms, dtype="uint64")
+        pos = np.searchsorted(self._th, q)
+        ok = pos < len(self._th)
+        ok[ok] = self._th[pos[ok]] == q[ok]
+        docs, contrib = [], []
+        for p in pos[ok]:
+            s, e = int(self._off[p]), int(self._off[p + 1])
+            d = self._doc[s:e]
+            tf = self._tf[s:e]
+            df = e - s
+            idf = math.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self._dl[d] / self.avgdl)
+            docs.append(d)
+            contrib.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+        if not docs:
+            return np.zeros(0, dtype="int32"), np.zeros(0, dtype="float32")
+        return np.concatenate(docs), np.concatenate(contrib).astype("float32")
+
+    def search(self, query: str, k: int, allow: np.ndarray | None = None):
+        """상위 k개 (row ids int64, scores float32), 점수 내림차순. allow: 행별 bool 마스크(필터)"""
+        docs, contrib = self._postings(query)
+        if allow is not None and len(docs):
+            keep = allow[docs]
+            docs, contrib = docs[keep], contrib[keep]
+        if len(docs) == 0:
+            return np.zeros(0, dtype="int64"), np.zeros(0, dtype="float32")
+        order = np.argsort(docs, kind="stable")
+        docs = docs[order]
+        uniq, starts = np.unique(docs, return_index=True)
+        scores = np.add.reduceat(contrib[order], starts)
+        if len(uniq) > k:
+            top = np.argpartition(-scores, k)[:k]
+            uniq, scores = uniq[top], scores[top]
+        o = np.argsort(-scores, kind="stable")
+        return uniq[o].astype("int64"), scores[o]
@@ -0,0 +1,48 @@
+# backend/store/chunk_store.py
+"""
+청크 본문 팩 스토어 (chunks.bin)
+  - FAISS row id 순서와 정렬된 offsets/lengths 테이블 + UTF-8 blob 하나
+  - 서버는 mmap 후 row id로 슬라이스 → 경로 복원/파일 open 없음
+"""
+from pathlib import Path
+
+import numpy as np
+
+from backend.store.packed import write_packed, PackedFile
+
+def write_chunks(path: Path, texts) -> int:
+    enc = [t.encode("utf-8") for t in texts]
+    lengths = np.fromiter((len(b) for b in enc), dtype="int64", count=len(enc))
+    offsets = np.zeros(len(enc), dtype="int64")
+    if len(enc) > 1:
+        np.cumsum(lengths[:-1], out=offsets[1:])
+    blob = np.frombuffer(b"".join(enc), dtype="uint8")
+    write_packed(path, {"kind": "chunks", "version": 1, "n": len(enc)},
+                 {"offsets": offsets, "lengths": lengths, "blob": blob})
+    return len(enc)
+
+class ChunkStore:
+    def __init__(self, path: Path):
+        self._pf = PackedFile(path)
+        self._off = self._pf.arrays["offsets"]
+        self._len = self._pf.arrays["lengths"]
+        self._blob = self._pf.arrays["blob"]
+
+    def __len__(self):
+        return len(self._off)
+
+    def raw(self, row: int) -> bytes:
+        """행 본문의 UTF-8 바이트 그대로 (무결성 검사용 해시 등)"""
+        o = int(self._off[row])
+        return self._blob[o:o + int(self._len[row])].tobytes()
+
+    def text(self, row: int, max_chars: int | None = None) -> str:
+        o, n = int(self._off[row]), int(self._len[row])
+        if max_chars is not None:
+            n = min(n, max_chars * 4)  # UTF-8 최대 4바이트/문자
+        s = self._blob[o:o + n].tobytes().decode("utf-8", errors="ignore")
+        return s[:max_chars] if max_chars is not None else s
+
+    def texts(self):
+        for i in range(len(self)):
+            yield self.text(i)
@@ -0,0 +1,125 @@
+# backend/store/generations.py
+"""
+벡터스토어 세대(generation) 관리
+  <root>/generations/<name>/   한 번 게시되면 바꾸지 않는 인덱스·메타·청크 묶음 + GENERATION.json
+  <root>/CURRENT               현재 세대 이름 한 줄 (os.replace로 원자적 교체)
+  <root>/current/              레거시 단일 디렉터리 (CURRENT가 없을 때만 사용)
+
+임베더는 staging 디렉터리에 전부 쓴 뒤 publish()로 rename + 포인터 교체를 하므로,
+읽는 쪽은 항상 한 세대의 파일들만 짝지어 본다.
+쓰는 쪽(임베더, validate_index --repair, tune_index --apply)은 staging → publish → prune 전체를
+write_lock()(<root>/.lock, flock) 안에서 한다 — 한 번에 하나만 세대를 만들고, prune이 지우는 staging은
+중단된 실행이 남긴 것뿐.
+"""
+import contextlib
+import fcntl
+import json
+import os
+import secrets
+import shutil
+import time
+from pathlib import Path
+
+from backend.store.shards import SHARDS_DIR, shard_dirs, link_tree
+
+GENERATIONS = "generations"
+CURRENT = "CURRENT"
+LEGACY_DIR = "current"
+MANIFEST = "GENERATION.json"
+STAGING_SUFFIX = ".staging"
+LOCK = ".lock"
+
+@contextlib.contextmanager
+def write_lock(root: Path):
+    """세대 쓰기 배타 잠금. 다른 프로세스가 잡고 있으면 끝날 때까지 기다린다 (프로세스가 죽으면 커널이 풀어 줌)"""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / LOCK, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def read_current(root: Path) -> str | None:
+    """CURRENT 포인터가 가리키는 세대 이름 (없거나 세대 디렉터리가 없으면 None)"""
+    f = Path(root) / CURRENT
+    try:
+        name = f.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return name if name and (Path(root) / GENERATIONS / name).is_dir() else None
+
+def current_dir(root: Path) -> Path:
+    """현재 세대 디렉터리. 세대가 하나도 게시되지 않았으면 레거시 <root>/current"""
+    name = read_current(root)
+    return Path(root) / GENERATIONS / name if name else Path(root) / LEGACY_DIR
+
+def new_staging(root: Path) -> tuple[str, Path]:
+    """새 세대 이름과 staging 디렉터리 (이름은 시간순 정렬 가능)"""
+    name = time.strftime("%Y%m%d-%H%M%S") + "-" + secrets.token_hex(3)
+    staging = Path(root) / GENERATIONS / (name + STAGING_SUFFIX)
+    staging.mkdir(parents=True, exist_ok=False)
+    return name, staging
+
+def clone_staging(root: Path, gen_dir: Path) -> tuple[str, Path]:
+    """
+    gen_dir(샤드 포함)을 하드링크한 새 staging. 바꿀 파일만 tmp → os.replace로 다시 쓰면 원본 세대는 그대로.
+    GENERATION.json은 링크하지 않는다 (publish가 새로 쓴다).
+    """
+    name, staging = new_staging(root)
+    try:
+        link_tree(gen_dir, staging)
+        (staging / MANIFEST).unlink(missing_ok=True)
+        for sd in shard_dirs(gen_dir):
+            link_tree(sd, staging / SHARDS_DIR / sd.name)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return name, staging
+
+def derived_info(gen_dir: Path, **extra) -> dict:
+    """gen_dir에서 파생한 세대의 GENERATION.json 정보 (게시 시점 필드는 publish가 채운다)"""
+    info = {k: v for k, v in read_manifest(gen_dir).items() if k not in ("name", "parent", "published", "files")}
+    info.update(extra)
+    return info
+
+def publish(root: Path, name: str, staging: Path, info: dict | None = None) -> Path:
+    """staging → generations/<name> rename, GENERATION.json 기록, CURRENT 원자적 교체"""
+    root = Path(root)
+    prev = read_current(root)
+    manifest = dict(info or {}, name=name, parent=prev, published=time.time(),
+                    files={p.name: p.stat().st_size for p in sorted(staging.iterdir()) if p.is_file()})
+    (staging / MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    final = root / GENERATIONS / name
+    os.replace(staging, final)
+    tmp = root / (CURRENT + ".tmp")
+    tmp.write_text(name + "\n", encoding="utf-8")
+    os.replace(tmp, root / CURRENT)
+    return final
+
+def read_manifest(gen_dir: Path) -> dict:
+    f = Path(gen_dir) / MANIFEST
+    return json.loads(f.read_text(encoding="utf-8")) if f.exists() else {}
+
+def prune(root: Path, keep: int) -> list[str]:
+    """
+    현재 세대를 제외하고 최근 keep-1개만 남긴다 (keep<=0 이면 지우지 않음). 남은 staging(중단된 실행)도 정리.
+    write_lock() 안에서 호출할 것 — 그래야 다른 실행이 쓰는 중인 staging을 지우지 않는다.
+    이미 세대를 연 서버 프로세스는 열린 파일/mmap으로 계속 읽을 수 있다(POSIX).
+    """
+    gdir = Path(root) / GENERATIONS
+    if not gdir.is_dir():
+        return []
+    cur = read_current(root)
+    names = sorted(p.name for p in gdir.iterdir() if p.is_dir() and not p.name.endswith(STAGING_SUFFIX))
+    others = [n for n in names if n != cur]
+    old = others[:max(len(others) - (keep - 1), 0)] if keep > 0 else []
+    removed = []
+    for n in old:
+        shutil.rmtree(gdir / n, ignore_errors=True)
+        removed.append(n)
+    for p in gdir.glob("*" + STAGING_SUFFIX):
+        if p.is_dir():
+            shutil.rmtree(p, ignore_errors=True)
+    return removed
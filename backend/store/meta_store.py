@@ -0,0 +1,131 @@
+# backend/store/meta_store.py
+"""
+컬럼형 메타데이터 스토어 (metadatas.bin)
+  - interned : category 같은 저카디널리티 문자열 → int32 코드 + vocab
+  - int      : 모든 행이 정수인 키 → int64
+  - str      : 모든 행이 문자열인 키 → 공유 blob의 (offset, length)
+  - json     : 그 외(None, 혼합 타입, 일부 행에만 있는 키) → JSON 텍스트, 길이 -1은 키 없음
+행 dict는 접근 시점에만 디코딩한다(lazy). 읽기/쓰기 API는 임베더·서버·스크립트 공용.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+from backend.store.packed import write_packed, PackedFile
+
+META_BIN  = "metadatas.bin"
+META_JSON = "metadatas.json"
+INTERNED  = ("category",)
+
+_MISSING = object()
+
+def _column_type(key: str, values: list) -> str:
+    if any(v is _MISSING for v in values):
+        return "json"
+    if key in INTERNED and all(isinstance(v, str) for v in values):
+        return "interned"
+    if values and all(type(v) is int for v in values):
+        return "int"
+    if all(isinstance(v, str) for v in values):
+        return "str"
+    return "json"
+
+def write_metas(path: Path, metas: list) -> int:
+    n = len(metas)
+    keys = list(dict.fromkeys(k for m in metas for k in m))
+    columns, arrays, blob, pos = [], {}, [], 0
+    for key in keys:
+        values = [m.get(key, _MISSING) for m in metas]
+        ctype = _column_type(key, values)
+        col = {"name": key, "type": ctype}
+        if ctype == "interned":
+            vocab = sorted(set(values))
+            code = {v: i for i, v in enumerate(vocab)}
+            arrays[f"c.{key}"] = np.fromiter((code[v] for v in values), dtype="int32", count=n)
+            col["vocab"] = vocab
+        elif ctype == "int":
+            arrays[f"c.{key}"] = np.fromiter(values, dtype="int64", count=n)
+        else:
+            span = np.empty((n, 2), dtype="int64")
+            for i, v in enumerate(values):
+                if v is _MISSING:
+                    span[i] = (pos, -1)
+                    continue
+                b = (v if ctype == "str" else json.dumps(v, ensure_ascii=False)).encode("utf-8")
+                span[i] = (pos, len(b))
+                blob.append(b)
+                pos += len(b)
+            arrays[f"s.{key}"] = span
+        columns.append(col)
+    arrays["blob"] = np.frombuffer(b"".join(blob), dtype="uint8")
+    write_packed(path, {"kind": "metas", "version": 1, "n": n, "columns": columns}, arrays)
+    return n
+
+class MetaStore:
+    """metadatas.bin 리더. len() / [i] / iter 는 list[dict]와 같은 모양."""
+
+    def __init__(self, path: Path):
+        self._pf = PackedFile(path)
+        self.n = self._pf.meta["n"]
+        self.columns = self._pf.meta["columns"]
+        self._blob = self._pf.arrays["blob"]
+        self._cols = []
+        for c in self.columns:
+            name, ctype = c["name"], c["type"]
+            arr = self._pf.arrays[f"c.{name}" if ctype in ("interned", "int") else f"s.{name}"]
+            self._cols.append((name, ctype, arr, c.get("vocab")))
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i: int) -> dict:
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        out = {}
+        for name, ctype, arr, vocab in self._cols:
+            if ctype == "interned":
+                code = int(arr[i])
+                out[name] = vocab[code] if code >= 0 else None
+            elif ctype == "int":
+                out[name] = int(arr[i])
+            else:
+                off, ln = int(arr[i, 0]), int(arr[i, 1])
+                if ln < 0:
+                    continue
+                s = self._blob[off:off + ln].tobytes().decode("utf-8")
+                out[name] = s if ctype == "str" else json.loads(s)
+        return out
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self[i]
+
+    def column(self, name: str) -> np.ndarray:
+        """interned/int 컬럼의 원시 배열 (코드 또는 정수). 필터링용."""
+        for cname, ctype, arr, _ in self._cols:
+            if cname == name and ctype in ("interned", "int"):
+                return arr
+        raise KeyError(name)
+
+    def vocab(self, name: str) -> list:
+        for cname, ctype, _, vocab in self._cols:
+            if cname == name and ctype == "interned":
+                return vocab
+        raise KeyError(name)
+
+    def to_list(self) -> list:
+        return list(self)
+
+def open_metas(vstore_dir: Path):
+    """metadatas.bin이 있으면 MetaStore, 없으면 레거시 metadatas.json을 list[dict]로"""
+    vstore_dir = Path(vstore_dir)
+    if (vstore_dir / META_BIN).exists():
+        return MetaStore(vstore_dir / META_BIN)
+    return json.loads((vstore_dir / META_JSON).read_text(encoding="utf-8"))
+
+def metas_exist(vstore_dir: Path) -> bool:
+    vstore_dir = Path(vstore_dir)
+    return (vstore_dir / META_BIN).exists() or (vstore_dir / META_JSON).exists()
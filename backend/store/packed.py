@@ -0,0 +1,68 @@
+# backend/store/packed.py
+"""
+단일 파일 팩 컨테이너 (벡터스토어 부속 파일 공용 포맷)
+
+  MAGIC(8) | uint64 header_len | header(JSON) | pad | array0 | pad | array1 ...
+
+header = {"meta": {...}, "arrays": {name: {"dtype", "shape", "offset"}}}
+offset은 데이터 영역 시작 기준이며 모든 배열은 ALIGN 바이트 정렬.
+읽기는 mmap + np.frombuffer 이므로 파싱/복사 없이 필요한 페이지만 올라온다.
+"""
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"MCPACK01"
+ALIGN = 64
+
+def _pad(n: int) -> int:
+    return (-n) % ALIGN
+
+def write_packed(path: Path, meta: dict, arrays: dict):
+    """arrays(name → ndarray)를 path에 원자적으로 기록"""
+    path = Path(path)
+    arrays = {k: np.ascontiguousarray(v) for k, v in arrays.items()}
+    desc, off = {}, 0
+    for name, arr in arrays.items():
+        desc[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": off}
+        off += arr.nbytes + _pad(arr.nbytes)
+    head = json.dumps({"meta": meta, "arrays": desc}, ensure_ascii=False).encode("utf-8")
+
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(head)))
+        f.write(head)
+        f.write(b"\0" * _pad(len(MAGIC) + 8 + len(head)))
+        for arr in arrays.values():
+            f.write(memoryview(arr).cast("B"))
+            f.write(b"\0" * _pad(arr.nbytes))
+    os.replace(tmp, path)
+
+class PackedFile:
+    """write_packed 파일을 mmap으로 열어 meta / arrays(읽기 전용 ndarray 뷰) 제공"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"팩 파일 형식이 아닙니다: {self.path}")
+        (hlen,) = struct.unpack_from("<Q", self._mm, len(MAGIC))
+        hstart = len(MAGIC) + 8
+        head = json.loads(self._mm[hstart:hstart + hlen].decode("utf-8"))
+        base = hstart + hlen + _pad(hstart + hlen)
+        self.meta = head["meta"]
+        self.arrays = {}
+        for name, d in head["arrays"].items():
+            dt = np.dtype(d["dtype"])
+            shape = tuple(d["shape"])
+            count = int(np.prod(shape)) if shape else 1
+            self.arrays[name] = np.frombuffer(self._mm, dtype=dt, count=count, offset=base + d["offset"]).reshape(shape)
+
+    def nbytes(self) -> int:
+        return len(self._mm)
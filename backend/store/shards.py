@@ -0,0 +1,43 @@
+# backend/store/shards.py
+"""
+세대 내부 샤드 레이아웃
+  <gen>/shards/<NN>/   샤드마다 독립된 인덱스·메타·청크·BM25·벡터 (단일 세대 디렉터리와 같은 파일 구성)
+  <gen>/               샤드가 없으면(VSTORE_SHARDS=1) 세대 디렉터리 자체가 저장소 하나
+
+청크는 rel_path 해시로 샤드를 고른다 → 같은 청크는 항상 같은 샤드, 샤드 수가 같으면 재배치 없음.
+임베더는 바뀐 샤드만 새로 쓰고 나머지는 이전 세대 파일을 하드링크한다.
+"""
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+SHARDS_DIR = "shards"
+
+def shard_name(i: int) -> str:
+    return f"{i:02d}"
+
+def shard_of(key: str, n: int) -> int:
+    """청크 키(rel_path) → 샤드 번호 (0..n-1)"""
+    if n <= 1:
+        return 0
+    h = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+    return h % n
+
+def shard_dirs(gen_dir: Path) -> list[Path]:
+    """세대의 샤드 디렉터리 목록(이름순). 샤드 레이아웃이 아니면 []"""
+    d = Path(gen_dir) / SHARDS_DIR
+    if not d.is_dir():
+        return []
+    return sorted(p for p in d.iterdir() if p.is_dir())
+
+def link_tree(src: Path, dst: Path):
+    """src 디렉터리 파일들을 dst로 하드링크 (다른 파일시스템 등으로 실패하면 복사). 세대 파일은 불변이라 공유 가능."""
+    dst.mkdir(parents=True, exist_ok=True)
+    for f in Path(src).iterdir():
+        if not f.is_file():
+            continue
+        try:
+            os.link(f, dst / f.name)
+        except OSError:
+            shutil.copy2(f, dst / f.name)
@@ -0,0 +1,253 @@
+# backend/store/vector_index.py
+"""
+FAISS 인덱스 종류/파라미터 공용 모듈 (임베더·서버·튜닝 도구)
+
+  flat      : IndexFlatL2 (정확, O(N·d))
+  ivf_flat  : IVF{nlist},Flat        → 검색 파라미터 nprobe
+  ivf_pq    : IVF{nlist},PQ{m}x8     → 검색 파라미터 nprobe
+  hnsw      : HNSW{M},Flat           → 검색 파라미터 efSearch
+  sq8       : SQ8 (8비트 스칼라 양자화, 차원당 1바이트)
+  ivf_sq8   : IVF{nlist},SQ8         → 검색 파라미터 nprobe
+
+양자화 인덱스(sq8/ivf_sq8/ivf_pq)는 1차 검색에서 k×rerank개를 뽑고, mmap한 vectors.npy의
+원본 float32 벡터로 정확한 L2를 다시 계산해 상위 k를 고른다 (rerank()).
+
+모든 인덱스는 IndexIDMap2로 감싸며 FAISS id == 메타/청크/벡터 row 번호.
+변경·삭제된 청크는 remove_ids + tombstones.npy(행별 dead 플래그)로 처리하고
+(삭제를 지원하지 않는 HNSW는 dead 행이 인덱스에 남고 서버가 tombstone으로 가린다),
+dead 비율이 COMPACT_DEAD_FRACTION을 넘으면 임베더가 살아있는 행만으로 재빌드(compaction)한다.
+학습(train)은 최대 INDEX_TRAIN_SAMPLE 행 샘플로 한다.
+빌드 설정과 검색 파라미터는 index_params.json에 같이 저장되어 서버가 로드 시 적용한다.
+행 정렬된 원본 벡터는 vectors.npy (float32)로 보관 → 재빌드/튜닝 시 재임베딩 불필요.
+"""
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+from backend.config.config import (
+    INDEX_TYPE, IVF_NLIST, PQ_M, HNSW_M, HNSW_EF_CONSTRUCTION,
+    INDEX_NPROBE, INDEX_EF_SEARCH, INDEX_TRAIN_SAMPLE, INDEX_RERANK,
+)
+
+INDEX_TYPES  = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq8", "ivf_sq8")
+IVF_TYPES    = ("ivf_flat", "ivf_pq", "ivf_sq8")
+QUANTIZED    = ("ivf_pq", "sq8", "ivf_sq8")
+NO_REMOVE    = ("hnsw",)   # remove_ids 미지원 — dead 행이 인덱스에 남는 종류
+PARAMS_FILE  = "index_params.json"
+VECTORS_FILE = "vectors.npy"
+TOMBSTONES_FILE = "tombstones.npy"
+
+def default_params(kind: str = INDEX_TYPE) -> dict:
+    return {
+        "type": kind,
+        "nlist": IVF_NLIST,
+        "pq_m": PQ_M,
+        "hnsw_m": HNSW_M,
+        "ef_construction": HNSW_EF_CONSTRUCTION,
+        "nprobe": INDEX_NPROBE,
+        "ef_search": INDEX_EF_SEARCH,
+        "rerank": INDEX_RERANK,
+    }
+
+def _resolve(params: dict, n: int, dim: int) -> dict:
+    """데이터 크기에 맞게 nlist/pq_m 보정. 학습이 불가능한 규모면 한 단계 낮은 종류로 내린다."""
+    p = dict(params)
+    kind = p["requested"] = p.get("requested") or p["type"]
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"알 수 없는 INDEX_TYPE: {kind} (가능: {', '.join(INDEX_TYPES)})")
+    if kind in IVF_TYPES:
+        nlist = p.get("nlist") or int(4 * math.sqrt(max(n, 1)))
+        # k-means 학습에 클러스터당 최소 39개 포인트
+        nlist = max(1, min(nlist, n // 39))
+        if nlist < 2:
+            kind = "sq8" if kind == "ivf_sq8" else "flat"
+        p["nlist"] = nlist
+    if kind == "ivf_pq":
+        m = min(p.get("pq_m") or 1, dim)
+        while dim % m:
+            m -= 1
+        p["pq_m"] = m
+        if min(n, INDEX_TRAIN_SAMPLE) < 256:  # PQ 코드북(2^8) 학습 불가
+            kind = "ivf_flat"
+    p["type"] = kind
+    return p
+
+def factory_string(p: dict) -> str:
+    kind = p["type"]
+    if kind == "flat":
+        return "Flat"
+    if kind == "ivf_flat":
+        return f"IVF{p['nlist']},Flat"
+    if kind == "ivf_pq":
+        return f"IVF{p['nlist']},PQ{p['pq_m']}x8"
+    if kind == "sq8":
+        return "SQ8"
+    if kind == "ivf_sq8":
+        return f"IVF{p['nlist']},SQ8"
+    return f"HNSW{p['hnsw_m']},Flat"
+
+def _train_sample(vecs: np.ndarray, limit: int = INDEX_TRAIN_SAMPLE) -> np.ndarray:
+    if len(vecs) <= limit:
+        return np.ascontiguousarray(vecs, dtype="float32")
+    rows = np.sort(np.random.default_rng(0).choice(len(vecs), size=limit, replace=False))
+    return np.ascontiguousarray(vecs[rows], dtype="float32")
+
+def build_index(vecs: np.ndarray, params: dict | None = None, ids: np.ndarray | None = None):
+    """vecs로 새 IndexIDMap2 생성(학습 + add, id 기본값은 0..n-1). 반환: (index, 실제 적용된 params)"""
+    vecs = np.ascontiguousarray(vecs, dtype="float32")
+    n, dim = vecs.shape
+    params = params or {}
+    p = _resolve({**default_params(params.get("type", INDEX_TYPE)), **params}, n, dim)
+    p["dim"] = dim
+    index = faiss.index_factory(dim, factory_string(p), faiss.METRIC_L2)
+    if p["type"] == "hnsw":
+        faiss.downcast_index(index).hnsw.efConstruction = p["ef_construction"]
+    if not index.is_trained:
+        index.train(_train_sample(vecs))
+    index = faiss.IndexIDMap2(index)
+    index.add_with_ids(vecs, np.arange(n, dtype="int64") if ids is None else np.asarray(ids, dtype="int64"))
+    apply_search_params(index, p)
+    return index, p
+
+def is_id_mapped(index) -> bool:
+    return isinstance(faiss.downcast_index(index), faiss.IndexIDMap2)
+
+def remove_rows(index, rows) -> bool:
+    """rows를 인덱스에서 삭제. 삭제를 지원하지 않는 인덱스(HNSW)면 False — 행은 인덱스에 남는다 (tombstone으로 가림)"""
+    rows = np.asarray(rows, dtype="int64")
+    if len(rows) == 0:
+        return True
+    try:
+        index.remove_ids(rows)
+    except RuntimeError:
+        return False
+    return True
+
+def apply_search_params(index, p: dict):
+    kind = p.get("type", "flat")
+    ps = faiss.ParameterSpace()
+    if kind in IVF_TYPES:
+        ps.set_index_parameter(index, "nprobe", int(p.get("nprobe", INDEX_NPROBE)))
+    elif kind == "hnsw":
+        ps.set_index_parameter(index, "efSearch", int(p.get("ef_search", INDEX_EF_SEARCH)))
+
+def id_selector(mask: np.ndarray):
+    """행별 bool 마스크 → IDSelectorBitmap (id == row). 반환: (selector, bitmap) — bitmap은 selector 수명 동안 유지"""
+    bitmap = np.packbits(np.asarray(mask, dtype=bool), bitorder="little")
+    return faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap)), bitmap
+
+def search_params(p: dict, sel=None):
+    """
+    selector를 건 검색 파라미터. SearchParameters를 넘기면 인덱스에 설정된 nprobe/efSearch 대신
+    파라미터 객체 값이 쓰이므로 index_params.json 값을 같이 채운다.
+    """
+    kind = p.get("type", "flat")
+    if kind in IVF_TYPES:
+        sp = faiss.SearchParametersIVF()
+        sp.nprobe = int(p.get("nprobe", INDEX_NPROBE))
+    elif kind == "hnsw":
+        sp = faiss.SearchParametersHNSW()
+        sp.efSearch = int(p.get("ef_search", INDEX_EF_SEARCH))
+    else:
+        sp = faiss.SearchParameters()
+    if sel is not None:
+        sp.sel = sel
+    return sp
+
+def rerank_factor(p: dict) -> int:
+    """양자화 인덱스의 over-fetch 배수 (그 외 종류는 1 = 재정렬 없음)"""
+    return max(1, int(p.get("rerank", INDEX_RERANK))) if p.get("type") in QUANTIZED else 1
+
+def rerank(vectors, Q: np.ndarray, I: np.ndarray, k: int):
+    """
+    1차 후보 I (n, k') 를 원본 벡터로 정확한 L2 재계산 → 상위 k (D, I). 빈 칸은 (inf, -1).
+    후보 행은 정렬해서 읽는다 (mmap 파일을 앞에서 뒤로 접근).
+    """
+    outD = np.full((len(Q), k), np.inf, dtype="float32")
+    outI = np.full((len(Q), k), -1, dtype="int64")
+    for r in range(len(Q)):
+        ids = np.unique(I[r][I[r] >= 0])
+        if len(ids) == 0:
+            continue
+        diff = np.asarray(vectors[ids], dtype="float32") - Q[r]
+        d = np.einsum("ij,ij->i", diff, diff)
+        top = np.argsort(d, kind="stable")[:k]
+        outD[r, :len(top)] = d[top]
+        outI[r, :len(top)] = ids[top]
+    return outD, outI
+
+# ── 파일 입출력 ─────────────────────────────────────────────
+def read_index(path: Path, mmap: bool = False):
+    """
+    mmap=True: 벡터 코드/역리스트를 복사하지 않고 파일 mmap으로 참조 (읽기 전용, 서버용).
+    페이지는 page cache로 워커끼리 공유되므로 워커 RSS가 코퍼스 크기와 거의 무관해진다.
+    """
+    flags = 0
+    if mmap:
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    return faiss.read_index(str(path), flags)
+
+def prefetch(path: Path):
+    """파일을 page cache로 미리 올리도록 커널에 알림 (지원 안 되는 OS면 무시)"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+def read_through(path: Path, block: int = 1 << 20) -> int:
+    """파일을 끝까지 읽어 page cache에 확실히 올림 (prefetch는 힌트일 뿐). 반환: 읽은 바이트 수"""
+    n = 0
+    with open(path, "rb", buffering=0) as f:
+        buf = bytearray(block)
+        while True:
+            r = f.readinto(buf)
+            if not r:
+                return n
+            n += r
+
+def read_params(vstore_dir: Path) -> dict:
+    f = Path(vstore_dir) / PARAMS_FILE
+    if f.exists():
+        return json.loads(f.read_text(encoding="utf-8"))
+    return {"type": "flat"}  # 레거시 벡터스토어는 항상 IndexFlatL2
+
+def write_params(vstore_dir: Path, p: dict):
+    f = Path(vstore_dir) / PARAMS_FILE
+    tmp = f.with_suffix(f.suffix + ".tmp")
+    tmp.write_text(json.dumps(p, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, f)
+
+def load_vectors(vstore_dir: Path, mmap: bool = True):
+    f = Path(vstore_dir) / VECTORS_FILE
+    if not f.exists():
+        return None
+    return np.load(f, mmap_mode="r" if mmap else None)
+
+def load_tombstones(vstore_dir: Path, n: int) -> np.ndarray:
+    f = Path(vstore_dir) / TOMBSTONES_FILE
+    dead = np.load(f) if f.exists() else np.zeros(0, dtype=bool)
+    if len(dead) < n:
+        dead = np.concatenate([dead, np.zeros(n - len(dead), dtype=bool)])
+    return dead[:n].astype(bool)
+
+def save_tombstones(vstore_dir: Path, dead: np.ndarray):
+    f = Path(vstore_dir) / TOMBSTONES_FILE
+    tmp = f.with_name(f.stem + ".tmp.npy")
+    np.save(tmp, np.asarray(dead, dtype=bool))
+    os.replace(tmp, f)
+
+def save_vectors(vstore_dir: Path, vecs: np.ndarray):
+    f = Path(vstore_dir) / VECTORS_FILE
+    tmp = f.with_name(f.stem + ".tmp.npy")
+    np.save(tmp, np.ascontiguousarray(vecs, dtype="float32"))
+    os.replace(tmp, f)
@@ -1,15 +1,135 @@
+# backend/utils/logger.py
+"""
+로깅
+  LOG_MODE=queue(기본): 로거는 기록을 bounded 큐에 넣기만 하고, 프로세스(PID)당 writer 스레드 하나가
+                        파일·콘솔에 쓴다 (디스크 I/O·파일 회전이 요청 스레드에서 일어나지 않음).
+                        큐가 가득 차면 기록을 버리고 rag_log_dropped_total 증가 — 요청은 기다리지 않는다.
+  LOG_MODE=sync:        호출한 스레드에서 바로 기록 (예전 방식)
+  LOG_FORMAT=json(기본): logs/backend.log에 JSON lines — ts, level, logger, msg, request_id, extra 필드
+  LOG_DEBUG_SAMPLE:      DEBUG 기록 중 이 비율만 남김 (요청마다 찍히는 access 로그 등)
+"""
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
-from backend.config.config import LOG_LEVEL, ROOT_DIR
+from backend.config.config import LOG_LEVEL, ROOT_DIR, LOG_MODE, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_DEBUG_SAMPLE
+from backend.utils import metrics
+
+# LogRecord 기본 속성 — 이 밖의 속성(extra=...)은 JSON 필드로 싣는다
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+_lock = threading.Lock()
+_outputs = None
+_pid = None
+_queue = None
+_listener = None
+_queue_handler = None
+_dropped = 0
+_context = None
 
 def _ensure_log_dir() -> Path:
     log_dir = ROOT_DIR / "logs"
     log_dir.mkdir(parents=True, exist_ok=True)
     return log_dir
 
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        out = {"ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+               "level": record.levelname, "logger": record.name, "msg": record.getMessage()}
+        if getattr(record, "request_id", None):
+            out["request_id"] = record.request_id
+        for k, v in record.__dict__.items():
+            if k not in _RESERVED and not k.startswith("_"):
+                out[k] = v
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+class _Context(logging.Filter):
+    """호출한 스레드에서: 현재 요청 id를 붙이고 DEBUG 기록은 LOG_DEBUG_SAMPLE 비율로 샘플링"""
+    def filter(self, record):
+        if record.levelno <= logging.DEBUG and LOG_DEBUG_SAMPLE < 1.0 and random.random() >= LOG_DEBUG_SAMPLE:
+            return False
+        if not hasattr(record, "request_id"):
+            record.request_id = metrics.request_id()
+        return True
+
+class _DropQueueHandler(QueueHandler):
+    """이 프로세스의 큐에 put_nowait — 가득 차면 버리고 센다"""
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    def prepare(self, record):
+        # 메시지·예외는 여기서 문자열로 고정 (args가 나중에 바뀌어도 기록은 호출 시점 그대로)
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        global _dropped
+        try:
+            _writer_queue().put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+            metrics.inc("rag_log_dropped_total")
+
+class _Writer(QueueListener):
+    def enqueue_sentinel(self):
+        # 종료 신호는 큐가 가득 차 있어도 넣는다 (writer가 비우는 동안 대기)
+        self.queue.put(self._sentinel)
+
+def _make_outputs(level) -> list:
+    file_handler = RotatingFileHandler(_ensure_log_dir() / "backend.log", maxBytes=5*1024*1024, backupCount=3, encoding="utf-8")
+    file_handler.setLevel(level)
+    if LOG_FORMAT == "json":
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s %(name)s: %(message)s"))
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setLevel(level)
+    stream_handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+    return [file_handler, stream_handler]
+
+def _stop(pid: int):
+    """종료 시 큐에 남은 기록을 마저 쓴다 (이 프로세스가 연 writer만)"""
+    if _pid == pid and _listener is not None:
+        _listener.stop()
+
+def _writer_queue() -> queue.Queue:
+    """이 프로세스의 큐 + writer 스레드 (fork된 워커는 부모 스레드를 물려받지 못하므로 PID별로 새로 시작)"""
+    global _pid, _queue, _listener
+    if _pid == os.getpid():
+        return _queue
+    with _lock:
+        if _pid != os.getpid():
+            _queue = queue.Queue(LOG_QUEUE_SIZE)
+            _listener = _Writer(_queue, *_outputs, respect_handler_level=True)
+            _listener.start()
+            _pid = os.getpid()
+            atexit.register(_stop, _pid)
+    return _queue
+
+def dropped() -> int:
+    """이 프로세스에서 큐가 가득 차 버린 기록 수"""
+    return _dropped
+
 def get_logger(name: str) -> logging.Logger:
+    global _outputs, _queue_handler, _context
     logger = logging.getLogger(name)
     if logger.handlers:
         return logger
@@ -17,17 +137,17 @@ def get_logger(name: str) -> logging.Logger:
     level = getattr(logging, LOG_LEVEL.upper(), logging.INFO)
     logger.setLevel(level)
 
-    log_dir = _ensure_log_dir()
-    file_handler = RotatingFileHandler(log_dir / "backend.log", maxBytes=5*1024*1024, backupCount=3, encoding="utf-8")
-    file_handler.setLevel(level)
-    file_fmt = logging.Formatter("[%(asctime)s] %(levelname)s %(name)s: %(message)s")
-    file_handler.setFormatter(file_fmt)
-
-    stream_handler = logging.StreamHandler()
-    stream_handler.setLevel(level)
-    stream_fmt = logging.Formatter("%(levelname)s: %(message)s")
-    stream_handler.setFormatter(stream_fmt)
+    with _lock:
+        if _outputs is None:
+            _outputs = _make_outputs(level)
+            _context = _Context()
+            if LOG_MODE == "queue":
+                _queue_handler = _DropQueueHandler()
 
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
+    logger.addFilter(_context)
+    if _queue_handler is not None:
+        logger.addHandler(_queue_handler)
+    else:
+        for h in _outputs:
+            logger.addHandler(h)
     return logger
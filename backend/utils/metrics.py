@@ -0,0 +1,244 @@
+# backend/utils/metrics.py
+"""
+프로세스 내 지표 (외부 의존성 없음) + Prometheus 텍스트 포맷 출력
+  - inc(name, v, **labels)       카운터
+  - observe(name, v, **labels)   히스토그램 (고정 버킷, 초 단위)
+  - span(stage)                  with 블록 시간 → rag_stage_seconds{stage=...} + 요청별 타이밍 목록
+  - register_collector(fn)       출력 시점에 값을 채우는 콜백 (캐시 적중 수 등)
+  - begin_request / request_id   요청 id (X-Request-ID 또는 새로 생성) — 로그 기록의 request_id 필드
+gunicorn 워커가 여럿이면 METRICS_DIR에 워커별 스냅샷을 주기적으로 쓰고, /metrics는 전부 합쳐서 보여준다.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from backend.config.config import METRICS_DIR, METRICS_FLUSH_SECONDS
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    "rag_stage_seconds": ("histogram", "Latency of each request stage"),
+    "rag_request_seconds": ("histogram", "End-to-end request latency by endpoint"),
+    "rag_requests_total": ("counter", "Requests by endpoint and status"),
+    "rag_index_load_seconds": ("histogram", "Time to load an index generation"),
+    "rag_index_loads_total": ("counter", "Index generation loads by result"),
+    "rag_startup_seconds": ("histogram", "Worker warm-up time by phase"),
+    "rag_shard_errors_total": ("counter", "Failed remote shard searches by shard"),
+    "rag_log_dropped_total": ("counter", "Log records dropped because the log queue was full"),
+    "llm_tokens_total": ("counter", "Upstream OpenAI tokens by call and kind"),
+    "cache_events_total": ("counter", "Cache lookups by cache and result"),
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> float
+_hists = {}       # (name, labels) -> [bucket counts..., +Inf count, sum]
+_collectors = []
+_timings = contextvars.ContextVar("request_timings", default=None)
+_started = contextvars.ContextVar("request_started", default=None)
+_request_id = contextvars.ContextVar("request_id", default=None)
+_flusher_pid = None
+
+def _key(name: str, labels: dict):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def inc(name: str, value: float = 1.0, **labels):
+    k = _key(name, labels)
+    with _lock:
+        _counters[k] = _counters.get(k, 0.0) + value
+    _ensure_flusher()
+
+def observe(name: str, value: float, **labels):
+    k = _key(name, labels)
+    with _lock:
+        h = _hists.get(k)
+        if h is None:
+            h = _hists[k] = [0] * (len(BUCKETS) + 1) + [0.0]
+        for i, b in enumerate(BUCKETS):
+            if value <= b:
+                h[i] += 1
+                break
+        else:
+            h[len(BUCKETS)] += 1
+        h[-1] += value
+    _ensure_flusher()
+
+@contextmanager
+def span(stage: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        observe("rag_stage_seconds", dt, stage=stage)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((stage, dt))
+
+def begin_request(request_id: str | None = None) -> str:
+    """요청 시작: 이 요청(컨텍스트)의 span 타이밍을 모을 목록을 만들고 요청 id를 정한다"""
+    _timings.set([])
+    _started.set(time.perf_counter())
+    rid = (request_id or "")[:64] or uuid.uuid4().hex[:16]
+    _request_id.set(rid)
+    return rid
+
+def request_id() -> str | None:
+    return _request_id.get()
+
+def request_timings() -> list:
+    return _timings.get() or []
+
+def request_seconds() -> float:
+    t0 = _started.get()
+    return time.perf_counter() - t0 if t0 is not None else 0.0
+
+def stage_totals() -> dict:
+    """이 요청의 stage별 합산 초"""
+    total = {}
+    for stage, sdt in request_timings():
+        total[stage] = total.get(stage, 0.0) + sdt
+    return total
+
+def finish_request(endpoint: str, status: int) -> str:
+    """요청 끝: 요청 지표 기록 후 Server-Timing 헤더 값 반환 (stage별 합산 + total, ms)"""
+    dt = request_seconds()
+    observe("rag_request_seconds", dt, endpoint=endpoint)
+    inc("rag_requests_total", endpoint=endpoint, status=status)
+    total = stage_totals()
+    parts = [f"{st.replace('.', '-')};dur={sdt * 1000:.1f}" for st, sdt in total.items()]
+    parts.append(f"total;dur={dt * 1000:.1f}")
+    return ", ".join(parts)
+
+def register_collector(fn):
+    """fn() -> [(name, labels(dict), value)] — 출력/스냅샷 시점에 카운터 값으로 기록"""
+    _collectors.append(fn)
+
+# ── 스냅샷 / 합산 ───────────────────────────────────────────
+def _snapshot() -> dict:
+    with _lock:
+        counters = dict(_counters)
+        hists = {k: list(v) for k, v in _hists.items()}
+    for fn in _collectors:
+        try:
+            for name, labels, value in fn():
+                counters[_key(name, labels)] = float(value)
+        except Exception:
+            pass
+    return {"counters": counters, "hists": hists}
+
+def _to_json(snap: dict) -> str:
+    enc = lambda d: [[n, list(map(list, l)), v] for (n, l), v in d.items()]
+    return json.dumps({"pid": os.getpid(), "counters": enc(snap["counters"]), "hists": enc(snap["hists"])})
+
+def _from_json(text: str) -> dict:
+    data = json.loads(text)
+    dec = lambda rows: {(n, tuple(map(tuple, l))): v for n, l, v in rows}
+    return {"pid": data["pid"], "counters": dec(data["counters"]), "hists": dec(data["hists"])}
+
+def _flush():
+    d = Path(METRICS_DIR)
+    d.mkdir(parents=True, exist_ok=True)
+    f = d / f"worker-{os.getpid()}.json"
+    tmp = f.with_suffix(".tmp")
+    tmp.write_text(_to_json(_snapshot()), encoding="utf-8")
+    os.replace(tmp, f)
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            _flush()
+        except OSError:
+            pass
+
+def _ensure_flusher():
+    global _flusher_pid
+    if not METRICS_DIR or _flusher_pid == os.getpid():
+        return
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+def _after_fork_in_child():
+    # fork 시점에 다른 스레드가 잡고 있던 락이 자식에서 영영 안 풀리는 것을 방지, 값은 자식마다 새로 센다
+    global _lock, _flusher_pid
+    _lock = threading.Lock()
+    _flusher_pid = None
+    _counters.clear()
+    _hists.clear()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _merged() -> dict:
+    """이 프로세스의 현재 값 + (METRICS_DIR) 살아있는 다른 워커들의 마지막 스냅샷"""
+    snaps = [_snapshot()]
+    if METRICS_DIR and Path(METRICS_DIR).is_dir():
+        for f in Path(METRICS_DIR).glob("worker-*.json"):
+            try:
+                s = _from_json(f.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if s["pid"] == os.getpid():
+                continue
+            if not _alive(s["pid"]):
+                f.unlink(missing_ok=True)
+                continue
+            snaps.append(s)
+    counters, hists = {}, {}
+    for s in snaps:
+        for k, v in s["counters"].items():
+            counters[k] = counters.get(k, 0.0) + v
+        for k, v in s["hists"].items():
+            cur = hists.setdefault(k, [0] * len(v))
+            for i, x in enumerate(v):
+                cur[i] += x
+    return {"counters": counters, "hists": hists}
+
+def _fmt_labels(labels, extra=()) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+def render() -> str:
+    """Prometheus text exposition format (0.0.4)"""
+    m = _merged()
+    lines, seen = [], set()
+    def header(name, default_type):
+        if name in seen:
+            return
+        seen.add(name)
+        typ, text = HELP.get(name, (default_type, name))
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {typ}")
+    for (name, labels), v in sorted(m["counters"].items()):
+        header(name, "counter")
+        lines.append(f"{name}{_fmt_labels(labels)} {v:g}")
+    for (name, labels), h in sorted(m["hists"].items()):
+        header(name, "histogram")
+        cum = 0
+        for b, c in zip(BUCKETS, h):
+            cum += c
+            lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', f'{b:g}')])} {cum}")
+        cum += h[len(BUCKETS)]
+        lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', '+Inf')])} {cum}")
+        lines.append(f"{name}_sum{_fmt_labels(labels)} {h[-1]:.6f}")
+        lines.append(f"{name}_count{_fmt_labels(labels)} {cum}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,100 @@
+# bench/corpus.py
+"""
+합성 법률 문서 코퍼스 생성기 (벤치마크용)
+  - 법령/판결문/결정례/해석례 4개 카테고리, 조문·판례번호·금액이 섞인 한국어 문장
+  - 같은 seed면 같은 코퍼스 (결과 비교 가능)
+  - --zip 이면 카테고리별 zip(멤버 = 문서)으로 기록 — 수백만 문서에서도 파일 수가 작다
+
+사용 예:
+  python -m bench.corpus --out /tmp/bench/data/raw --chunks 10000
+"""
+import argparse
+import random
+import zipfile
+from pathlib import Path
+
+CATEGORIES = ("법령", "판결문", "결정례", "해석례")
+
+LAWS = ("담배사업법", "주택임대차보호법", "근로기준법", "개인정보 보호법", "도로교통법", "상가건물 임대차보호법",
+        "민법", "형법", "식품위생법", "건축법", "소득세법", "부가가치세법", "국가계약법", "정보통신망법")
+COURTS = ("대법원", "서울고등법원", "서울중앙지방법원", "부산지방법원", "헌법재판소")
+CASE_KINDS = ("도", "다", "두", "누", "헌마", "헌바", "노", "가합")
+SUBJECTS = ("임차인", "사업자", "근로자", "피고인", "원고", "행정청", "지방자치단체", "소비자", "판매인", "수입업자")
+VERBS = ("위반한 경우", "신고하지 아니한 경우", "허가를 받지 아니한 경우", "계약을 해지한 경우",
+         "손해를 입힌 경우", "보증금을 반환하지 아니한 경우", "자료를 제출하지 아니한 경우")
+PENALTIES = ("{n}만원 이하의 과태료를 부과한다", "{y}년 이하의 징역 또는 {n}천만원 이하의 벌금에 처한다",
+             "영업정지 {m}개월의 처분을 할 수 있다", "시정명령을 할 수 있다", "손해배상 책임을 진다")
+
+# 문서당 평균 청크 수 (MAX_CHARS=1200 기준 대략) — 목표 청크 수로 문서 수를 정한다
+CHUNKS_PER_DOC = 3
+
+def _sentence(rng: random.Random) -> str:
+    law = rng.choice(LAWS)
+    art = rng.randint(1, 150)
+    sub = f"의{rng.randint(2, 9)}" if rng.random() < 0.2 else ""
+    pen = rng.choice(PENALTIES).format(n=rng.randint(1, 99) * 10, y=rng.randint(1, 10), m=rng.randint(1, 6))
+    if rng.random() < 0.3:
+        case = f"{rng.choice(COURTS)} {rng.randint(1990, 2025)}{rng.choice(CASE_KINDS)}{rng.randint(100, 99999)}"
+        return f"{case} 판결은 {law} 제{art}조{sub}에 따라 {rng.choice(SUBJECTS)}가 {rng.choice(VERBS)} {pen}고 판시하였다."
+    return f"{law} 제{art}조{sub}에 따르면 {rng.choice(SUBJECTS)}가 {rng.choice(VERBS)} {pen}."
+
+def document(rng: random.Random, target_chars: int) -> str:
+    paras, size = [], 0
+    while size < target_chars:
+        para = " ".join(_sentence(rng) for _ in range(rng.randint(2, 6)))
+        paras.append(para)
+        size += len(para) + 2
+    return "\n\n".join(paras)
+
+def generate(out: Path, chunks: int, seed: int = 42, as_zip: bool = False) -> dict:
+    """out(= data/raw)에 약 chunks개 청크가 나올 분량의 문서를 기록. 반환: 통계"""
+    rng = random.Random(seed)
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    n_docs = max(1, chunks // CHUNKS_PER_DOC)
+    total_chars = 0
+    zips = {}
+    try:
+        for i in range(n_docs):
+            cat = CATEGORIES[i % len(CATEGORIES)]
+            text = document(rng, rng.randint(2, 2 * CHUNKS_PER_DOC) * 1000)
+            total_chars += len(text)
+            name = f"{cat}_{i:08d}.txt"
+            if as_zip:
+                zf = zips.get(cat)
+                if zf is None:
+                    zf = zips[cat] = zipfile.ZipFile(out / f"VS_{cat}.zip", "w", zipfile.ZIP_DEFLATED)
+                zf.writestr(name, text.encode("utf-8"))
+            else:
+                d = out / cat / f"{i // 10000:04d}"
+                d.mkdir(parents=True, exist_ok=True)
+                (d / name).write_text(text, encoding="utf-8")
+    finally:
+        for zf in zips.values():
+            zf.close()
+    return {"docs": n_docs, "chars": total_chars, "format": "zip" if as_zip else "files"}
+
+def queries(n: int, seed: int = 7) -> list:
+    """벤치 질의 n개 (코퍼스와 같은 어휘)"""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        law, art = rng.choice(LAWS), rng.randint(1, 150)
+        out.append(rng.choice((
+            f"{law} 제{art}조 위반 시 과태료는 얼마인가요?",
+            f"{rng.choice(SUBJECTS)}가 {rng.choice(VERBS)} 어떤 처벌을 받나요?",
+            f"{rng.choice(COURTS)} {rng.randint(1990, 2025)}{rng.choice(CASE_KINDS)}{rng.randint(100, 99999)} 판결 요지",
+        )))
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="합성 법률 코퍼스 생성")
+    ap.add_argument("--out", required=True, help="data/raw 위치")
+    ap.add_argument("--chunks", type=int, default=10000, help="목표 청크 수 (문서 수 ≈ chunks/3)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--zip", action="store_true", help="카테고리별 zip으로 기록")
+    args = ap.parse_args()
+    print(generate(Path(args.out), args.chunks, args.seed, args.zip))
+
+if __name__ == "__main__":
+    main()
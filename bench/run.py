@@ -0,0 +1,269 @@
+# bench/run.py
+"""
+오프라인 end-to-end 벤치마크 (OpenAI 비용/네트워크 지터 없음)
+  1) corpus      합성 코퍼스 생성 (bench/corpus.py)
+  2) preprocess  pipelines.data_preprocess (+ 변경 없는 재실행)
+  3) split       pipelines.text_splitter
+  4) embed       pipelines.embedder_incremental (+ 변경 없는 재실행) — 임베딩은 로컬 스텁
+  5) search      rag_service.search / search_many (bench/search.py)
+  6) api         gunicorn으로 /api/ask-rag 동시 부하
+
+작업 디렉터리(--workdir)에 backend/ pipelines/ bench/ gunicorn.conf.py를 복사해서 돌리므로
+저장소의 data/, vectorstore/는 건드리지 않는다. 결과는 JSON(--out)으로 남기고,
+--baseline을 주면 허용 오차(--tolerance)를 넘게 나빠진 지표를 표시하고 종료 코드 1.
+
+사용 예:
+  python -m bench.run --chunks 10000 --dim 256 --out bench_output.json
+  python -m bench.run --chunks 100000 --stages search,api --baseline bench_output.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import numpy as np
+
+from bench import corpus
+from bench.stub_openai import StubConfig, serve
+
+STAGES = ("corpus", "preprocess", "split", "embed", "search", "api")
+COPY = ("backend", "pipelines", "bench", "gunicorn.conf.py")
+
+def _prepare(workdir: Path, fresh: bool):
+    if fresh and workdir.exists():
+        shutil.rmtree(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    for name in COPY:
+        src, dst = ROOT / name, workdir / name
+        if dst.exists():
+            shutil.rmtree(dst) if dst.is_dir() else dst.unlink()
+        if src.is_dir():
+            shutil.copytree(src, dst, ignore=shutil.ignore_patterns("__pycache__"))
+        else:
+            shutil.copy2(src, dst)
+    (workdir / "logs").mkdir(exist_ok=True)
+
+def _run(workdir: Path, env: dict, name: str, *args) -> float:
+    """python -m <args> 를 workdir에서 실행하고 걸린 시간(초). 출력은 logs/bench-<name>.log"""
+    with open(workdir / "logs" / f"bench-{name}.log", "w", encoding="utf-8") as log:
+        t = time.perf_counter()
+        r = subprocess.run([sys.executable, "-m", *args], cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        dt = time.perf_counter() - t
+    if r.returncode != 0:
+        raise RuntimeError(f"{name} failed (exit {r.returncode}), see {workdir / 'logs' / f'bench-{name}.log'}")
+    return dt
+
+def _current_generation(workdir: Path) -> dict:
+    root = workdir / "vectorstore" / "dev"
+    name = (root / "CURRENT").read_text(encoding="utf-8").strip()
+    return json.loads((root / "generations" / name / "GENERATION.json").read_text(encoding="utf-8"))
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _post(url: str, body: dict, timeout: float = 120):
+    req = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as r:
+        return r.status, r.read()
+
+def _api_load(base: str, qs: list, concurrency: int, top_k: int, mode: str) -> dict:
+    lat, errors, lock = [], 0, threading.Lock()
+    it = iter(qs)
+
+    def worker():
+        nonlocal errors
+        while True:
+            with lock:
+                q = next(it, None)
+            if q is None:
+                return
+            t = time.perf_counter()
+            try:
+                status, _ = _post(f"{base}/api/ask-rag", {"question": q, "top_k": top_k, "mode": mode})
+                ok = status == 200
+            except Exception:
+                ok = False
+            dt = time.perf_counter() - t
+            with lock:
+                lat.append(dt) if ok else None
+                errors += 0 if ok else 1
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    [th.start() for th in threads]
+    [th.join() for th in threads]
+    wall = time.perf_counter() - t0
+    a = np.asarray(lat or [0.0]) * 1000
+    return {"requests": len(qs), "errors": errors, "concurrency": concurrency, "rps": len(lat) / wall,
+            "p50_ms": float(np.percentile(a, 50)), "p95_ms": float(np.percentile(a, 95)),
+            "p99_ms": float(np.percentile(a, 99))}
+
+def _serve_app(workdir: Path, env: dict, serve_mode: str, workers: int):
+    port = _free_port()
+    env = dict(env, GUNICORN_BIND=f"127.0.0.1:{port}", GUNICORN_WORKERS=str(workers), SERVE_MODE=serve_mode)
+    if serve_mode == "async":
+        cmd = [sys.executable, "-m", "uvicorn", "backend.app:app", "--port", str(port), "--workers", str(workers),
+               "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-m", "gunicorn", "backend.app:app"]
+    log = open(workdir / "logs" / "bench-server.log", "w", encoding="utf-8")
+    proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base}/health", timeout=2):
+                return proc, base
+        except Exception:
+            if proc.poll() is not None:
+                raise RuntimeError("server exited during startup, see logs/bench-server.log")
+            time.sleep(0.3)
+    proc.terminate()
+    raise RuntimeError("server did not become healthy")
+
+# ── 결과 비교 ───────────────────────────────────────────────
+def _flatten(d: dict, prefix: str = "") -> dict:
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + "."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = float(v)
+    return out
+
+def _direction(key: str) -> int:
+    """+1: 클수록 좋음, -1: 작을수록 좋음, 0: 비교 안 함"""
+    leaf = key.rsplit(".", 1)[-1]
+    if leaf.endswith(("per_s", "qps", "rps")):
+        return 1
+    if leaf.endswith(("_s", "_ms")):
+        return -1
+    return 0
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    cur, base = _flatten(results), _flatten(baseline)
+    bad = []
+    for k, b in base.items():
+        d = _direction(k)
+        if not d or k not in cur or b <= 0:
+            continue
+        change = (cur[k] - b) / b * d   # 양수 = 개선
+        if change < -tolerance:
+            bad.append({"metric": k, "baseline": b, "current": cur[k], "change": change})
+    return bad
+
+def main():
+    ap = argparse.ArgumentParser(description="오프라인 end-to-end 벤치마크")
+    ap.add_argument("--workdir", default=str(Path(os.getenv("TMPDIR", "/tmp")) / "muncheol-bench"))
+    ap.add_argument("--keep", action="store_true", help="기존 workdir 재사용 (기본: 새로 만듦)")
+    ap.add_argument("--stages", default=",".join(STAGES))
+    ap.add_argument("--chunks", type=int, default=10000, help="목표 청크 수 (10k ~ 10M)")
+    ap.add_argument("--zip", action="store_true", help="원본을 카테고리별 zip으로 생성")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--dim", type=int, default=1536, help="스텁 임베딩 차원")
+    ap.add_argument("--embed-latency-ms", type=float, default=50.0)
+    ap.add_argument("--chat-latency-ms", type=float, default=300.0)
+    ap.add_argument("--token-latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--top-k", type=int, default=5)
+    ap.add_argument("--mode", default="hybrid", help="api 단계 검색 모드")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=400)
+    ap.add_argument("--serve-mode", default="sync", choices=("sync", "async"))
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--out", default="bench_output.json")
+    ap.add_argument("--baseline", help="이전 결과 JSON — 회귀 검사")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="허용 악화 비율")
+    args = ap.parse_args()
+
+    stages = [s for s in args.stages.split(",") if s]
+    workdir = Path(args.workdir)
+    _prepare(workdir, fresh=not args.keep and "corpus" in stages)
+
+    cfg = StubConfig(args.dim, args.embed_latency_ms, args.chat_latency_ms, args.token_latency_ms,
+                     jitter_ms=args.jitter_ms, seed=args.seed)
+    stub = serve(0, cfg)
+    env = dict(os.environ,
+               OPENAI_BASE_URL=f"http://127.0.0.1:{stub.server_address[1]}/v1", OPENAI_API_KEY="bench",
+               EMBED_CACHE_DIR="", ANSWER_CACHE_SIZE="0", METRICS_DIR="", PYTHONUNBUFFERED="1")
+
+    results = {}
+    if "corpus" in stages:
+        t = time.perf_counter()
+        stats = corpus.generate(workdir / "data" / "raw", args.chunks, args.seed, args.zip)
+        results["corpus"] = dict(stats, seconds=time.perf_counter() - t)
+        print(f"corpus: {results['corpus']}")
+    if "preprocess" in stages:
+        s = _run(workdir, env, "preprocess", "pipelines.data_preprocess")
+        noop = _run(workdir, env, "preprocess-noop", "pipelines.data_preprocess")
+        docs = results.get("corpus", {}).get("docs", 0)
+        results["preprocess"] = {"seconds": s, "docs_per_s": docs / s if docs else 0.0, "noop_s": noop}
+        print(f"preprocess: {results['preprocess']}")
+    if "split" in stages:
+        results["split"] = {"seconds": _run(workdir, env, "split", "pipelines.text_splitter")}
+        print(f"split: {results['split']}")
+    if "embed" in stages:
+        s = _run(workdir, env, "embed", "pipelines.embedder_incremental")
+        noop = _run(workdir, env, "embed-noop", "pipelines.embedder_incremental")
+        gen = _current_generation(workdir)
+        results["embed"] = {"seconds": s, "chunks": gen["rows"], "chunks_per_s": gen["rows"] / s, "noop_s": noop,
+                            "index_type": gen.get("index_type"), "stub_requests": dict(cfg.counts)}
+        print(f"embed: {results['embed']}")
+    if "search" in stages:
+        r = subprocess.run([sys.executable, "-m", "bench.search", "--queries", str(args.queries),
+                            "--k", str(args.top_k), "--dim", str(args.dim)],
+                           cwd=workdir, env=env, capture_output=True, text=True)
+        if r.returncode != 0:
+            raise RuntimeError(f"search bench failed:\n{r.stderr[-2000:]}")
+        results["search"] = json.loads(r.stdout.strip().splitlines()[-1])
+        print(f"search: {results['search']}")
+    if "api" in stages:
+        proc, base = _serve_app(workdir, env, args.serve_mode, args.workers)
+        try:
+            qs = corpus.queries(args.requests, seed=args.seed + 1)
+            _api_load(base, qs[:args.concurrency], args.concurrency, args.top_k, args.mode)  # 워밍업
+            results["api"] = dict(_api_load(base, qs, args.concurrency, args.top_k, args.mode),
+                                  serve_mode=args.serve_mode, workers=args.workers, mode=args.mode)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+        print(f"api: {results['api']}")
+    stub.shutdown()
+
+    rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    report = {
+        "meta": {"git": rev or None, "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "args": vars(args)},
+        "results": results,
+    }
+    code = 0
+    if args.baseline:
+        base = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        report["regressions"] = compare(results, base.get("results", {}), args.tolerance)
+        for r in report["regressions"]:
+            print(f"[REGRESSION] {r['metric']}: {r['baseline']:.4g} → {r['current']:.4g} ({r['change']:+.1%})")
+        code = 1 if report["regressions"] else 0
+    Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"📄 {args.out}")
+    return code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+# bench/search.py
+"""
+rag_service.search / search_many 지연 측정 (bench.run이 벤치 작업 디렉터리 안에서 실행)
+질의 벡터는 스텁과 같은 결정적 벡터를 직접 만들어 네트워크를 빼고 검색만 잰다.
+결과는 JSON 한 줄로 stdout에 출력.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import numpy as np
+
+from bench.corpus import queries as make_queries
+from bench.stub_openai import stub_vector
+
+def pct(lat) -> dict:
+    a = np.asarray(lat) * 1000
+    return {"p50_ms": float(np.percentile(a, 50)), "p95_ms": float(np.percentile(a, 95)),
+            "p99_ms": float(np.percentile(a, 99)), "mean_ms": float(a.mean())}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--batch", type=int, default=64)
+    ap.add_argument("--dim", type=int, default=1536)
+    args = ap.parse_args()
+
+    from backend.services import rag_service
+
+    t0 = time.perf_counter()
+    g = rag_service.current()
+    out = {"load_s": time.perf_counter() - t0, "rows": g.rows, "ntotal": g.ntotal, "shards": len(g.shards)}
+    qs = make_queries(args.queries)
+    Q = np.stack([stub_vector(q, args.dim) for q in qs])
+
+    for mode in rag_service.SEARCH_MODES:
+        rag_service.search(Q[0], args.k, query=qs[0], mode=mode)  # 워밍업
+        lat = []
+        for q, v in zip(qs, Q):
+            t = time.perf_counter()
+            rag_service.search(v, args.k, query=q, mode=mode)
+            lat.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        for s in range(0, len(qs), args.batch):
+            rag_service.search_many(Q[s:s + args.batch], args.k, qs[s:s + args.batch], mode)
+        batch_s = time.perf_counter() - t
+        out[mode] = dict(pct(lat), qps=len(qs) / sum(lat), batch_qps=len(qs) / batch_s)
+
+    print(json.dumps(out))
+
+if __name__ == "__main__":
+    main()
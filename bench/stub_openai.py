@@ -0,0 +1,157 @@
+# bench/stub_openai.py
+"""
+OpenAI 호환 로컬 스텁 (embeddings / chat.completions, 스트리밍 포함)
+  - 임베딩: 입력 텍스트 sha1을 seed로 한 정규화 가우시안 벡터 → 같은 텍스트는 항상 같은 벡터
+  - 지연: 요청당 고정 지연(ms) + 선택적 지터, chat 스트림은 토큰 간 지연
+  - usage 필드 포함 (metrics의 llm_tokens_total 확인용)
+
+사용 예:
+  python -m bench.stub_openai --port 8799 --dim 1536 --embed-latency-ms 80 --chat-latency-ms 400
+  OPENAI_BASE_URL=http://127.0.0.1:8799/v1 OPENAI_API_KEY=x python -m backend.app
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+def stub_vector(text: str, dim: int) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little")
+    v = np.random.default_rng(seed).standard_normal(dim).astype("float32")
+    return v / np.linalg.norm(v)
+
+class StubConfig:
+    def __init__(self, dim=1536, embed_latency_ms=0.0, chat_latency_ms=0.0, token_latency_ms=0.0,
+                 chat_tokens=64, jitter_ms=0.0, seed=0):
+        self.dim = dim
+        self.embed_latency_ms = embed_latency_ms
+        self.chat_latency_ms = chat_latency_ms
+        self.token_latency_ms = token_latency_ms
+        self.chat_tokens = chat_tokens
+        self.jitter_ms = jitter_ms
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"embeddings": 0, "embedding_inputs": 0, "chat": 0}
+
+    def sleep(self, base_ms: float):
+        with self.lock:
+            j = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        if base_ms + j > 0:
+            time.sleep((base_ms + j) / 1000.0)
+
+def _handler(cfg: StubConfig):
+    class H(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *a):
+            pass
+
+        def _json(self, obj, code=200):
+            b = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(b)))
+            self.end_headers()
+            self.wfile.write(b)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                with cfg.lock:
+                    return self._json(dict(cfg.counts))
+            if self.path.rstrip("/").endswith("/models"):
+                return self._json({"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "bench"}]})
+            self._json({"error": {"message": "not found"}}, 404)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path.endswith("/embeddings"):
+                return self._embeddings(body)
+            if self.path.endswith("/chat/completions"):
+                return self._chat(body)
+            self._json({"error": {"message": f"unknown path {self.path}"}}, 404)
+
+        def _embeddings(self, body):
+            inp = body.get("input")
+            inp = [inp] if isinstance(inp, str) else list(inp)
+            with cfg.lock:
+                cfg.counts["embeddings"] += 1
+                cfg.counts["embedding_inputs"] += len(inp)
+            cfg.sleep(cfg.embed_latency_ms)
+            b64 = body.get("encoding_format") == "base64"
+            data = []
+            for i, t in enumerate(inp):
+                v = stub_vector(t, cfg.dim)
+                emb = base64.b64encode(v.tobytes()).decode("ascii") if b64 else v.tolist()
+                data.append({"object": "embedding", "index": i, "embedding": emb})
+            toks = sum(max(1, len(t.encode("utf-8")) // 3) for t in inp)
+            self._json({"object": "list", "model": body.get("model"), "data": data,
+                        "usage": {"prompt_tokens": toks, "total_tokens": toks}})
+
+        def _chat(self, body):
+            with cfg.lock:
+                cfg.counts["chat"] += 1
+            prompt_toks = sum(max(1, len(str(m.get("content", "")).encode("utf-8")) // 3) for m in body.get("messages", []))
+            words = [f" 답변{i}" for i in range(cfg.chat_tokens)]
+            usage = {"prompt_tokens": prompt_toks, "completion_tokens": len(words),
+                     "total_tokens": prompt_toks + len(words)}
+            cfg.sleep(cfg.chat_latency_ms)
+            if not body.get("stream"):
+                for _ in words:
+                    cfg.sleep(cfg.token_latency_ms)
+                return self._json({
+                    "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": body.get("model"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": "".join(words)}}],
+                    "usage": usage,
+                })
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            base = {"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": body.get("model")}
+            for w in words:
+                chunk = dict(base, choices=[{"index": 0, "delta": {"content": w}, "finish_reason": None}])
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                cfg.sleep(cfg.token_latency_ms)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                self.wfile.write(f"data: {json.dumps(dict(base, choices=[], usage=usage))}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return H
+
+def serve(port: int, cfg: StubConfig) -> ThreadingHTTPServer:
+    """백그라운드 스레드로 스텁 서버 시작 (port=0이면 빈 포트)"""
+    srv = ThreadingHTTPServer(("127.0.0.1", port), _handler(cfg))
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, name="stub-openai", daemon=True).start()
+    return srv
+
+def main():
+    ap = argparse.ArgumentParser(description="OpenAI 호환 로컬 스텁")
+    ap.add_argument("--port", type=int, default=8799)
+    ap.add_argument("--dim", type=int, default=1536)
+    ap.add_argument("--embed-latency-ms", type=float, default=0.0)
+    ap.add_argument("--chat-latency-ms", type=float, default=0.0, help="첫 토큰까지 지연")
+    ap.add_argument("--token-latency-ms", type=float, default=0.0, help="토큰 간 지연")
+    ap.add_argument("--chat-tokens", type=int, default=64)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    args = ap.parse_args()
+    cfg = StubConfig(args.dim, args.embed_latency_ms, args.chat_latency_ms, args.token_latency_ms,
+                     args.chat_tokens, args.jitter_ms)
+    srv = serve(args.port, cfg)
+    print(f"stub OpenAI on http://127.0.0.1:{srv.server_address[1]}/v1 (dim={args.dim})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# gunicorn.conf.py — `gunicorn backend.app:app` 실행 시 작업 디렉터리에서 자동으로 읽힘
+# SSE 스트림(/api/ask-rag/stream)은 응답 내내 워커 하나를 붙잡으므로
+# sync 워커 대신 gthread: 워커당 GUNICORN_THREADS개의 연결을 동시에 처리한다.
+import os
+import tempfile
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+
+# 스트림 최대 길이(STREAM_MAX_SECONDS)보다 넉넉하게 — gthread에서는 워커 heartbeat 기준
+timeout = int(os.getenv("GUNICORN_TIMEOUT", str(int(float(os.getenv("STREAM_MAX_SECONDS", "120"))) + 30)))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# 워커별 지표 스냅샷 위치 → /metrics가 어느 워커로 가든 전체 합산 (backend/utils/metrics.py)
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), f"muncheol-metrics-{bind.rsplit(':', 1)[-1]}"))
+
+# 워밍업(backend/services/warmup.py)은 워커마다 post_fork에서 — 앱 생성 시(master)에는 시작하지 않는다
+os.environ.setdefault("WARMUP_DEFER", "1")
+
+# master가 앱을 import하고 현재 인덱스 세대를 연 뒤 fork → 워커들이 mmap 페이지를 공유
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    from backend.services import rag_service
+    try:
+        g = rag_service.preload()
+        server.log.info(f"preloaded index generation {g.name} ({g.ntotal} vectors, {len(g.shards)} shard(s))")
+    except FileNotFoundError as e:
+        server.log.warning(f"index preload skipped: {e}")
+
+def post_fork(server, worker):
+    # 세대 교체 감시 스레드·워밍업은 워커마다 (fork는 스레드를 복제하지 않음)
+    from backend.services import rag_service, warmup
+    rag_service.start_loader()
+    warmup.start()
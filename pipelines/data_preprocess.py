@@ -1,4 +1,5 @@
 import os, json, re, zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import sys
 
@@ -19,8 +20,12 @@ CATEGORY_KEYWORDS = {
     "법령":   ["법령"],
 }
 
-# 이미 폴더/파일이 있으면 덮어쓸지 여부 (환경변수로 제어)
-FORCE_UNZIP = os.getenv("FORCE_UNZIP", "0") == "1"
+# 매니페스트를 무시하고 전부 다시 정제할지 (FORCE_UNZIP은 구버전 호환 이름)
+FORCE_REPROCESS = os.getenv("FORCE_REPROCESS", os.getenv("FORCE_UNZIP", "0")) == "1"
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", "0")) or None
+
+# 원본 단위별 (signature, 출력 경로) 기록 → 바뀐 파일/zip 멤버만 재처리
+PREPROCESS_MANIFEST = CLEANED_DIR / ".preprocess_manifest.json"
 
 def _detect_category(name: str) -> str:
     n = name.lower()
@@ -43,82 +48,165 @@ def _normalize_zip_filenames():
             except Exception:
                 pass
 
-def _auto_unzip_grouped():
+def _member_name(info: zipfile.ZipInfo) -> str:
+    """UTF-8 플래그 없는 zip(윈도우 압축기)은 cp437로 잘못 풀린 한글 이름을 cp949로 복원"""
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode("cp437").decode("cp949")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+def _scan_units():
     """
-    data/raw/*.zip → zip 이름으로 카테고리 판별 후
-    data/raw/<카테고리>/ 로 자동 해제.
-    이미 대상 폴더에 내용물이 있으면 기본은 스킵(FORCE_UNZIP=1이면 덮어씀).
+    처리 단위 목록: (key, category, kind, src, member, signature, out)
+      - 일반 파일 : data/raw/<카테고리>/** , signature = (size, mtime_ns)
+      - zip 멤버  : data/raw/*.zip 안의 각 파일(디스크에 풀지 않음), signature = (crc32, size)
+    재배포된 zip도 멤버별 CRC로 바뀐 것만 다시 처리한다.
+    zip 멤버를 먼저 나열한다 — 예전에 풀어 둔 파일이 카테고리 폴더에 남아 있어도 같은 출력이면 zip이 우선.
     """
-    _normalize_zip_filenames()
-
-    count = 0
+    units = []
     for z in sorted(RAW_DIR.glob("*.zip")):
-        base = z.stem
-        cat = _detect_category(base)
-        out_dir = RAW_DIR / cat
-        out_dir.mkdir(parents=True, exist_ok=True)
-
-        # 이미 풀려 있으면 스킵(강제 모드 제외)
-        if not FORCE_UNZIP and any(out_dir.iterdir()):
-            continue
-
+        cat = _detect_category(z.stem)
         try:
-            with zipfile.ZipFile(z, "r") as zip_ref:
-                zip_ref.extractall(out_dir)
-            print(f"✅ unzip: {z.name} -> {out_dir}")
-            count += 1
-        except Exception as e:
-            print(f"[warn] unzip 실패: {z.name} ({e})")
-    if count == 0:
-        print("[info] 자동 해제 대상 zip 없음 또는 이미 해제됨.")
+            with zipfile.ZipFile(z, "r") as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+                    name = _member_name(info)
+                    units.append((f"zip:{z.name}!{name}", cat, "zip", str(z), info.filename,
+                                  [info.CRC, info.file_size], str(_out_path(cat, name))))
+        except zipfile.BadZipFile as e:
+            print(f"[warn] zip 읽기 실패: {z.name} ({e})")
+    for cat_dir in sorted(p for p in RAW_DIR.iterdir() if p.is_dir()):
+        for fp in sorted(cat_dir.rglob("*")):
+            if fp.is_file():
+                st = fp.stat()
+                units.append((f"file:{fp.relative_to(RAW_DIR).as_posix()}", cat_dir.name, "file",
+                              str(fp), None, [st.st_size, st.st_mtime_ns], str(_out_path(cat_dir.name, fp.name))))
+    return units
+
+def _out_path(cat: str, name: str) -> Path:
+    return CLEANED_DIR / cat / f"{Path(name).stem}.txt"
 
 def _clean_text(s: str) -> str:
     s = s.replace("\r", "")
     s = re.sub(r"\n{3,}", "\n\n", s)
     return s.strip()
 
-def _extract_text_from_any(path: Path) -> str:
+def _extract_text(name: str, raw: bytes) -> str:
     # 텍스트/마크다운/JSON/CSV 단순화 추출
-    if path.suffix.lower() in [".txt", ".md"]:
-        return path.read_text(encoding="utf-8", errors="ignore")
-    elif path.suffix.lower() in [".json", ".csv"]:
+    text = raw.decode("utf-8", errors="ignore")
+    if Path(name).suffix.lower() in [".json", ".csv"]:
         try:
-            return json.dumps(
-                json.loads(path.read_text(encoding="utf-8", errors="ignore")),
-                ensure_ascii=False, indent=2
-            )
+            return json.dumps(json.loads(text), ensure_ascii=False, indent=2)
         except Exception:
-            return path.read_text(encoding="utf-8", errors="ignore")
-    else:
-        # 기타 확장자는 일단 텍스트로 시도
-        return path.read_text(encoding="utf-8", errors="ignore")
+            return text
+    # .txt/.md 및 기타 확장자는 텍스트 그대로
+    return text
+
+def _extract_text_from_any(path: Path) -> str:
+    return _extract_text(path.name, Path(path).read_bytes())
+
+# 워커 프로세스별로 열린 zip을 재사용
+_open_zips = {}
+
+def _close_zips():
+    for zf in _open_zips.values():
+        zf.close()
+    _open_zips.clear()
+
+def _process_unit(unit):
+    key, cat, kind, src, member, _sig, out = unit
+    try:
+        if kind == "zip":
+            zf = _open_zips.get(src)
+            if zf is None:
+                zf = _open_zips[src] = zipfile.ZipFile(src, "r")
+            raw = zf.read(member)
+            name = member
+        else:
+            raw = Path(src).read_bytes()
+            name = src
+        out = Path(out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(_clean_text(_extract_text(name, raw)), encoding="utf-8")
+        return key, str(out), None
+    except Exception as e:
+        return key, None, f"{e}"
+
+def _load_manifest() -> dict:
+    try:
+        return json.loads(PREPROCESS_MANIFEST.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(entries: dict):
+    tmp = PREPROCESS_MANIFEST.with_suffix(".tmp")
+    tmp.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, PREPROCESS_MANIFEST)
 
 def run():
     ensure_dirs()
+    _normalize_zip_filenames()
 
-    # 0) ZIP 자동 해제 (카테고리 매핑)
-    _auto_unzip_grouped()
-
-    # 1) 카테고리 디렉터리 스캔
-    cats = [p for p in RAW_DIR.iterdir() if p.is_dir()]
-    if not cats:
-        print(f"[warn] {RAW_DIR} 아래에 카테고리 폴더를 만들어 원본을 넣어주세요.")
+    # 1) 처리 단위 스캔 (카테고리 폴더 파일 + zip 멤버)
+    units = _scan_units()
+    if not units:
+        print(f"[warn] {RAW_DIR} 아래에 카테고리 폴더나 zip을 넣어주세요.")
         return
 
-    # 2) 파일별 정제 텍스트 생성 → data/cleaned/<카테고리>/*.txt
-    for cat_dir in cats:
-        out_dir = CLEANED_DIR / cat_dir.name
-        out_dir.mkdir(parents=True, exist_ok=True)
-        for fp in cat_dir.rglob("*"):
-            if not fp.is_file():
-                continue
+    # 2) 매니페스트와 비교해 바뀐 것만 선별 (출력 경로가 겹치면 먼저 나온 단위 = zip 멤버 우선)
+    manifest = {} if FORCE_REPROCESS else _load_manifest()
+    todo, seen_out, keep = [], set(), {}
+    for u in units:
+        key, sig, out = u[0], u[5], u[6]
+        if out in seen_out:
+            continue
+        seen_out.add(out)
+        prev = manifest.get(key)
+        if prev and prev["sig"] == sig and prev["out"] == out and Path(out).exists():
+            keep[key] = prev
+        else:
+            todo.append(u)
+
+    # 3) 사라진 원본의 정제 결과 삭제
+    removed = 0
+    for key, prev in manifest.items():
+        if key not in keep and prev["out"] not in seen_out:
             try:
-                txt = _extract_text_from_any(fp)
-                (out_dir / f"{fp.stem}.txt").write_text(_clean_text(txt), encoding="utf-8")
-            except Exception as e:
-                print("[skip]", fp, e)
+                Path(prev["out"]).unlink()
+                removed += 1
+            except OSError:
+                pass
 
-    print("✅ cleaned 생성:", CLEANED_DIR)
+    print(f"[info] 원본 {len(units)}개 중 변경/신규 {len(todo)}개 처리, {len(keep)}개 유지, 삭제 {removed}개")
+
+    # 4) 정제 → data/cleaned/<카테고리>/*.txt (프로세스 풀)
+    sigs = {u[0]: u[5] for u in todo}
+    failed = 0
+    if todo:
+        if len(todo) < 64 or PREPROCESS_WORKERS == 1:
+            results = map(_process_unit, todo)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=PREPROCESS_WORKERS)
+            results = pool.map(_process_unit, todo, chunksize=64)
+        try:
+            for key, out, err in results:
+                if err is not None:
+                    print("[skip]", key, err)
+                    failed += 1
+                    continue
+                keep[key] = {"sig": sigs[key], "out": out}
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            else:
+                _close_zips()  # 직렬 경로는 이 프로세스에서 zip을 열었다
+
+    _save_manifest(keep)
+    print(f"✅ cleaned 생성: {CLEANED_DIR} (실패 {failed}개)")
 
 if __name__ == "__main__":
     print("📂 data_preprocess start")
@@ -0,0 +1,125 @@
+"""
+동시·레이트리밋 인지 임베딩 실행기 (ingest 전용)
+
+  - 토큰 예산 기반 배치: EMBED_BATCH_TOKENS / EMBED_BATCH_ITEMS 중 먼저 닿는 쪽에서 자름
+  - 스레드 풀로 EMBED_CONCURRENCY개 요청 동시 진행
+  - 429/5xx/연결 오류: 지수 백오프 + full jitter, Retry-After(-ms) 헤더 우선
+    429를 받으면 모든 워커가 같은 시각까지 잠시 멈춘다(공유 cooldown)
+  - 결과는 입력 순서대로 재조립
+  - 진행률(items/s, tokens/s) 표시 및 최종 리포트
+
+테스트: OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 로 로컬 스텁을 가리키면 그대로 동작.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import openai
+from tqdm import tqdm
+
+from backend.config.config import EMBED_MODEL, EMBED_CONCURRENCY, EMBED_BATCH_TOKENS, EMBED_BATCH_ITEMS
+from pipelines.tokens import count_tokens
+
+RETRYABLE = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+def make_batches(token_counts, max_tokens=EMBED_BATCH_TOKENS, max_items=EMBED_BATCH_ITEMS):
+    """[(start, end), ...] — 연속 구간으로 잘라 순서 재조립을 단순하게 유지"""
+    out, start, acc = [], 0, 0
+    for i, t in enumerate(token_counts):
+        if i > start and (acc + t > max_tokens or i - start >= max_items):
+            out.append((start, i))
+            start, acc = i, 0
+        acc += t
+    if start < len(token_counts):
+        out.append((start, len(token_counts)))
+    return out
+
+def _retry_after(err) -> float | None:
+    resp = getattr(err, "response", None)
+    if resp is None:
+        return None
+    h = resp.headers
+    try:
+        if h.get("retry-after-ms"):
+            return float(h["retry-after-ms"]) / 1000.0
+        if h.get("retry-after"):
+            return float(h["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+class EmbedEngine:
+    def __init__(self, client, model=EMBED_MODEL, concurrency=EMBED_CONCURRENCY,
+                 max_batch_tokens=EMBED_BATCH_TOKENS, max_batch_items=EMBED_BATCH_ITEMS,
+                 max_retries=8, base_delay=1.0, max_delay=60.0):
+        # SDK 자체 재시도는 끄고 여기서 일원화
+        self.client = client.with_options(max_retries=0)
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_items = max_batch_items
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def _wait_cooldown(self):
+        while True:
+            with self._lock:
+                wait = self._cooldown_until - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def _request(self, texts):
+        for attempt in range(self.max_retries + 1):
+            self._wait_cooldown()
+            try:
+                res = self.client.embeddings.create(model=self.model, input=texts)
+                return np.array([d.embedding for d in res.data], dtype="float32"), attempt
+            except RETRYABLE as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                ra = _retry_after(e)
+                if ra is not None:
+                    delay = max(delay, ra)
+                if isinstance(e, openai.RateLimitError):
+                    with self._lock:
+                        self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+                time.sleep(delay)
+
+    def embed(self, texts, desc="embed") -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype="float32")
+        tokens = [count_tokens(t) for t in texts]
+        batches = make_batches(tokens, self.max_batch_tokens, self.max_batch_items)
+        parts = [None] * len(batches)
+        done_items = done_tokens = retries = 0
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as ex, \
+                tqdm(total=len(texts), desc=desc, unit="it") as bar:
+            futs = {ex.submit(self._request, texts[s:e]): (b, s, e) for b, (s, e) in enumerate(batches)}
+            for fut in as_completed(futs):
+                b, s, e = futs[fut]
+                parts[b], r = fut.result()
+                retries += r
+                done_items += e - s
+                done_tokens += sum(tokens[s:e])
+                el = max(time.perf_counter() - t0, 1e-9)
+                bar.update(e - s)
+                bar.set_postfix_str(f"{done_items / el:,.0f} it/s, {done_tokens / el:,.0f} tok/s")
+        el = time.perf_counter() - t0
+        self.stats = {
+            "items": len(texts), "tokens": sum(tokens), "batches": len(batches), "retries": retries,
+            "seconds": el, "items_per_s": len(texts) / el if el else 0.0,
+            "tokens_per_s": sum(tokens) / el if el else 0.0,
+        }
+        print(f"📈 임베딩 {len(texts):,}개 / {sum(tokens):,}토큰, {len(batches)}배치, 재시도 {retries}회, "
+              f"{el:.1f}s ({self.stats['items_per_s']:,.0f} it/s, {self.stats['tokens_per_s']:,.0f} tok/s)")
+        return np.concatenate(parts)
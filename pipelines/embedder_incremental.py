@@ -6,115 +6,398 @@ if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 
 from backend.config.config import (
-    ROOT_DIR, DATA_DIR, RAW_DIR, CLEANED_DIR, CHUNKS_DIR, VSTORE_DIR, EMBED_MODEL
+    ROOT_DIR, DATA_DIR, RAW_DIR, CLEANED_DIR, CHUNKS_DIR, VSTORE_DIR, VSTORE_ROOT, EMBED_MODEL,
+    COMPACT_DEAD_FRACTION, VECTOR_CACHE, BM25_INDEX, VSTORE_KEEP_GENERATIONS, VSTORE_SHARDS,
 )
 
-import os, json
+import os, json, shutil
 import numpy as np, faiss
 from pathlib import Path
 from tqdm import tqdm
 from openai import OpenAI
 from dotenv import load_dotenv
 
-from pipelines.utils_hash import file_sha1
+from pipelines.utils_hash import HashManifest
+from pipelines.embed_engine import EmbedEngine
+from pipelines.vector_cache import VectorCache, text_key
+from pipelines.text_splitter import shard_items, read_shard_texts, INDEX_SUFFIX
+from backend.store.bm25 import build_bm25
+from backend.store.chunk_store import write_chunks, ChunkStore
+from backend.store.generations import new_staging, publish, prune, read_manifest, write_lock, current_dir
+from backend.store.shards import SHARDS_DIR, shard_name, shard_of, shard_dirs, link_tree
+from backend.store.meta_store import write_metas, open_metas, metas_exist
+from backend.store.vector_index import (
+    build_index, default_params, read_params, write_params, load_vectors, save_vectors,
+    is_id_mapped, remove_rows, load_tombstones, save_tombstones, PARAMS_FILE, VECTORS_FILE,
+)
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+_engine = EmbedEngine(client)
 
-VSTORE_INDEX = VSTORE_DIR / "faiss_index.idx"
-VSTORE_META  = VSTORE_DIR / "metadatas.json"
-
-def _retry_embed(texts, model, attempts=5):
-    out = []
-    i = 0
-    while i < len(texts):
-        batch = texts[i:i+64]
-        for t in range(attempts):
-            try:
-                res = client.embeddings.create(model=model, input=batch)
-                out.extend([d.embedding for d in res.data])
-                break
-            except Exception:
-                if t == attempts - 1:
-                    raise
-        i += 64
-    return np.array(out, dtype="float32")
-
-def _atomic_write(path: Path, content: str):
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(content, encoding="utf-8")
-    os.replace(tmp, path)
-
-def _atomic_write_index(index, path: Path):
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    faiss.write_index(index, str(tmp))
-    os.replace(tmp, path)
+# 읽기: 현재 세대(VSTORE_DIR, run()이 잠금을 얻은 뒤 다시 읽음). 쓰기: 새 세대 staging → publish (backend/store/generations.py)
+# VSTORE_SHARDS>1 이면 세대 안에 shards/<NN>/ 저장소가 여럿 (backend/store/shards.py), 파일 이름은 같다.
+INDEX_NAME  = "faiss_index.idx"
+META_NAME   = "metadatas.json"
+META_BIN_NAME = "metadatas.bin"
+CHUNKS_NAME = "chunks.bin"
+BM25_NAME   = "bm25.bin"
+# 마지막으로 인덱스에 반영된 청크 파일 상태 (stat + sha1) — 게시된 세대는 바꾸지 않으므로 세대 밖(VSTORE_ROOT)에 하나.
+# generation 필드가 현재 세대와 다르면(게시 직후 중단 등) 인덱스와 다시 대조한다.
+MANIFEST_NAME = "chunks_manifest.json"
+VSTORE_MANIFEST = VSTORE_ROOT / MANIFEST_NAME
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "0")) or None
+# 레거시 JSON 메타도 같이 기록할지 (구버전 도구 호환용)
+WRITE_META_JSON = os.getenv("VSTORE_META_JSON", "0") == "1"
 
 def ensure_dirs():
-    for d in [VSTORE_DIR]:
+    for d in [VSTORE_ROOT]:
         d.mkdir(parents=True, exist_ok=True)
 
-def load_existing():
-    if VSTORE_INDEX.exists() and VSTORE_META.exists():
-        return faiss.read_index(str(VSTORE_INDEX)), json.loads(VSTORE_META.read_text(encoding="utf-8"))
+def _has_store(d: Path | None) -> bool:
+    return d is not None and (d / INDEX_NAME).exists() and metas_exist(d)
+
+def _missing_artifacts(d: Path) -> list:
+    """저장소에 있어야 할 산출물 중 없는 것 (예전 레이아웃에서 올라온 저장소는 chunks.bin/bm25.bin 등이 없다)"""
+    wanted = [CHUNKS_NAME, PARAMS_FILE, VECTORS_FILE] + ([BM25_NAME] if BM25_INDEX else [])
+    return [n for n in wanted if not (d / n).exists()]
+
+def open_manifest() -> HashManifest:
+    """세대 밖 매니페스트. 아직 없으면 예전 위치(현재 세대 안)의 것을 읽어 온다 — 그 세대를 기술한 것."""
+    manifest = HashManifest(VSTORE_MANIFEST)
+    old = VSTORE_DIR / MANIFEST_NAME
+    if not VSTORE_MANIFEST.exists() and old.exists():
+        manifest = HashManifest(old)
+        manifest.path = VSTORE_MANIFEST
+        manifest.generation = VSTORE_DIR.name
+    return manifest
+
+def load_existing(src: Path | None):
+    if _has_store(src):
+        metas = open_metas(src)
+        return faiss.read_index(str(src / INDEX_NAME)), list(metas)
     return None, []
 
-def collect_chunks():
-    items = []
+def load_existing_texts(src: Path, metas):
+    """기존 row 순서대로 청크 본문. chunks.bin이 없거나 어긋나면 meta path에서 다시 읽는다."""
+    if (src / CHUNKS_NAME).exists():
+        store = ChunkStore(src / CHUNKS_NAME)
+        if len(store) == len(metas):
+            return list(store.texts())
+        print(f"[warn] chunks.bin 행 수 불일치({len(store)} != {len(metas)}) → 원본에서 재구성")
+    texts = []
+    for m in metas:
+        try: texts.append(read_chunks([m.get("path", "")])[0])
+        except Exception: texts.append("")
+    return texts
+
+def load_existing_vectors(src: Path, index, n):
+    """행 정렬 원본 벡터. vectors.npy가 없으면(레거시) Flat 인덱스에서 복원."""
+    vecs = load_vectors(src, mmap=False)
+    if vecs is not None and len(vecs) == n:
+        return vecs
+    if not is_id_mapped(index) and read_params(src).get("type", "flat") == "flat" and index.ntotal == n:
+        return index.reconstruct_n(0, index.ntotal)
+    print("[warn] vectors.npy 없음 → 인덱스 재빌드/compaction 불가 (전체 재임베딩 필요)")
+    return None
+
+def _needs_rebuild(params, ntotal):
+    """
+    vectors.npy로 재빌드할지:
+      - INDEX_TYPE이 바뀜
+      - IVF가 학습 시점 대비 4배 이상 커짐, 또는 소규모라 하향됐던 인덱스가 충분히 커짐
+    """
+    kind = params.get("type", "flat")
+    if params.get("requested", kind) != default_params()["type"]:
+        return True
+    grown = ntotal > 4 * params.get("trained_n", ntotal)
+    return grown and (kind.startswith("ivf") or kind != params.get("requested", kind))
+
+# 샤드(jsonl) 청크의 가상 경로 → (shard, offset, length). collect_chunks가 채운다.
+_shard_loc = {}
+
+def collect_chunks(manifest: HashManifest | None = None):
+    """
+    (path, category, filename, sha1) 목록.
+      - 레거시 청크 파일(*.txt): manifest로 stat이 같은 파일은 재해시하지 않는다
+      - 샤드(shard-*.jsonl): text_splitter가 기록한 인덱스(.idx)의 sha1을 그대로 사용
+    샤드 청크의 path는 data/chunks/<카테고리>/<filename> 가상 경로(레거시와 동일한 키).
+    """
+    files, idx_files = [], []
     for cat_dir in CHUNKS_DIR.iterdir():
         if not cat_dir.is_dir(): continue
         for fp in cat_dir.glob("*.txt"):
-            items.append((str(fp), cat_dir.name, fp.name, file_sha1(fp)))
+            files.append((str(fp), cat_dir.name, fp.name))
+        for fp in cat_dir.glob("shard-*" + INDEX_SUFFIX):
+            idx_files.append((str(fp), cat_dir.name))
+    manifest = manifest or open_manifest()
+    sha = manifest.hash_files([p for p, _, _ in files] + [p for p, _ in idx_files], HASH_WORKERS)
+
+    _shard_loc.clear()
+    items = []
+    for idx, cat in idx_files:
+        for vpath, fn, sha1, loc in shard_items(idx):
+            _shard_loc[vpath] = loc
+            items.append((vpath, cat, fn, sha1))
+    # 형식 전환 후 남은 레거시 파일은 샤드 쪽이 우선
+    items.extend((p, c, f, sha[p]) for p, c, f in files if p not in _shard_loc)
     return items
 
-def diff_new_changed(existing_metas, current_items):
-    old_pairs = {(m.get("path",""), m.get("sha1","")) for m in existing_metas}
+def read_chunks(paths) -> list:
+    """청크 본문 목록(입력 순서). 샤드 청크는 샤드별 순차 읽기, 레거시는 파일 읽기."""
+    out = [None] * len(paths)
+    shard_pos = [i for i, p in enumerate(paths) if p in _shard_loc]
+    for i, t in zip(shard_pos, read_shard_texts([_shard_loc[paths[i]] for i in shard_pos])):
+        out[i] = t
+    for i, p in enumerate(paths):
+        if out[i] is None:
+            out[i] = Path(p).read_text(encoding="utf-8", errors="ignore")
+    return out
+
+def _shard_count(gen_dir: Path) -> int:
+    """세대의 샤드 수 (GENERATION.json 기준, 샤드 없는 레이아웃이면 0)"""
+    return int(read_manifest(gen_dir).get("shards") or 0)
+
+def _wanted_shards() -> int:
+    return VSTORE_SHARDS if VSTORE_SHARDS > 1 else 0
+
+def _nothing_to_do(manifest: HashManifest) -> bool:
+    """
+    매니페스트 기준 변경 없음(현재 세대 기준) + 모든 저장소에 산출물이 다 있음 + 샤드 수·인덱스 종류 변경 없음
+    → 인덱스를 열 필요도 없다
+    """
+    if manifest.changed or manifest.generation != VSTORE_DIR.name or _shard_count(VSTORE_DIR) != _wanted_shards():
+        return False
+    stores = shard_dirs(VSTORE_DIR) if _wanted_shards() else [VSTORE_DIR]
+    if not stores or not all(_has_store(d) and not _missing_artifacts(d) for d in stores):
+        return False
+    params = read_params(stores[0])
+    return params.get("requested", params.get("type", "flat")) == default_params()["type"]
+
+def diff_new_changed(existing_metas, current_items, dead=None):
+    """살아있는 행에 같은 (path, sha1)이 없는 현재 청크 = 신규/변경"""
+    old_pairs = {(m.get("path",""), m.get("sha1","")) for i, m in enumerate(existing_metas) if dead is None or not dead[i]}
     return [(p,c,f,s) for (p,c,f,s) in current_items if (p,s) not in old_pairs]
 
-def embed_batch(texts, batch=64):
-    out = []
-    for i in tqdm(range(0, len(texts), batch)):
-        chunk = texts[i:i+batch]
-        vecs = _retry_embed(chunk, EMBED_MODEL)
-        out.extend(list(vecs))
-    return np.array(out, dtype="float32")
+def find_stale(existing_metas, current_items, dead):
+    """살아있는 행 중 현재 청크에 (path, sha1)이 없는 행 = 변경 전 버전 또는 사라진 청크"""
+    cur_pairs = {(p, s) for (p, _, _, s) in current_items}
+    return [i for i, m in enumerate(existing_metas)
+            if not dead[i] and (m.get("path",""), m.get("sha1","")) not in cur_pairs]
 
-def run():
-    ensure_dirs()
-    index, metas = load_existing()
-    current = collect_chunks()
-    targets = diff_new_changed(metas, current)
+def _rel(p) -> str:
+    return Path(p).resolve().relative_to(ROOT_DIR).as_posix()
+
+def _meta_for(p, cat, fn, sha1):
+    rp = Path(p).resolve()
+    return {"category":cat, "filename":fn, "path":str(rp), "rel_path":_rel(p), "sha1":sha1}
+
+def embed_batch(texts):
+    """벡터 캐시(본문 sha1 + 모델) 먼저 조회, 처음 보는 본문만 중복 제거 후 API 호출"""
+    if not VECTOR_CACHE:
+        return _engine.embed(texts)
+    cache = VectorCache(EMBED_MODEL)
+    keys = [text_key(t, EMBED_MODEL) for t in texts]
+    vecs, found = cache.get_many(keys)
+    uniq = {}
+    for i in np.flatnonzero(~found):
+        uniq.setdefault(keys[i], i)
+    print(f"🗃️  벡터 캐시: {int(found.sum())}/{len(texts)} 적중, 신규 본문 {len(uniq)}개 임베딩")
+    if uniq:
+        new_keys = list(uniq)
+        new_vecs = _engine.embed([texts[uniq[k]] for k in new_keys])
+        cache.put_many(new_keys, new_vecs)
+        vecs, found = cache.get_many(keys)
+    return vecs
+
+def compact(metas, texts, vecs, dead):
+    """dead 행을 버리고 row 번호를 0..live-1로 다시 매겨 인덱스/메타/청크/벡터를 재구성"""
+    keep = np.flatnonzero(~dead)
+    live_vecs = np.ascontiguousarray(vecs[keep])
+    index, params = build_index(live_vecs)
+    params["trained_n"] = len(keep)
+    return (index, params, [metas[i] for i in keep], [texts[i] for i in keep],
+            live_vecs, np.zeros(len(keep), dtype=bool))
+
+def write_generation(out: Path, index, params, metas, all_texts, all_vecs, dead):
+    """한 세대의 산출물 전부를 out 디렉터리에 기록 (아직 게시 전 staging)"""
+    faiss.write_index(index, str(out / INDEX_NAME))
+    write_params(out, params)
+    if all_vecs is not None:
+        save_vectors(out, all_vecs)
+    save_tombstones(out, dead)
+    write_metas(out / META_BIN_NAME, metas)
+    if WRITE_META_JSON:
+        (out / META_NAME).write_text(json.dumps(metas, ensure_ascii=False), encoding="utf-8")
+    write_chunks(out / CHUNKS_NAME, all_texts)
+    if BM25_INDEX:
+        nterms = build_bm25(out / BM25_NAME, all_texts, dead)
+        print(f"🔤 BM25 역색인: 용어 {nterms:,}개")
+
+def update_store(src: Path | None, current, out: Path, tag: str = ""):
+    """
+    저장소 하나(세대 디렉터리 또는 샤드)를 current 청크 목록에 맞춰 갱신해 out에 기록.
+    src: 이전 저장소 (없으면 새로 만든다). 반환: {"rows", "live", "index_type"} 또는
+    변경이 없으면 None (out에는 아무것도 쓰지 않음).
+    """
+    index, metas = load_existing(src)
 
     if index is None:
-        print("🔰 최초 인덱스 생성...")
-        texts, new_metas = [], []
-        for p, cat, fn, sha1 in current:
-            texts.append(Path(p).read_text(encoding="utf-8", errors="ignore"))
-            new_metas.append({"category":cat, "filename":fn, "path":str(Path(p).resolve()), "rel_path":str(Path(p).resolve().relative_to(ROOT_DIR).as_posix()), "sha1":sha1})
-        if not texts:
-            print("[warn] 청크가 없습니다. text_splitter를 먼저 실행하세요.")
-            return
+        print(f"{tag}🔰 최초 인덱스 생성...")
+        texts = read_chunks([p for p, _, _, _ in current])
+        new_metas = [_meta_for(p, cat, fn, sha1) for p, cat, fn, sha1 in current]
         vecs = embed_batch(texts)
-        dim = vecs.shape[1]
-        index = faiss.IndexFlatL2(dim)
-        index.add(vecs)
+        index, params = build_index(vecs)
+        params["trained_n"] = len(vecs)
         metas = new_metas
+        all_texts = texts
+        all_vecs = vecs
+        dead = np.zeros(len(metas), dtype=bool)
     else:
-        if not targets:
-            print("변경/신규 청크 없음. 인덱스 유지.")
-        else:
-            print(f"➕ 신규/변경 청크 {len(targets)}개 추가 중...")
-            texts, add_metas = [], []
-            for p, cat, fn, sha1 in targets:
-                texts.append(Path(p).read_text(encoding="utf-8", errors="ignore"))
-                add_metas.append({"category":cat, "filename":fn, "path":str(Path(p).resolve()), "rel_path":str(Path(p).resolve().relative_to(ROOT_DIR).as_posix()), "sha1":sha1})
+        params = read_params(src)
+        all_texts = load_existing_texts(src, metas)
+        all_vecs = load_existing_vectors(src, index, len(metas))
+        dead = load_tombstones(src, len(metas))
+        rebuild = False
+        converted = False
+        if not is_id_mapped(index):
+            # 레거시(IndexFlatL2 등) → row id 매핑 인덱스로 변환
+            if all_vecs is None:
+                raise SystemExit("[ERR] 레거시 인덱스를 변환할 벡터가 없습니다. 벡터스토어를 지우고 재생성하세요.")
+            print(f"{tag}🔧 레거시 인덱스 → IndexIDMap2 변환")
+            index, params = build_index(all_vecs, params)
+            params["trained_n"] = len(all_vecs)
+            converted = True
+
+        targets = diff_new_changed(metas, current, dead)
+        stale = find_stale(metas, current, dead)
+        # 빠진 산출물은 다시 쓰면 채워진다 (벡터는 복원할 수 있을 때만)
+        missing = [n for n in _missing_artifacts(src) if n != VECTORS_FILE or all_vecs is not None]
+        if missing:
+            print(f"{tag}🧱 빠진 산출물 보충: {', '.join(missing)}")
+        if not targets and not stale and not converted and not missing and not _needs_rebuild(params, index.ntotal):
+            return None
+        if stale:
+            print(f"{tag}🗑️  변경 전/삭제된 청크 {len(stale)}개 제거")
+            dead[stale] = True
+            # HNSW 등 삭제 미지원이면 인덱스에 남기고 tombstone만 (서버가 검색에서 가린다) —
+            # 재빌드는 dead 비율이 COMPACT_DEAD_FRACTION을 넘을 때 아래 compaction에서
+            remove_rows(index, stale)
+        if targets:
+            print(f"{tag}➕ 신규/변경 청크 {len(targets)}개 추가 중...")
+            texts = read_chunks([p for p, _, _, _ in targets])
+            add_metas = [_meta_for(p, cat, fn, sha1) for p, cat, fn, sha1 in targets]
             vecs = embed_batch(texts)
-            index.add(vecs)
+            index.add_with_ids(vecs, np.arange(len(metas), len(metas) + len(vecs), dtype="int64"))
             metas.extend(add_metas)
+            all_texts.extend(texts)
+            dead = np.concatenate([dead, np.zeros(len(vecs), dtype=bool)])
+            if all_vecs is not None:
+                all_vecs = np.concatenate([all_vecs, vecs])
+
+        dead_frac = float(dead.mean()) if len(dead) else 0.0
+        if dead_frac > COMPACT_DEAD_FRACTION or _needs_rebuild(params, index.ntotal):
+            rebuild = True
+        if rebuild:
+            if all_vecs is None:
+                print(f"{tag}[warn] vectors.npy 없음 → compaction 건너뜀 "
+                      f"(dead {int(dead.sum())}행은 인덱스에 남고 서버가 tombstones로 가린다)")
+            else:
+                print(f"{tag}🔧 compaction/재빌드: {len(metas)}행 중 dead {int(dead.sum())}행 ({dead_frac:.1%}), "
+                      f"{params.get('type', 'flat')} → {default_params()['type']}")
+                index, params, metas, all_texts, all_vecs, dead = compact(metas, all_texts, all_vecs, dead)
+
+    out.mkdir(parents=True, exist_ok=True)
+    write_generation(out, index, params, metas, all_texts, all_vecs, dead)
+    return {"rows": len(metas), "live": int((~dead).sum()), "index_type": params["type"]}
 
-    _atomic_write_index(index, VSTORE_INDEX)
-    _atomic_write(VSTORE_META, json.dumps(metas, ensure_ascii=False, indent=2))
-    print(f"✅ 저장 완료 → {VSTORE_INDEX}")
+def write_shards(current, n: int, out: Path):
+    """
+    청크를 rel_path 해시로 n개 샤드에 나눠 out/shards/<NN>/에 기록.
+    이전 세대가 같은 샤드 수면 바뀐 샤드만 새로 쓰고 나머지는 하드링크. 청크가 없는 샤드는 만들지 않는다.
+    반환: 세대 정보, 모든 샤드가 그대로면 None
+    """
+    groups = [[] for _ in range(n)]
+    for item in current:
+        groups[shard_of(_rel(item[0]), n)].append(item)
+    same_layout = _shard_count(VSTORE_DIR) == n
+    prev_info = read_manifest(VSTORE_DIR).get("shard_info", {}) if same_layout else {}
+    info, changed = {}, []
+    for i, items in enumerate(groups):
+        sname = shard_name(i)
+        src = VSTORE_DIR / SHARDS_DIR / sname if same_layout else None
+        src = src if _has_store(src) else None
+        if not items:
+            if src is not None:
+                changed.append(sname)  # 샤드의 청크가 전부 사라짐
+            continue
+        dst = out / SHARDS_DIR / sname
+        res = update_store(src, items, dst, tag=f"[shard {sname}] ")
+        if res is None:
+            link_tree(src, dst)
+            res = prev_info.get(sname) or {"rows": len(open_metas(src)), "live": None, "index_type": read_params(src)["type"]}
+        else:
+            changed.append(sname)
+        info[sname] = res
+    if not changed:
+        return None
+    if not info:
+        raise SystemExit("[ERR] 남은 샤드가 없습니다 — 빈 세대는 게시하지 않습니다")
+    print(f"🧩 샤드 {len(info)}개 중 {len(changed)}개 새로 기록: {', '.join(changed)}")
+    live = [r["live"] for r in info.values()]
+    return {"rows": sum(r["rows"] for r in info.values()),
+            "live": sum(live) if None not in live else None,
+            "index_type": next(iter(info.values()))["index_type"] if info else None,
+            "shards": n, "shard_info": info, "changed_shards": changed}
+
+def run():
+    global VSTORE_DIR
+    ensure_dirs()
+    # 다른 임베더·수리 도구와 staging → publish → prune이 겹치지 않게. 기다리는 동안 다른 실행이
+    # 게시했을 수 있으므로 잠금을 얻은 뒤 현재 세대를 다시 읽는다
+    with write_lock(VSTORE_ROOT):
+        VSTORE_DIR = current_dir(VSTORE_ROOT)
+        _run()
+
+def _run():
+    manifest = open_manifest()
+    current = collect_chunks(manifest)
+    print(f"🔎 청크 {len(current)}개 확인 (재해시 {manifest.rehashed}개, 사라짐 {manifest.removed}개)")
+    if _nothing_to_do(manifest):
+        if manifest.rehashed or not VSTORE_MANIFEST.exists():
+            manifest.save()  # 내용은 같고 stat만 바뀐 파일 갱신 / 예전 위치에서 옮겨 옴
+        print("변경/신규 청크 없음. 인덱스 유지.")
+        return
+    nshards = _wanted_shards()
+    src = VSTORE_DIR if _shard_count(VSTORE_DIR) == 0 and _has_store(VSTORE_DIR) else None
+    if not current:
+        # 청크가 전부 사라졌어도 빈 세대는 게시하지 않는다 (샤드 없는 세대는 서버가 열 수 없음) — 현재 세대 유지
+        print("[warn] 청크가 없습니다. text_splitter를 먼저 실행하세요. (현재 세대 유지)")
+        return
+
+    name, out = new_staging(VSTORE_ROOT)
+    try:
+        if nshards:
+            info = write_shards(current, nshards, out)
+        else:
+            # 샤드 세대 → 단일 저장소로 되돌릴 때는 새로 만든다 (벡터는 벡터 캐시에서)
+            info = update_store(src, current, out)
+        if info is None:
+            shutil.rmtree(out, ignore_errors=True)
+            manifest.generation = VSTORE_DIR.name
+            manifest.save()  # 현재 세대 그대로, 매니페스트만 갱신
+            print("변경/신규 청크 없음. 인덱스 유지.")
+            return
+    except BaseException:
+        shutil.rmtree(out, ignore_errors=True)
+        raise
+    final = publish(VSTORE_ROOT, name, out, dict(info, embed_model=EMBED_MODEL))
+    manifest.generation = name
+    manifest.save()  # 게시 후에 — 중간에 끊기면 다음 실행이 generation 불일치로 인덱스와 대조한다
+    removed = prune(VSTORE_ROOT, VSTORE_KEEP_GENERATIONS)
+    print(f"✅ 세대 {name} 게시 → {final} ({info['index_type']}, live {info['live']} / rows {info['rows']}"
+          + (f", 샤드 {nshards}개" if nshards else "") + ")"
+          + (f", 이전 세대 {len(removed)}개 정리" if removed else ""))
 
 if __name__ == "__main__":
     run()
@@ -15,6 +15,9 @@ from pathlib import Path
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from backend.store.chunk_store import ChunkStore
+from backend.store.meta_store import open_metas
+
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
@@ -30,8 +33,12 @@ def embed(x:str):
 
 def load_store():
     idx = faiss.read_index(str(VSTORE_DIR / "faiss_index.idx"))
-    metas = json.loads((VSTORE_DIR / "metadatas.json").read_text(encoding="utf-8"))
-    return idx, metas
+    metas = open_metas(VSTORE_DIR)
+    cp = VSTORE_DIR / "chunks.bin"
+    chunks = ChunkStore(cp) if cp.exists() else None
+    if chunks is not None and len(chunks) != len(metas):
+        chunks = None
+    return idx, metas, chunks
 
 def faiss_search(qv, index, k=TOPK_EMBED):
     D, I = index.search(np.array(qv, dtype="float32").reshape(1,-1), k)
@@ -73,7 +80,7 @@ def highlight(txt:str, kws):
     pat = re.compile("|".join([re.escape(k) for k in kws]), re.IGNORECASE)
     return pat.sub(repl, txt)
 
-def pick_hybrid_best(I, D, metas, question, max_docs=MAX_DOCS):
+def pick_hybrid_best(I, D, metas, question, max_docs=MAX_DOCS, chunks=None):
     kws = extract_keywords(question)
     # 파일당 best chunk
     best = {}
@@ -85,8 +92,11 @@ def pick_hybrid_best(I, D, metas, question, max_docs=MAX_DOCS):
     items, emb_raw, kw_raw = [], [], []
     for fn, (idx, dist) in best.items():
         m = metas[idx]
-        try: content = Path(m["path"]).read_text(encoding="utf-8", errors="ignore")
-        except: content = ""
+        if chunks is not None:
+            content = chunks.text(idx)
+        else:
+            try: content = Path(m["path"]).read_text(encoding="utf-8", errors="ignore")
+            except: content = ""
         emb_raw.append(-dist); kw_raw.append(kw_score(content, kws))
         items.append({"meta":m,"content":content,"dist":dist})
     emb, kw = minmax(emb_raw), minmax(kw_raw)
@@ -133,7 +143,7 @@ def main():
     if not idx.exists():
         print("[ERR] 인덱스 없음. pipelines/ingest_local.sh 먼저 실행.")
         return
-    index, metas = load_store()
+    index, metas, chunks = load_store()
     history, sess = [], f"sessions/chat_{int(time.time())}.jsonl"
     os.makedirs("sessions", exist_ok=True)
 
@@ -144,7 +154,7 @@ def main():
         hint = " " + history[-1]["content"][:400] if history else ""
         qv = embed(q + hint)
         D, I = faiss_search(qv, index, TOPK_EMBED)
-        selected, kws = pick_hybrid_best(I, D, metas, q, MAX_DOCS)
+        selected, kws = pick_hybrid_best(I, D, metas, q, MAX_DOCS, chunks)
         if SAFE_MODE and not has_kw(selected, kws):
             print("\n🧠 답변:\n내부 근거가 부족합니다. 데이터 동기화 후 다시 시도해주세요.")
             continue
@@ -13,4 +13,4 @@ python -m pipelines.embedder_incremental
 Write-Host "[4/4] retriever.py (스모크)"
 "스모크 테스트" | python -m pipelines.retriever
 
-Write-Host "✅ vectorstore/dev/current 업데이트 완료"
+Write-Host "✅ vectorstore/dev 새 세대 게시 완료 (CURRENT)"
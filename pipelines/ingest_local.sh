@@ -14,4 +14,4 @@ python -m pipelines.embedder_incremental
 echo "[4/4] retriever.py (스모크)"
 python -m pipelines.retriever <<< "스모크 테스트"
 
-echo "✅ vectorstore/dev/current 업데이트 완료"
+echo "✅ vectorstore/dev 새 세대 게시 완료 (CURRENT)"
@@ -13,11 +13,12 @@ import os, json, numpy as np, faiss
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from backend.store.meta_store import open_metas
+
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 VSTORE_INDEX = VSTORE_DIR / "faiss_index.idx"
-VSTORE_META  = VSTORE_DIR / "metadatas.json"
 
 def qvec(q:str):
     return client.embeddings.create(model=EMBED_MODEL, input=q).data[0].embedding
@@ -29,7 +30,7 @@ if __name__ == "__main__":
     q = input("질문> ").strip() or "스모크 테스트"
     vec = np.array(qvec(q), dtype="float32").reshape(1,-1)
     index = faiss.read_index(str(VSTORE_INDEX))
-    metas = json.load(open(VSTORE_META, encoding="utf-8"))
+    metas = open_metas(VSTORE_DIR)
     D, I = index.search(vec, 5)
     for rank, (d, idx) in enumerate(zip(D[0], I[0]), 1):
         m = metas[idx]
@@ -9,15 +9,43 @@ from backend.config.config import (
     ROOT_DIR, DATA_DIR, RAW_DIR, CLEANED_DIR, CHUNKS_DIR, VSTORE_DIR, EMBED_MODEL
 )
 
+import hashlib, json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from pipelines.tokens import count_tokens
+
 MAX_CHARS = 1200
+# 토큰 기준 분할 (0이면 기존 글자 수 기준 MAX_CHARS)
+CHUNK_TOKENS         = int(os.getenv("CHUNK_TOKENS", "0"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "0"))
+
+# 출력 형식
+#   jsonl : data/chunks/<카테고리>/shard-NNNNN.jsonl + shard-NNNNN.idx (청크별 sha1/offset/length)
+#   files : 청크마다 <원본>_chunk_<i>.txt (레거시)
+CHUNK_FORMAT   = os.getenv("CHUNK_FORMAT", "jsonl")
+CHUNK_SHARDS   = int(os.getenv("CHUNK_SHARDS", "32"))     # 카테고리당 샤드 수 (원본 파일명 해시로 배정)
+SPLIT_WORKERS  = int(os.getenv("SPLIT_WORKERS", "0")) or None
+
+SHARD_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".idx"
 
 def ensure_dirs():
     for d in [CHUNKS_DIR]:
         d.mkdir(parents=True, exist_ok=True)
 
-def split_text(txt: str, max_chars=MAX_CHARS):
+def _split_long_line(line: str, ntok: int, max_tokens: int):
+    """한 줄이 max_tokens보다 길면 글자 수 비례로 자른다"""
+    step = max(1, len(line) * max_tokens // ntok)
+    for i in range(0, len(line), step):
+        piece = line[i:i+step]
+        yield piece, count_tokens(piece)
+
+def split_text(txt: str, max_chars=MAX_CHARS, max_tokens=None, overlap_tokens=None):
+    max_tokens = CHUNK_TOKENS if max_tokens is None else max_tokens
+    overlap_tokens = CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    if max_tokens:
+        return _split_tokens(txt, max_tokens, min(overlap_tokens, max_tokens // 2))
     parts, buf, acc = [], [], 0
     for line in txt.splitlines(keepends=True):
         if not line.strip():
@@ -30,6 +58,109 @@ def split_text(txt: str, max_chars=MAX_CHARS):
         parts.append("".join(buf).strip())
     return [p for p in parts if p]
 
+def _split_tokens(txt: str, max_tokens: int, overlap: int):
+    """줄 단위로 max_tokens 이하가 되게 묶고, 앞 청크 끝 줄들을 overlap 토큰만큼 다음 청크에 반복"""
+    parts, buf, acc, fresh = [], [], 0, 0
+    for line in txt.splitlines(keepends=True):
+        if not line.strip():
+            line = "\n"
+        n = count_tokens(line)
+        pieces = _split_long_line(line, n, max_tokens) if n > max_tokens else [(line, n)]
+        for piece, n in pieces:
+            if fresh and acc + n > max_tokens:
+                parts.append("".join(l for l, _ in buf).strip())
+                tail, t = [], 0
+                for l, k in reversed(buf):
+                    if t + k > overlap:
+                        break
+                    tail.insert(0, (l, k)); t += k
+                buf, acc, fresh = tail, t, 0
+            buf.append((piece, n)); acc += n; fresh += 1
+    if fresh:
+        parts.append("".join(l for l, _ in buf).strip())
+    return [p for p in parts if p]
+
+def _chunk_name(src: Path, i: int) -> str:
+    return f"{src.name}_chunk_{i}.txt"
+
+def _shard_of(name: str, n: int) -> int:
+    return int(hashlib.sha1(name.encode("utf-8")).hexdigest()[:8], 16) % n
+
+def _split_params() -> dict:
+    return {"max_chars": MAX_CHARS, "max_tokens": CHUNK_TOKENS, "overlap": CHUNK_OVERLAP_TOKENS}
+
+# ── 워커 ────────────────────────────────────────────────────
+def _write_files(args):
+    """레거시: 원본 1개 → 청크 파일 n개"""
+    fp, out_cat = Path(args[0]), Path(args[1])
+    chunks = split_text(fp.read_text(encoding="utf-8", errors="ignore"))
+    for i, ch in enumerate(chunks):
+        (out_cat / _chunk_name(fp, i)).write_text(ch, encoding="utf-8")
+    return len(chunks)
+
+def _write_shard(args):
+    """원본 여러 개 → shard-NNNNN.jsonl 한 개 + 인덱스(.idx). 입력·설정이 그대로면 건너뛴다."""
+    out_cat, shard, files = Path(args[0]), args[1], [Path(f) for f in args[2]]
+    shard_path = out_cat / (shard + SHARD_SUFFIX)
+    idx_path = out_cat / (shard + INDEX_SUFFIX)
+    inputs = {}
+    for fp in files:
+        st = fp.stat()
+        inputs[fp.name] = [st.st_size, st.st_mtime_ns]
+    params = _split_params()
+    if shard_path.exists() and idx_path.exists():
+        try:
+            old = json.loads(idx_path.read_text(encoding="utf-8"))
+            if old.get("inputs") == inputs and old.get("params") == params:
+                return shard, len(old["records"]), False
+        except (OSError, ValueError):
+            pass
+
+    records, off = [], 0
+    tmp = shard_path.with_suffix(shard_path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        for fp in files:
+            for i, ch in enumerate(split_text(fp.read_text(encoding="utf-8", errors="ignore"))):
+                name = _chunk_name(fp, i)
+                line = (json.dumps({"filename": name, "source": fp.name, "chunk": i, "text": ch},
+                                   ensure_ascii=False) + "\n").encode("utf-8")
+                f.write(line)
+                records.append([name, hashlib.sha1(ch.encode("utf-8")).hexdigest(), off, len(line)])
+                off += len(line)
+    os.replace(tmp, shard_path)
+    itmp = idx_path.with_suffix(idx_path.suffix + ".tmp")
+    itmp.write_text(json.dumps({"version": 1, "shard": shard_path.name, "params": params,
+                                "inputs": inputs, "records": records}, ensure_ascii=False), encoding="utf-8")
+    os.replace(itmp, idx_path)
+    return shard, len(records), True
+
+def _pool_map(fn, jobs):
+    if len(jobs) < 2 or SPLIT_WORKERS == 1:
+        return list(map(fn, jobs))
+    with ProcessPoolExecutor(max_workers=SPLIT_WORKERS) as ex:
+        return list(ex.map(fn, jobs))
+
+# ── 샤드 읽기 (embedder 공용) ─────────────────────────────
+def shard_items(idx_path: Path):
+    """샤드 인덱스 → [(가상 청크 경로, filename, sha1, (shard 경로, offset, length))]"""
+    idx_path = Path(idx_path)
+    idx = json.loads(idx_path.read_text(encoding="utf-8"))
+    shard = str(idx_path.with_name(idx["shard"]))
+    return [(str(idx_path.parent / name), name, sha1, (shard, off, ln)) for name, sha1, off, ln in idx["records"]]
+
+def read_shard_texts(locs) -> list:
+    """[(shard, offset, length)] → 본문 목록(입력 순서). 샤드별로 한 번만 열고 offset 순서로 읽는다."""
+    out = [None] * len(locs)
+    by_shard = {}
+    for i, (shard, off, ln) in enumerate(locs):
+        by_shard.setdefault(shard, []).append((off, ln, i))
+    for shard, recs in by_shard.items():
+        with open(shard, "rb") as f:
+            for off, ln, i in sorted(recs):
+                f.seek(off)
+                out[i] = json.loads(f.read(ln))["text"]
+    return out
+
 def run():
     ensure_dirs()
     for cat_dir in CLEANED_DIR.iterdir():
@@ -37,10 +168,23 @@ def run():
             continue
         out_cat = CHUNKS_DIR / cat_dir.name
         out_cat.mkdir(parents=True, exist_ok=True)
-        for fp in cat_dir.glob("*.txt"):
-            chunks = split_text(fp.read_text(encoding="utf-8", errors="ignore"))
-            for i, ch in enumerate(chunks):
-                (out_cat / f"{fp.name}_chunk_{i}.txt").write_text(ch, encoding="utf-8")
+        files = sorted(cat_dir.glob("*.txt"))
+        if CHUNK_FORMAT == "files":
+            n = sum(_pool_map(_write_files, [(str(fp), str(out_cat)) for fp in files]))
+            print(f"  {cat_dir.name}: 원본 {len(files)}개 → 청크 {n}개")
+            continue
+
+        groups = {}
+        for fp in files:
+            groups.setdefault(f"shard-{_shard_of(fp.name, CHUNK_SHARDS):05d}", []).append(str(fp))
+        results = _pool_map(_write_shard, [(str(out_cat), s, fs) for s, fs in sorted(groups.items())])
+        # 더 이상 배정되지 않는 샤드 정리
+        for p in list(out_cat.glob("shard-*" + SHARD_SUFFIX)) + list(out_cat.glob("shard-*" + INDEX_SUFFIX)):
+            if p.name.rsplit(".", 1)[0] not in groups:
+                p.unlink()
+        n = sum(r[1] for r in results)
+        rewritten = sum(1 for r in results if r[2])
+        print(f"  {cat_dir.name}: 원본 {len(files)}개 → 청크 {n}개, 샤드 {len(groups)}개 (재작성 {rewritten}개)")
     print("✅ chunks 생성:", CHUNKS_DIR)
 
 if __name__ == "__main__":
@@ -0,0 +1,24 @@
+"""
+토큰 수 계산 (임베딩 배치 예산, 토큰 기준 청크 분할 공용)
+tiktoken이 설치돼 있으면 EMBED_MODEL 인코딩을 쓰고, 없으면 보수적 추정치를 쓴다.
+  추정: UTF-8 바이트 / 3 (한글 1자 ≈ 1토큰, 영문은 실제보다 약간 크게 잡힘)
+"""
+import math
+
+try:
+    import tiktoken
+    try:
+        _enc = tiktoken.get_encoding("cl100k_base")
+    except Exception:  # 인코딩 파일 다운로드 불가 등
+        _enc = None
+except ImportError:
+    _enc = None
+
+def count_tokens(text: str) -> int:
+    if _enc is not None:
+        return len(_enc.encode(text, disallowed_special=()))
+    return math.ceil(len(text.encode("utf-8")) / 3)
+
+def exact() -> bool:
+    """실제 토크나이저 사용 여부"""
+    return _enc is not None
@@ -1,4 +1,8 @@
 import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 def file_sha1(path: str | Path) -> str:
@@ -7,3 +11,69 @@ def file_sha1(path: str | Path) -> str:
         for chunk in iter(lambda: f.read(1024*1024), b""):
             h.update(chunk)
     return h.hexdigest()
+
+def parallel_sha1(paths, workers: int | None = None, min_parallel: int = 256) -> list:
+    """파일 sha1을 프로세스 풀로 계산 (개수가 적으면 풀 기동 비용이 더 커서 직렬)"""
+    paths = [str(p) for p in paths]
+    if len(paths) < min_parallel or workers == 1:
+        return [file_sha1(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(file_sha1, paths, chunksize=64))
+
+class HashManifest:
+    """
+    stat 기반 변경 감지 매니페스트: path → [size, mtime_ns, inode, sha1]
+    stat이 같으면 sha1을 재사용하고, 다르거나 새 파일만 병렬 해시한다.
+    저장 시각 2초 이내에 수정된 파일은 mtime 해상도 문제로 신뢰하지 않고 다시 해시한다.
+    generation: 이 상태가 반영된 벡터스토어 세대 이름 (저장할 때 같이 기록)
+    """
+    RACY_NS = 2_000_000_000
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries = {}
+        self.saved_ns = 0
+        self.generation = None
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self.entries = data.get("files", {})
+                self.saved_ns = data.get("saved_ns", 0)
+                self.generation = data.get("generation")
+            except (ValueError, OSError):
+                self.entries = {}
+        self.rehashed = 0
+        self.removed = 0
+
+    def hash_files(self, paths, workers: int | None = None) -> dict:
+        """paths 전체의 {path: sha1}. 이후 changed로 직전 저장 대비 변경 여부 확인."""
+        out, todo, stats = {}, [], {}
+        for p in paths:
+            p = str(p)
+            st = os.stat(p)
+            sig = [st.st_size, st.st_mtime_ns, st.st_ino]
+            stats[p] = sig
+            e = self.entries.get(p)
+            if e and e[:3] == sig and st.st_mtime_ns < self.saved_ns - self.RACY_NS:
+                out[p] = e[3]
+            else:
+                todo.append(p)
+        for p, h in zip(todo, parallel_sha1(todo, workers)):
+            out[p] = h
+        prev = self.entries
+        self.removed = len(set(prev) - set(out))
+        self.rehashed = len(todo)
+        # 내용이 같은데 stat만 바뀐(touch) 경우는 변경으로 보지 않는다
+        self._content_changed = self.removed > 0 or any(prev.get(p, [None] * 4)[3] != out[p] for p in todo)
+        self.entries = {p: stats[p] + [out[p]] for p in out}
+        return out
+
+    @property
+    def changed(self) -> bool:
+        return getattr(self, "_content_changed", True)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"saved_ns": time.time_ns(), "generation": self.generation, "files": self.entries}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -0,0 +1,102 @@
+"""
+내용 주소 기반 임베딩 벡터 캐시 (ingest 전용)
+
+  키   : sha1(EMBED_MODEL + "\\0" + 청크 본문) 20바이트
+  저장 : VECTOR_CACHE_DIR/<model>/
+           vectors.f32  append-only float32 행렬 (mmap으로 읽음)
+           keys.bin     append-only 20바이트 키 레코드 (i번째 키 ↔ i번째 벡터)
+           meta.json    {"model", "dim"}
+  조회 : 키 배열을 정렬해 두고 np.searchsorted로 일괄 조회 (dict 없이 수천만 행까지)
+
+경로 이동·재분할로 path가 바뀌어도 본문이 같으면 API를 다시 부르지 않는다.
+쓰기 순서는 벡터 → 키 이므로 중간에 죽어도 열 때 min(행 수)로 잘라 일관성을 맞춘다.
+"""
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+
+from backend.config.config import VECTOR_CACHE_DIR, EMBED_MODEL
+
+KEY_BYTES = 20
+
+def text_key(text: str, model: str = EMBED_MODEL) -> bytes:
+    return hashlib.sha1(model.encode("utf-8") + b"\0" + text.encode("utf-8")).digest()
+
+class VectorCache:
+    def __init__(self, model: str = EMBED_MODEL, root: Path = VECTOR_CACHE_DIR):
+        self.model = model
+        self.dir = Path(root) / re.sub(r"[^\w.-]+", "_", model)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._vec_path = self.dir / "vectors.f32"
+        self._key_path = self.dir / "keys.bin"
+        self._meta_path = self.dir / "meta.json"
+        self.dim = None
+        if self._meta_path.exists():
+            self.dim = json.loads(self._meta_path.read_text(encoding="utf-8"))["dim"]
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    def _open(self):
+        nkeys = self._key_path.stat().st_size // KEY_BYTES if self._key_path.exists() else 0
+        nvecs = self._vec_path.stat().st_size // (4 * self.dim) if self.dim and self._vec_path.exists() else 0
+        n = min(nkeys, nvecs)
+        # 중단된 append 정리
+        if self._key_path.exists() and self._key_path.stat().st_size != n * KEY_BYTES:
+            os.truncate(self._key_path, n * KEY_BYTES)
+        if self.dim and self._vec_path.exists() and self._vec_path.stat().st_size != n * 4 * self.dim:
+            os.truncate(self._vec_path, n * 4 * self.dim)
+        self.n = n
+        if n:
+            keys = np.fromfile(self._key_path, dtype=f"S{KEY_BYTES}", count=n)
+            self._order = np.argsort(keys, kind="stable")
+            self._sorted = keys[self._order]
+            self._vecs = np.memmap(self._vec_path, dtype="float32", mode="r", shape=(n, self.dim))
+        else:
+            self._order = np.zeros(0, dtype="int64")
+            self._sorted = np.zeros(0, dtype=f"S{KEY_BYTES}")
+            self._vecs = None
+
+    def __len__(self):
+        return self.n
+
+    def get_many(self, keys):
+        """keys(list[bytes]) → (vecs (n, dim) 또는 None, found bool 마스크)"""
+        q = np.array(keys, dtype=f"S{KEY_BYTES}")
+        found = np.zeros(len(q), dtype=bool)
+        if self.n == 0 or len(q) == 0:
+            self.misses += len(q)
+            return None, found
+        pos = np.searchsorted(self._sorted, q)
+        pos_c = np.minimum(pos, self.n - 1)
+        found = self._sorted[pos_c] == q
+        vecs = np.zeros((len(q), self.dim), dtype="float32")
+        rows = self._order[pos_c[found]]
+        vecs[found] = self._vecs[rows]
+        nh = int(found.sum())
+        self.hits += nh
+        self.misses += len(q) - nh
+        return vecs, found
+
+    def put_many(self, keys, vecs: np.ndarray):
+        vecs = np.ascontiguousarray(vecs, dtype="float32")
+        if len(keys) == 0:
+            return
+        if self.dim is None:
+            self.dim = int(vecs.shape[1])
+            self._meta_path.write_text(json.dumps({"model": self.model, "dim": self.dim}), encoding="utf-8")
+        if vecs.shape[1] != self.dim:
+            raise ValueError(f"벡터 차원 불일치: cache={self.dim}, new={vecs.shape[1]}")
+        with open(self._vec_path, "ab") as f:
+            f.write(vecs.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._key_path, "ab") as f:
+            f.write(b"".join(keys))
+            f.flush()
+            os.fsync(f.fileno())
+        self._open()
@@ -0,0 +1,45 @@
+"""
+레거시 metadatas.json → 컬럼형 metadatas.bin 일회성 변환
+  python scripts/convert_metadatas.py [--vstore DIR] [--remove-json]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from backend.config.config import VSTORE_DIR
+from backend.store.meta_store import write_metas, MetaStore, META_BIN, META_JSON
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vstore", default=str(VSTORE_DIR))
+    ap.add_argument("--remove-json", action="store_true", help="변환·검증 후 metadatas.json 삭제")
+    args = ap.parse_args()
+
+    vdir = Path(args.vstore)
+    src, dst = vdir / META_JSON, vdir / META_BIN
+    if not src.exists():
+        print(f"[ERR] 메타데이터 파일 없음: {src}")
+        return 1
+
+    t0 = time.perf_counter()
+    metas = json.loads(src.read_text(encoding="utf-8"))
+    t1 = time.perf_counter()
+    write_metas(dst, metas)
+    t2 = time.perf_counter()
+
+    store = MetaStore(dst)
+    if len(store) != len(metas) or any(store[i] != metas[i] for i in range(len(metas))):
+        print("[ERR] 변환 결과 불일치 — metadatas.json은 그대로 둡니다.")
+        return 1
+    print(f"[OK] {len(metas)}행 변환: json {src.stat().st_size:,}B → bin {dst.stat().st_size:,}B "
+          f"(parse {t1 - t0:.2f}s, write {t2 - t1:.2f}s)")
+    if args.remove_json:
+        src.unlink()
+        print(f"[OK] 삭제: {src}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,200 @@
+"""
+인덱스 종류/검색 파라미터별 recall@k, 지연(p50/p99) 측정
+  - 정답: 정확 검색(IndexFlatL2) 결과
+  - 코퍼스: 벡터스토어 vectors.npy (임베딩 API 호출 없음)
+  - 질의: --queries FILE(한 줄 한 질문, 임베딩 API 사용) 또는 코퍼스에서 뽑은 홀드아웃 벡터
+
+예)
+  python scripts/tune_index.py --k 10 \\
+      --config ivf_flat:nprobe=4,8,16,32 --config hnsw:hnsw_m=32:ef_search=32,64,128 \\
+      --config ivf_pq:pq_m=64:nprobe=16,32 --target 0.95 --json tune.json
+  python scripts/tune_index.py --config sq8:rerank=1,2,4 --config ivf_sq8:nprobe=16:rerank=1,4
+
+양자화 인덱스(sq8/ivf_sq8/ivf_pq)는 서버와 같이 k×rerank개를 뽑아 원본 벡터로 재정렬한 recall을 잰다.
+index_mb는 직렬화된 인덱스 크기 (= INDEX_MMAP 시 page cache에 올라가는 양, vectors.npy 제외).
+
+--apply: 추천 결과가 현재 인덱스와 같은 종류면 그 검색 파라미터(nprobe/efSearch)를 바꾼 새 세대를 게시
+         (현재 세대를 하드링크하고 index_params.json만 다시 씀) → 서버가 CURRENT 교체를 보고 적용.
+         빌드 파라미터는 재빌드 필요. 세대 없는 레거시 디렉터리는 제자리에서 갱신.
+"""
+import argparse
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import faiss
+
+from backend.config.config import VSTORE_DIR, EMBED_MODEL
+from backend.store.generations import GENERATIONS, read_current, clone_staging, derived_info, publish, write_lock
+from backend.store.shards import shard_dirs
+from backend.store.vector_index import (
+    build_index, apply_search_params, default_params, load_vectors, read_params, write_params,
+    rerank_factor, rerank,
+)
+
+SEARCH_KEYS = ("nprobe", "ef_search", "rerank")
+SHOWN_KEYS = {
+    "ivf_flat": ("nlist", "nprobe"),
+    "ivf_pq":   ("nlist", "pq_m", "nprobe", "rerank"),
+    "hnsw":     ("hnsw_m", "ef_search"),
+    "sq8":      ("rerank",),
+    "ivf_sq8":  ("nlist", "nprobe", "rerank"),
+}
+
+def parse_config(spec: str):
+    """'ivf_flat:nlist=1024:nprobe=8,16' → [params, ...] (값이 여러 개면 조합 전개)"""
+    kind, *kvs = spec.split(":")
+    base = dict(default_params(kind))
+    grid = {}
+    for kv in kvs:
+        k, v = kv.split("=", 1)
+        grid[k] = [int(x) for x in v.split(",")]
+    keys = list(grid)
+    for combo in itertools.product(*(grid[k] for k in keys)) if keys else [()]:
+        p = dict(base)
+        p.update(zip(keys, combo))
+        yield p
+
+def embed_queries(path: Path) -> np.ndarray:
+    from openai import OpenAI
+    from dotenv import load_dotenv
+    load_dotenv()
+    qs = [l.strip() for l in path.read_text(encoding="utf-8").splitlines() if l.strip()]
+    client = OpenAI()
+    out = []
+    for i in range(0, len(qs), 64):
+        res = client.embeddings.create(model=EMBED_MODEL, input=qs[i:i + 64])
+        out.extend(d.embedding for d in res.data)
+    return np.array(out, dtype="float32")
+
+def timed_search(index, Q: np.ndarray, k: int, factor: int = 1, vectors=None):
+    """서버와 같은 (1, d) 단건 검색으로 지연 측정 (factor>1이면 k×factor개 → vectors로 재정렬 포함)"""
+    I = np.empty((len(Q), k), dtype="int64")
+    lat = np.empty(len(Q))
+    for j in range(len(Q)):
+        t = time.perf_counter()
+        _, cand = index.search(Q[j:j + 1], k * factor)
+        if factor > 1:
+            _, cand = rerank(vectors, Q[j:j + 1], cand, k)
+        I[j] = cand[0]
+        lat[j] = time.perf_counter() - t
+    return I, lat * 1000.0
+
+def index_mb(index) -> float:
+    return faiss.serialize_index(index).nbytes / 2**20
+
+def recall_at_k(I: np.ndarray, GT: np.ndarray) -> float:
+    k = GT.shape[1]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(I, GT)]))
+
+def apply_params(vdir: Path, update: dict):
+    """검색 파라미터를 바꾼 새 세대 게시 (세대는 불변 — 서버는 CURRENT가 바뀌어야 다시 로드한다)"""
+    if vdir.parent.name != GENERATIONS:
+        for d in shard_dirs(vdir) or [vdir]:
+            write_params(d, dict(read_params(d), **update))
+        print(f"[OK] index_params.json 갱신: {update}")
+        return
+    root = vdir.parent.parent
+    with write_lock(root):  # 임베더 등 다른 쓰기와 겹치지 않게
+        if read_current(root) != vdir.name:
+            print(f"[ERR] 현재 세대에만 적용할 수 있습니다 (CURRENT={read_current(root)})")
+            return
+        name, staging = clone_staging(root, vdir)
+        for d in shard_dirs(staging) or [staging]:
+            write_params(d, dict(read_params(d), **update))  # tmp → os.replace: 하드링크된 원본은 그대로
+        final = publish(root, name, staging, derived_info(vdir, tuned_from=vdir.name, search_params=update))
+    print(f"[OK] 검색 파라미터 {update} → 새 세대 {name} 게시 ({final})")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--vstore", default=str(VSTORE_DIR))
+    ap.add_argument("--config", action="append", default=[], help="종류[:키=값[,값...]]... (반복 가능)")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--queries", type=Path, help="질문 파일 (없으면 코퍼스 홀드아웃 벡터 사용)")
+    ap.add_argument("--n-queries", type=int, default=500)
+    ap.add_argument("--target", type=float, default=0.95, help="추천 기준 recall@k")
+    ap.add_argument("--threads", type=int, default=1, help="faiss omp 스레드 (서버 조건과 맞출 것)")
+    ap.add_argument("--json", type=Path, help="결과 JSON 저장 경로")
+    ap.add_argument("--apply", action="store_true", help="추천 검색 파라미터를 index_params.json에 저장")
+    args = ap.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    vdir = Path(args.vstore)
+    stores = shard_dirs(vdir) or [vdir]
+    parts = [load_vectors(d, mmap=True) for d in stores]
+    X = None if any(p is None for p in parts) else parts[0] if len(parts) == 1 else np.concatenate(parts)
+    if X is None:
+        print("[ERR] vectors.npy 없음. embedder_incremental을 한 번 실행하세요.")
+        return 1
+    X = np.ascontiguousarray(X, dtype="float32")
+
+    if args.queries:
+        Q, corpus = embed_queries(args.queries), X
+    else:
+        # 질의로 쓸 행은 코퍼스에서 제외(자기 자신이 정답이 되는 편향 방지)
+        rng = np.random.default_rng(0)
+        nq = min(args.n_queries, max(1, len(X) // 10))
+        qrows = rng.choice(len(X), size=nq, replace=False)
+        mask = np.ones(len(X), dtype=bool)
+        mask[qrows] = False
+        Q, corpus = X[qrows], X[mask]
+    k = min(args.k, len(corpus))
+    print(f"corpus={len(corpus)} queries={len(Q)} dim={X.shape[1]} k={k}")
+
+    flat = faiss.IndexFlatL2(corpus.shape[1])
+    flat.add(corpus)
+    GT, lat = timed_search(flat, Q, k)
+    results = [{"type": "flat", "recall": 1.0, "p50_ms": float(np.percentile(lat, 50)),
+                "p99_ms": float(np.percentile(lat, 99)), "build_s": 0.0, "index_mb": index_mb(flat)}]
+
+    configs = args.config or ["ivf_flat:nprobe=4,8,16,32,64", "hnsw:ef_search=16,32,64,128",
+                              "ivf_pq:nprobe=8,16,32:rerank=1,4", "sq8:rerank=1,4", "ivf_sq8:nprobe=16:rerank=1,4"]
+    for spec in configs:
+        built = {}
+        for p in parse_config(spec):
+            bkey = json.dumps({kk: v for kk, v in p.items() if kk not in SEARCH_KEYS}, sort_keys=True)
+            if bkey not in built:
+                t = time.perf_counter()
+                built[bkey] = (*build_index(corpus, p), time.perf_counter() - t)
+            index, applied, build_s = built[bkey]
+            applied = dict(applied, **{kk: p[kk] for kk in SEARCH_KEYS})
+            apply_search_params(index, applied)
+            I, lat = timed_search(index, Q, k, rerank_factor(applied), corpus)
+            results.append({
+                "type": applied["type"],
+                "params": {kk: applied[kk] for kk in SHOWN_KEYS.get(applied["type"], ())},
+                "recall": recall_at_k(I, GT),
+                "p50_ms": float(np.percentile(lat, 50)),
+                "p99_ms": float(np.percentile(lat, 99)),
+                "build_s": build_s,
+                "index_mb": index_mb(index),
+            })
+
+    print(f"{'type':<9} {'params':<36} {'recall@' + str(k):>9} {'p50ms':>8} {'p99ms':>8} {'build_s':>8} {'index_mb':>9}")
+    for r in results:
+        ps = ",".join(f"{kk}={v}" for kk, v in r.get("params", {}).items())
+        print(f"{r['type']:<9} {ps:<36} {r['recall']:>9.4f} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} "
+              f"{r['build_s']:>8.2f} {r['index_mb']:>9.1f}")
+
+    ok = [r for r in results if r["recall"] >= args.target]
+    best = min(ok, key=lambda r: r["p99_ms"]) if ok else None
+    if best:
+        print(f"\n추천(recall≥{args.target}, 최소 p99): {best['type']} {best.get('params', {})}")
+    if args.apply and best:
+        cur = read_params(stores[0])
+        if cur.get("type") == best["type"] and best["type"] != "flat":
+            apply_params(vdir, {kk: v for kk, v in best["params"].items() if kk in SEARCH_KEYS})
+        else:
+            print(f"[info] 현재 인덱스({cur.get('type')})와 추천 종류가 달라 적용하지 않음 → INDEX_TYPE={best['type']}로 재빌드")
+    if args.json:
+        args.json.write_text(json.dumps({"k": k, "n": len(corpus), "queries": len(Q),
+                                         "results": results, "recommended": best},
+                                        ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
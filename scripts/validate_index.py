@@ -1,11 +1,422 @@
+"""
+벡터스토어 무결성 검사 + 수리 (예전 repair_metadatas.py 포함)
+  python scripts/validate_index.py [--vstore DIR] [--no-hash] [--workers N] [--json report.json]
+  python scripts/validate_index.py --repair
+
+청크 디렉터리는 한 번만 훑어 (카테고리, 파일 이름) → 경로 맵을 만들고, 저장소마다
+(세대 디렉터리, 샤드 세대면 shards/<NN>마다) 검사한다.
+  오류
+    files     인덱스·메타 파일 없음
+    rows      chunks.bin / vectors.npy / tombstones / bm25 행 수(벡터는 차원도)가 메타와 다름 → 임베더로 재생성
+    ntotal    index.ntotal != 살아있는 행 수 (HNSW는 인덱스에 남은 tombstone 행 포함)
+    orphan    메타 범위 밖이거나 tombstone 행을 가리키는 벡터 (HNSW의 tombstone 행은 정상 — 서버가 가림)
+    dup_ids   인덱스에 같은 id가 둘 이상
+    missing   살아있는 행인데 인덱스에 벡터가 없음
+    dup_rows  같은 청크(path)를 가리키는 살아있는 행이 둘 이상 (샤드 사이 포함)
+    paths     메타 path의 청크가 없지만 rel_path 또는 (카테고리, 파일 이름)으로 찾을 수 있음
+    text      chunks.bin 본문 sha1 != 메타 sha1 (jsonl 청크만, 병렬 해시) → 임베더로 재생성
+  경고 (보고만)
+    lost      메타의 청크를 어디서도 찾을 수 없음 (다음 임베더 실행에서 제거됨)
+    drift     청크 원본 sha1 != 메타 sha1 (다음 임베더 실행에서 다시 임베딩됨, 레거시 *.txt는 병렬 해시)
+종료 코드: (수리 후) 남은 오류가 없으면 0, 있으면 1
+
+--repair: 현재 세대를 새 세대로 하드링크하고 고칠 파일만 tmp → os.replace로 다시 써서 게시
+          (서버는 CURRENT 교체를 보고 넘어간다, 기존 세대는 그대로). 게시 후 새 세대를 다시 검사한다.
+  dup_rows → 앞선 행 tombstone + BM25 재작성
+  orphan / dup_ids / missing → 인덱스에서 삭제 후 vectors.npy에서 다시 추가 (HNSW는 살아있는 행으로 재빌드)
+  paths → 메타 path / rel_path 갱신
+  레거시 vectorstore/dev/current(세대 없음)는 제자리에서 같은 방식으로 파일을 교체한다.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from backend.config.config import VSTORE_DIR
+import numpy as np
+import faiss
+
+from backend.config.config import ROOT_DIR, CHUNKS_DIR, VSTORE_DIR
+from backend.store.bm25 import BM25Index, build_bm25, BM25_FILE
+from backend.store.chunk_store import ChunkStore
+from backend.store.generations import GENERATIONS, read_current, clone_staging, derived_info, publish, write_lock
+from backend.store.meta_store import open_metas, metas_exist, write_metas, META_BIN, META_JSON
+from backend.store.shards import shard_dirs
+from backend.store.vector_index import (
+    read_index, is_id_mapped, remove_rows, build_index, read_params, write_params, NO_REMOVE,
+    load_vectors, load_tombstones, save_tombstones, TOMBSTONES_FILE,
+)
+from pipelines.text_splitter import shard_items, INDEX_SUFFIX
+from pipelines.utils_hash import parallel_sha1
+
+INDEX_FILE = "faiss_index.idx"
+CHUNKS_FILE = "chunks.bin"
+ERRORS = ("files", "rows", "ntotal", "orphan", "dup_ids", "missing", "dup_rows", "paths", "text")
+WARNINGS = ("lost", "drift")
+TEXT_BATCH = 4096
+EXAMPLES = 3
+
+class ChunkIndex:
+    """청크 디렉터리 1회 스캔 결과: 경로 → sha1(jsonl 청크) 또는 None(레거시 *.txt, 필요할 때 해시)"""
+
+    def __init__(self, chunks_dir: Path):
+        self.known, self.by_name, self.by_fn = {}, {}, {}
+        if not chunks_dir.is_dir():
+            return
+        for cat_dir in sorted(chunks_dir.iterdir()):
+            if not cat_dir.is_dir():
+                continue
+            for idx in sorted(cat_dir.glob("shard-*" + INDEX_SUFFIX)):
+                for vpath, fn, sha1, _ in shard_items(idx):
+                    self._add(str(Path(vpath).resolve()), cat_dir.name, fn, sha1)
+            for fp in cat_dir.glob("*.txt"):
+                p = str(fp.resolve())
+                if p not in self.known:  # 형식 전환 후 남은 레거시 파일은 샤드 쪽이 우선
+                    self._add(p, cat_dir.name, fp.name, None)
+
+    def _add(self, path: str, cat: str, fn: str, sha1):
+        self.known[path] = sha1
+        self.by_name[(cat, fn)] = path
+        self.by_fn[fn] = None if fn in self.by_fn else path  # 카테고리가 달라 이름이 겹치면 모호
+
+    def __bool__(self):
+        return bool(self.known)
+
+    def locate(self, m: dict) -> str | None:
+        """메타 행 → 현재 청크 경로 (path → rel_path → (카테고리, 파일 이름) → 파일 이름 순)"""
+        p = m.get("path")
+        if p in self.known:
+            return p
+        if m.get("rel_path"):
+            rp = str((ROOT_DIR / m["rel_path"]).resolve())
+            if rp in self.known:
+                return rp
+        fn = m.get("filename") or (Path(p).name if p else None)
+        if not fn:
+            return None
+        return self.by_name.get((m.get("category"), fn)) or self.by_fn.get(fn)
+
+def _text_sha1(args) -> list:
+    path, rows = args
+    cs = ChunkStore(Path(path))
+    return [hashlib.sha1(cs.raw(r)).hexdigest() for r in rows]
+
+def text_sha1(path: Path, rows: list, workers: int | None) -> list:
+    """chunks.bin 행 본문 sha1 (행이 많으면 프로세스 풀로 나눠 해시)"""
+    if len(rows) < TEXT_BATCH or workers == 1:
+        return _text_sha1((str(path), rows))
+    parts = [(str(path), rows[i:i + TEXT_BATCH]) for i in range(0, len(rows), TEXT_BATCH)]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return [h for part in ex.map(_text_sha1, parts) for h in part]
+
+def _write_index(path: Path, index):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    faiss.write_index(index, str(tmp))
+    os.replace(tmp, path)
+
+def _write_meta_json(path: Path, metas: list):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(metas, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _rel(p: str) -> str | None:
+    try:
+        return Path(p).relative_to(ROOT_DIR).as_posix()
+    except ValueError:
+        return None
+
+class StoreCheck:
+    """저장소 하나(세대 디렉터리 또는 샤드)의 검사 결과와 수리에 필요한 행 목록"""
+
+    def __init__(self, path: Path, label: str):
+        self.path, self.label = Path(path), label
+        self.issues, self.examples = {}, {}
+        self.rows = self.live = self.ntotal = 0
+        self.metas, self.dead = [], None
+        self.fix_paths = {}   # 행 → 새 path
+        self.dup_rows = []    # tombstone할 (앞선) 행
+
+    def add(self, kind: str, n: int, examples=()):
+        if n <= 0:
+            return
+        self.issues[kind] = self.issues.get(kind, 0) + int(n)
+        ex = self.examples.setdefault(kind, [])
+        ex.extend(str(e) for e in list(examples)[:EXAMPLES - len(ex)])
+
+    def check(self, chunks: ChunkIndex, seen: dict, workers: int | None, do_hash: bool, timings: dict):
+        d = self.path
+        if not (d / INDEX_FILE).exists() or not metas_exist(d):
+            self.add("files", 1, [d])
+            return
+        self.metas = metas = list(open_metas(d))
+        n = self.rows = len(metas)
+        self.dead = dead = load_tombstones(d, n)
+        self.live = int(n - dead.sum())
+
+        tf = d / TOMBSTONES_FILE
+        if tf.exists() and len(np.load(tf, mmap_mode="r")) != n:
+            self.add("rows", 1, [f"{TOMBSTONES_FILE}: {len(np.load(tf, mmap_mode='r'))} != {n}"])
+        index = read_index(d / INDEX_FILE, mmap=True)
+        self.ntotal = int(index.ntotal)
+        vecs = load_vectors(d)
+        if vecs is not None and (len(vecs) != n or vecs.shape[1] != index.d):
+            self.add("rows", 1, [f"vectors.npy: {vecs.shape} != ({n}, {index.d})"])
+        chunk_rows_ok = False
+        if (d / CHUNKS_FILE).exists():
+            cn = len(ChunkStore(d / CHUNKS_FILE))
+            chunk_rows_ok = cn == n
+            if not chunk_rows_ok:
+                self.add("rows", 1, [f"{CHUNKS_FILE}: {cn} != {n}"])
+        if (d / BM25_FILE).exists() and len(BM25Index(d / BM25_FILE)) != n:
+            self.add("rows", 1, [f"{BM25_FILE}: {len(BM25Index(d / BM25_FILE))} != {n}"])
+
+        # 인덱스 id ↔ 살아있는 행
+        if is_id_mapped(index):
+            ids = faiss.vector_to_array(faiss.downcast_index(index).id_map).astype("int64")
+            in_range = (ids >= 0) & (ids < n)
+            orphan = ids[~in_range]
+            masked = ids[in_range][dead[ids[in_range]]]
+            if read_params(d).get("type") not in NO_REMOVE:
+                orphan = np.concatenate([orphan, masked])
+                masked = masked[:0]
+            uniq, counts = np.unique(ids, return_counts=True)
+            present = np.zeros(n, dtype=bool)
+            present[ids[in_range]] = True
+            missing = np.flatnonzero(~dead & ~present)
+            self.add("orphan", len(np.unique(orphan)), np.unique(orphan))
+            self.add("dup_ids", int((counts > 1).sum()), uniq[counts > 1])
+            self.add("missing", len(missing), missing)
+            expect = self.live + len(np.unique(masked))
+        else:
+            expect = n
+        if self.ntotal != expect:
+            self.add("ntotal", 1, [f"ntotal {self.ntotal} != expected {expect} (live {self.live})"])
+
+        # 같은 청크를 가리키는 살아있는 행: 최신(뒤쪽) 행을 남긴다. 다른 저장소가 먼저 가졌으면 이쪽이 중복.
+        local = set()
+        for r in np.flatnonzero(~dead)[::-1]:
+            key = metas[r].get("path") or metas[r].get("rel_path")
+            if key in local or key in seen:
+                self.dup_rows.append(int(r))
+            else:
+                local.add(key)
+        for key in local:
+            seen[key] = self.label
+        self.add("dup_rows", len(self.dup_rows), [f"row {r}: {metas[r].get('rel_path')}" for r in self.dup_rows])
+
+        if not chunks:
+            return  # 청크 디렉터리가 없는 노드(서버 전용) → 경로·sha1 검사 생략
+        t = time.perf_counter()
+        lost, drift, legacy, jsonl_rows = [], [], [], []
+        for r in np.flatnonzero(~dead):
+            m = metas[r]
+            p = chunks.locate(m)
+            if p is None:
+                lost.append(f"row {r}: {m.get('rel_path') or m.get('path')}")
+                continue
+            if p != m.get("path"):
+                self.fix_paths[int(r)] = p
+            src = chunks.known[p]
+            if src is None:
+                legacy.append((int(r), p))
+            else:
+                jsonl_rows.append(int(r))
+                if src != m.get("sha1"):
+                    drift.append(f"row {r}: {m.get('rel_path')}")
+        self.add("paths", len(self.fix_paths), [f"row {r}: {metas[r].get('path')} → {p}" for r, p in self.fix_paths.items()])
+        self.add("lost", len(lost), lost)
+        timings["paths"] = timings.get("paths", 0.0) + time.perf_counter() - t
+        if not do_hash:
+            self.add("drift", len(drift), drift)
+            return
+
+        t = time.perf_counter()
+        for (r, p), h in zip(legacy, parallel_sha1([p for _, p in legacy], workers)):
+            if h != metas[r].get("sha1"):
+                drift.append(f"row {r}: {metas[r].get('rel_path')}")
+        self.add("drift", len(drift), drift)
+        if chunk_rows_ok and jsonl_rows:
+            bad = [r for r, h in zip(jsonl_rows, text_sha1(d / CHUNKS_FILE, jsonl_rows, workers))
+                   if h != metas[r].get("sha1")]
+            self.add("text", len(bad), [f"row {r}: {metas[r].get('rel_path')}" for r in bad])
+        timings["hash"] = timings.get("hash", 0.0) + time.perf_counter() - t
+
+    def repair(self, dst: Path) -> list:
+        """수리 가능한 항목을 dst(하드링크된 새 세대의 같은 저장소)에 원자적으로 다시 쓴다. 반환: 한 일 목록"""
+        done = []
+        if "files" in self.issues:
+            return done
+        src, metas, n = self.path, self.metas, self.rows
+        dead = self.dead.copy()
+        if self.dup_rows:
+            dead[self.dup_rows] = True
+            save_tombstones(dst, dead)
+            done.append(f"tombstone {len(self.dup_rows)} duplicate rows")
+        if self.fix_paths:
+            metas = list(metas)
+            for r, p in self.fix_paths.items():
+                m = dict(metas[r], path=p)
+                if _rel(p):
+                    m["rel_path"] = _rel(p)
+                metas[r] = m
+            if (src / META_BIN).exists():
+                write_metas(dst / META_BIN, metas)
+            if (src / META_JSON).exists():
+                _write_meta_json(dst / META_JSON, metas)
+            done.append(f"fix {len(self.fix_paths)} paths")
+
+        if self.dup_rows or any(k in self.issues for k in ("orphan", "dup_ids", "missing", "ntotal")):
+            done += self._repair_index(dst, dead)
+        if self.dup_rows and (src / BM25_FILE).exists() and (src / CHUNKS_FILE).exists():
+            cs = ChunkStore(src / CHUNKS_FILE)
+            if len(cs) == n:
+                build_bm25(dst / BM25_FILE, [cs.text(i) for i in range(n)], dead)
+                done.append("rebuild bm25")
+        return done
+
+    def _repair_index(self, dst: Path, dead: np.ndarray) -> list:
+        src, n = self.path, self.rows
+        vecs = load_vectors(src)
+        has_vecs = vecs is not None and len(vecs) == n
+        index = faiss.read_index(str(src / INDEX_FILE))
+        live = np.flatnonzero(~dead)
+        if is_id_mapped(index):
+            ids = faiss.vector_to_array(faiss.downcast_index(index).id_map).astype("int64")
+            in_range = (ids >= 0) & (ids < n)
+            bad = ids[~in_range]
+            if read_params(src).get("type") not in NO_REMOVE:  # HNSW의 tombstone 행은 남겨 둔다 (서버가 가림)
+                bad = np.concatenate([bad, ids[in_range][dead[ids[in_range]]]])
+            uniq, counts = np.unique(ids, return_counts=True)
+            dup = uniq[counts > 1]
+            present = np.zeros(n, dtype=bool)
+            present[ids[in_range]] = True
+            readd = np.union1d(dup[(dup >= 0) & (dup < n)], np.flatnonzero(~dead & ~present))
+            readd = readd[~dead[readd]]
+            if not len(bad) and not len(dup) and not len(readd):
+                return []
+            if len(readd) and not has_vecs:
+                return ["index: vectors.npy missing, rerun the embedder"]
+            if remove_rows(index, np.unique(np.concatenate([bad, dup]))):
+                if len(readd):
+                    index.add_with_ids(np.ascontiguousarray(vecs[readd], dtype="float32"), readd)
+                _write_index(dst / INDEX_FILE, index)
+                return [f"index: remove {len(np.unique(bad))} orphan, re-add {len(readd)} vectors"]
+        if not has_vecs:
+            return ["index: vectors.npy missing, rerun the embedder"]
+        # 삭제 미지원(HNSW)·레거시 인덱스 → 살아있는 행으로 재빌드
+        params = read_params(src)
+        index, params = build_index(np.asarray(vecs[live]), params, ids=live)
+        params["trained_n"] = len(live)
+        _write_index(dst / INDEX_FILE, index)
+        write_params(dst, params)
+        return [f"index: rebuild {params['type']} from {len(live)} live rows"]
+
+def stores_of(vdir: Path) -> list:
+    return [StoreCheck(sd, f"shard {sd.name}") for sd in shard_dirs(vdir)] or [StoreCheck(vdir, vdir.name)]
+
+def check_all(vdir: Path, chunks: ChunkIndex, args, timings: dict) -> list:
+    t = time.perf_counter()
+    stores, seen = stores_of(vdir), {}
+    for st in stores:
+        st.check(chunks, seen, args.workers, not args.no_hash, timings)
+    timings["check"] = time.perf_counter() - t
+    return stores
+
+def repair_all(vdir: Path, stores: list) -> Path | None:
+    """세대면 새 세대로 게시(기존 세대 불변), 레거시 디렉터리면 제자리 교체. 반환: 수리된 디렉터리"""
+    if vdir.parent.name != GENERATIONS:
+        for st in stores:
+            for a in st.repair(st.path):
+                print(f"  [{st.label}] {a}")
+        return vdir
+    root = vdir.parent.parent
+    with write_lock(root):  # 임베더 등 다른 쓰기와 겹치지 않게 (검사 후 CURRENT가 바뀌었으면 수리하지 않는다)
+        return _repair_generation(root, vdir, stores)
+
+def _repair_generation(root: Path, vdir: Path, stores: list) -> Path | None:
+    if read_current(root) != vdir.name:
+        print(f"[ERR] 현재 세대만 수리할 수 있습니다 (CURRENT={read_current(root)})")
+        return None
+    name, staging = clone_staging(root, vdir)
+    try:
+        repairs = {}
+        for st in stores:
+            done = st.repair(staging / st.path.relative_to(vdir))
+            for a in done:
+                print(f"  [{st.label}] {a}")
+            if done:
+                repairs[st.label] = done
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if not repairs:
+        shutil.rmtree(staging, ignore_errors=True)
+        return None
+    return publish(root, name, staging, derived_info(vdir, repaired_from=vdir.name, repairs=repairs))
+
+def summarize(stores: list) -> dict:
+    total = {}
+    for st in stores:
+        for k, v in st.issues.items():
+            total[k] = total.get(k, 0) + v
+    return total
+
+def print_report(vdir: Path, stores: list, timings: dict):
+    for st in stores:
+        shown = ", ".join(f"{k} {v}" for k, v in st.issues.items()) or "ok"
+        print(f"[{st.label}] rows {st.rows}, live {st.live}, ntotal {st.ntotal} — {shown}")
+        for k, ex in st.examples.items():
+            for e in ex:
+                print(f"    {k}: {e}")
+    total = summarize(stores)
+    errors = sum(v for k, v in total.items() if k in ERRORS)
+    warnings = sum(v for k, v in total.items() if k in WARNINGS)
+    secs = ", ".join(f"{k} {v:.2f}s" for k, v in timings.items())
+    rows = sum(st.rows for st in stores)
+    tag = "[OK]" if not errors else "[ERR]"
+    print(f"{tag} {vdir}: {rows}행, 저장소 {len(stores)}개 — 오류 {errors}, 경고 {warnings} ({secs})")
+    return errors
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--vstore", default=str(VSTORE_DIR), help="검사할 세대 디렉터리 (기본: 현재 세대)")
+    ap.add_argument("--chunks", default=str(CHUNKS_DIR), help="청크 디렉터리 (없으면 경로·sha1 검사 생략)")
+    ap.add_argument("--repair", action="store_true", help="수리 가능한 항목을 고쳐 새 세대로 게시")
+    ap.add_argument("--no-hash", action="store_true", help="sha1 해시 검사(drift의 레거시 파일, text) 생략")
+    ap.add_argument("--workers", type=int, default=None, help="해시 프로세스 수 (기본: CPU 수)")
+    ap.add_argument("--json", type=Path, help="보고서 JSON 저장 경로")
+    args = ap.parse_args(argv)
+
+    vdir = Path(args.vstore)
+    timings = {}
+    t = time.perf_counter()
+    chunks = ChunkIndex(Path(args.chunks))
+    timings["scan"] = time.perf_counter() - t
+    stores = check_all(vdir, chunks, args, timings)
+    errors = print_report(vdir, stores, timings)
+    report = {"vstore": str(vdir), "issues": summarize(stores), "timings": timings,
+              "stores": [{"store": st.label, "rows": st.rows, "live": st.live, "ntotal": st.ntotal,
+                          "issues": st.issues, "examples": st.examples} for st in stores]}
 
-idx = VSTORE_DIR / "faiss_index.idx"
-meta = VSTORE_DIR / "metadatas.json"
+    fixable = any(st.dup_rows or st.fix_paths or
+                  any(k in st.issues for k in ("orphan", "dup_ids", "missing", "ntotal")) for st in stores)
+    if args.repair and fixable:
+        print("🔧 수리 중...")
+        fixed = repair_all(vdir, stores)
+        if fixed is not None:
+            timings = {}
+            t = time.perf_counter()
+            stores = check_all(fixed, chunks, args, timings)
+            errors = print_report(fixed, stores, timings)
+            report["repaired"] = {"vstore": str(fixed), "issues": summarize(stores), "timings": timings}
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 1 if errors else 0
 
-print("Index exists:", idx.exists(), idx)
-print("Meta  exists:", meta.exists(), meta)
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from backend.services.rag_service import _merge
+
+def _ids(hits):
+    return [h["id"] for h in hits]
+
+def test_vector_merge_orders_by_distance():
+    per_shard = [[{"id": 0, "score": 0.1}, {"id": 1, "score": 0.9}],
+                 [{"id": 10, "score": 0.2}, {"id": 11, "score": 5.0}]]
+    assert _ids(_merge(per_shard, 3, "vector")) == [0, 10, 1]
+
+def test_bm25_merge_orders_by_score_descending():
+    per_shard = [[{"id": 0, "score": 3.0, "bm25": 3.0}, {"id": 1, "score": 1.0, "bm25": 1.0}],
+                 [{"id": 10, "score": 7.0, "bm25": 7.0}]]
+    assert _ids(_merge(per_shard, 2, "bm25")) == [10, 0]
+
+def test_hybrid_merge_refuses_dist_and_bm25():
+    per_shard = [[{"id": 0, "score": 0.9, "dist": 0.1, "bm25": 5.0},
+                  {"id": 1, "score": 0.2, "dist": 2.0, "bm25": 0.0}],
+                 [{"id": 10, "score": 0.8, "dist": 0.2, "bm25": 4.0}]]
+    out = _merge(per_shard, 2, "hybrid")
+    assert _ids(out) == [0, 10]
+    assert out[0]["score"] >= out[1]["score"]
+
+def test_hybrid_merge_with_vector_fallback_shard_fuses_with_zero_bm25():
+    # BM25가 없어 vector로 떨어진 샤드: score = dist, bm25 = 0
+    per_shard = [[{"id": 0, "score": 0.1, "dist": 0.1, "bm25": 0.0},
+                  {"id": 1, "score": 0.9, "dist": 0.9, "bm25": 0.0}],
+                 [{"id": 10, "score": 0.7, "dist": 0.2, "bm25": 6.0}]]
+    assert _ids(_merge(per_shard, 2, "hybrid")) == [10, 0]
+
+def test_hybrid_merge_without_dist_sorts_by_ascending_distance():
+    # dist가 없는 히트(예전 노드의 vector 결과)는 score를 L2 거리로 본다 — 가장 먼 청크가 이기면 안 됨
+    per_shard = [[{"id": 0, "score": 0.1}, {"id": 1, "score": 0.9}],
+                 [{"id": 10, "score": 0.2}, {"id": 11, "score": 5.0}]]
+    assert _ids(_merge(per_shard, 2, "hybrid")) == [0, 10]